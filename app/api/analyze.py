@@ -1,24 +1,47 @@
-from fastapi import APIRouter, UploadFile, File  # type: ignore
-from app.services.excel_reader import load_excel
-from app.services.analysis_engine import analyze_sheet
-from app.services.entity_summary_engine import analyze_entity_summary
-from app.services.multi_tender_engine import analyze_multi_tender_findings
-from app.services.format_detector import detect_data_format, get_format_info
-from app.services.summary_engine import (
-    generate_summary,
-    generate_insights,
-    generate_overall_summary,
-    generate_entity_summary,
-    generate_entity_insights,
-    generate_multi_tender_summary,
-    generate_multi_tender_insights
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Request  # type: ignore
+from app.api.upload import resolve_upload
+from app.config import PARALLEL_SHEETS
+from app.services.columnar_cache import columnar_cache
+from app.services.compression import (
+    compressed_response,
+    compressed_stream,
+    compression_stats
 )
+from app.services.pipeline import parse_sections, read_workbook, read_parsed_workbook
+from app.services.result_formats import MEDIA_TYPES, TABLES, ResultFormat, negotiate_format
+from app.services.response_shaping import (
+    DEFAULT_PAGE_SIZE,
+    FINDING_FIELDS,
+    MAX_PAGE_SIZE,
+    TENDER_FIELDS,
+    PagedListsTooLarge,
+    ResponseShape,
+    parse_fields
+)
+from app.services.response_cache import (
+    response_cache,
+    sheet_cache,
+    cache_key,
+    analyze_with_sheet_cache,
+    analyze_sheets_in_parallel,
+    stream_analysis
+)
+from app.services.uploads import run_with_contents
+from app.services.worker_pool import PoolBusyError
 
 router = APIRouter()
 
 
 @router.post("/analyze")
-async def analyze_excel(file: UploadFile = File(...)):
+async def analyze_excel(request: Request,
+                        file: UploadFile = File(None), file_id: str = Form(None),
+                        sections: str = Query(None),
+                        finding_fields: str = Query(None),
+                        tender_fields: str = Query(None),
+                        large_lists: str = Query("inline"),
+                        page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                        layout: str = Query("nested"),
+                        table: str = Query(None)):
     """
     Analyze uploaded Excel file with comprehensive audit metrics
 
@@ -36,61 +59,168 @@ async def analyze_excel(file: UploadFile = File(...)):
     - Score gap analysis
     - Red flag detection
     - Entity and checklist breakdowns
+
+    Responses are cached by the content of the uploaded file, so uploading
+    the same workbook again returns the earlier result without re-parsing
+    it (see the X-Cache response header and /api/cache/stats). When only
+    some sheets changed, the unchanged sheets' results are reused.
+
+    Send either the file, or the file_id of a workbook sent to /api/upload.
+
+    sections (comma-separated) limits every sheet's result to the headline
+    metrics plus the named sections: pe_name_analysis,
+    checklist_detailed_analysis, entity_analysis, status_detailed_analysis,
+    budget_distribution, summary and insights. Only those, and what they
+    depend on, are computed: sections=summary still runs every breakdown
+    the summary text draws on. An empty sections= returns the headline
+    metrics only; omit it for everything.
+
+    Multi-tender sheets list every finding and every PE's tenders. To cut
+    those lists down, finding_fields and tender_fields (comma-separated)
+    keep only the named keys of each finding and tender, and
+    large_lists=paged leaves them out: each sheet then returns the first
+    page_size findings with a next_cursor, and per-PE tenders_url links,
+    to be fetched page by page from /api/results. layout=normalized keeps
+    the lists but lists each PE and each distinct tender once: findings
+    and PEs carry tender_ids into the sheet's tenders.items, and
+    entity_analysis and top_entities_by_budget name PEs of pe_analysis
+    instead of copying them.
+
+    JSON is the default. With Accept: application/msgpack the same result
+    comes as MessagePack; with Accept: application/vnd.apache.arrow.stream
+    and table=detailed_findings, pe_analysis or detailed_entities, that
+    section of every sheet comes as an Arrow IPC stream, one row per
+    finding or entity with a sheet column. Either needs its library
+    (msgpack, pyarrow) installed on the server, or the request gets 406.
+
+    With Accept: application/x-ndjson the response is streamed instead:
+    one {"sheet", "result"} line per sheet as soon as it is analyzed, in
+    the order the sheets finish, then a {"status", "sheets_analyzed",
+    "overall_summary"} line. Streams take sections, but not the field,
+    paging, layout or table options, and are not cached as a whole.
     """
-    sheets = load_excel(file.file)
-
-    results = {}
-    detected_formats = {}
-
-    for sheet_name, df in sheets.items():
-        # Detect data format
-        format_type = detect_data_format(df)
-        format_info = get_format_info(df)
-        detected_formats[sheet_name] = format_info
-
-        # Route to appropriate analysis engine
-        if format_type == 'detailed_findings':
-            analysis = analyze_sheet(df)
-            summary = generate_summary(sheet_name, analysis)
-            insights = generate_insights(
-                analysis) if 'error' not in analysis else {}
-
-        elif format_type == 'detailed_findings_multi_tender':
-            analysis = analyze_multi_tender_findings(df)
-            summary = generate_multi_tender_summary(sheet_name, analysis)
-            insights = generate_multi_tender_insights(
-                analysis) if 'error' not in analysis else {}
-
-        elif format_type == 'entity_summary':
-            analysis = analyze_entity_summary(df)
-            summary = generate_entity_summary(sheet_name, analysis)
-            insights = generate_entity_insights(
-                analysis) if 'error' not in analysis else {}
+    format_name = negotiate_format(request.headers.get("accept"))
+    if format_name is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Available response types: {', '.join(MEDIA_TYPES.values())}")
+    try:
+        sections = parse_sections(sections)
+        if large_lists not in ("inline", "paged"):
+            raise ValueError("large_lists must be 'inline' or 'paged'")
+        if layout not in ("nested", "normalized"):
+            raise ValueError("layout must be 'nested' or 'normalized'")
+        if layout == "normalized" and large_lists == "paged":
+            raise ValueError("layout=normalized needs large_lists=inline")
+        shape = ResponseShape(
+            parse_fields(finding_fields, FINDING_FIELDS, "finding fields"),
+            parse_fields(tender_fields, TENDER_FIELDS, "tender fields"),
+            page_size if large_lists == "paged" else None,
+            layout == "normalized")
+        if format_name == "arrow":
+            if table not in TABLES:
+                raise ValueError(
+                    f"Arrow responses need table= one of: {', '.join(TABLES)}")
+            if shape.paged:
+                raise ValueError("large_lists=paged does not apply to Arrow tables")
+        if format_name == "ndjson" and (
+                shape.paged or shape.cache_variant() is not None or table is not None):
+            raise ValueError(
+                "NDJSON streams take sections only, not finding_fields, "
+                "tender_fields, large_lists, layout or table")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not shape.paged and shape.cache_variant() is None:
+        shape = None
+    result_format = ResultFormat(format_name, table if format_name == "arrow" else None)
+    headers = {"Vary": "Accept"}
+
+    contents, digest, upload = await resolve_upload(file, file_id)
+
+    if format_name == "ndjson":
+        try:
+            lines = await stream_analysis(contents, digest, upload, sections)
+        except PoolBusyError:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many analyses in progress, please retry shortly",
+                headers={"Retry-After": "5"})
+        return compressed_stream(request, lines, headers,
+                                 media_type=MEDIA_TYPES[format_name])
+
+    # Paged responses point at lists that expire, so they are never cached;
+    # their own key variant keeps them from ever standing in for the plain
+    # response
+    cacheable = shape is None or shape.cacheable
+    key = cache_key("analyze", digest, sections, (
+        shape.cache_variant() if shape is not None else None,
+        None if cacheable else "paged",
+        result_format.cache_variant()))
 
+    if cacheable:
+        body = response_cache.get(key)
+        if body is not None:
+            return await compressed_response(
+                request, body, {**headers, "X-Cache": "HIT"},
+                media_type=MEDIA_TYPES[format_name])
+
+    async def analyze(contents):
+        if PARALLEL_SHEETS:
+            return await analyze_sheets_in_parallel(contents, digest, sections,
+                                                    shape, result_format)
+        return await analyze_with_sheet_cache(
+            read_workbook, contents, digest, sections=sections, shape=shape,
+            result_format=result_format)
+
+    # Parsing and analysis run on the worker pool so the event loop stays
+    # free for other requests while a large workbook is processed
+    try:
+        if upload is not None and not upload.stored:
+            body = await analyze_with_sheet_cache(
+                read_parsed_workbook, upload.headers, upload.sheets,
+                sections=sections, shape=shape, result_format=result_format)
         else:
-            # Unknown format - provide basic info
-            analysis = {
-                "error": f"Unknown data format. Columns found: {', '.join(df.columns[:10])}",
-                "format_info": format_info
-            }
-            summary = f"{sheet_name}: Unknown format - cannot analyze"
-            insights = {}
-
-        results[sheet_name] = {
-            "data_format": format_type,
-            "format_info": format_info,
-            "analysis": analysis,
-            "summary": summary,
-            "insights": insights
-        }
-
-    # Generate overall summary across all sheets
-    overall_summary = generate_overall_summary(results)
-    overall_summary['detected_formats'] = detected_formats
+            body = await run_with_contents(analyze, contents, upload)
+    except PoolBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many analyses in progress, please retry shortly",
+            headers={"Retry-After": "5"})
+    except PagedListsTooLarge as e:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{e}; select fewer finding_fields and tender_fields, "
+                   f"or use large_lists=inline")
+
+    if cacheable:
+        response_cache.set(key, body)
+    return await compressed_response(request, body, {**headers, "X-Cache": "MISS"},
+                                     media_type=MEDIA_TYPES[format_name])
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Hit/miss counters and memory use of the /api/analyze caches
 
+    responses counts whole-workbook hits, sheets counts per-sheet hits on
+    workbooks that were not cached as a whole. columnar describes the
+    on-disk Feather cache, including sheets it could not store.
+    """
     return {
-        "status": "success",
-        "sheets_analyzed": len(results),
-        "overall_summary": overall_summary,
-        "results": results
+        "responses": response_cache.stats(),
+        "sheets": sheet_cache.stats(),
+        "columnar": columnar_cache.stats()
     }
+
+
+@router.get("/compression/stats")
+async def get_compression_stats():
+    """
+    Bytes sent before and after compression per encoding
+
+    Covers /api/analyze, /api/validate and /api/preview; ratio is bytes_in
+    over bytes_out.
+    """
+    return compression_stats.stats()
@@ -0,0 +1,154 @@
+from typing import Any, Dict, List, Union
+
+import pandas as pd
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException  # type: ignore
+from pydantic import BaseModel
+from app.api.upload import resolve_upload
+from app.services.incremental import (
+    IncrementalSession,
+    incremental_store,
+    open_parsed_sheets,
+    open_sheets
+)
+from app.services.json_encoder import FastJSONResponse
+from app.services.uploads import run_with_contents
+from app.services.worker_pool import analysis_pool, PoolBusyError
+
+router = APIRouter()
+
+
+class RowChanges(BaseModel):
+    # New or changed rows: the key column and the columns to set
+    rows: List[Dict[str, Any]] = []
+    # Keys of rows to delete
+    deleted: List[Union[str, int, float]] = []
+
+
+@router.post("/incremental")
+async def create_incremental_session(file: UploadFile = File(None),
+                                     file_id: str = Form(None),
+                                     key_column: str = Form(...)):
+    """
+    Start an incremental analysis of a workbook's detailed findings sheets
+
+    key_column names the column that identifies a row (e.g. "#" or a
+    finding reference); its values must be unique within each sheet.
+    Returns a session_id and each sheet's analysis, in the /api/analyze
+    analysis format. Send new, changed and deleted rows to
+    /api/incremental/{session_id}/sheets/{sheet_name}/rows afterwards
+    to have the analysis updated without re-sending the workbook.
+
+    Send either the file, or the file_id of a workbook sent to /api/upload.
+    """
+    contents, digest, upload = await resolve_upload(file, file_id)
+
+    try:
+        if upload is not None and not upload.stored:
+            sheets, skipped = await analysis_pool.run(
+                open_parsed_sheets, upload.headers, upload.sheets, key_column)
+        else:
+            sheets, skipped = await run_with_contents(
+                lambda contents: analysis_pool.run(
+                    open_sheets, contents, digest, key_column),
+                contents, upload)
+
+    except PoolBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many analyses in progress, please retry shortly",
+            headers={"Retry-After": "5"})
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=400, detail=f"Error reading file: {str(e)}")
+
+    if not sheets:
+        raise HTTPException(
+            status_code=400,
+            detail="No detailed findings sheet with the key column to analyze")
+
+    session = IncrementalSession(
+        file.filename if upload is None else upload.filename,
+        key_column, sheets, skipped)
+    if not incremental_store.set(session.id, session):
+        raise HTTPException(
+            status_code=413,
+            detail="Workbook is too large to keep for incremental analysis")
+
+    return FastJSONResponse(session.to_summary())
+
+
+@router.get("/incremental/{session_id}")
+async def get_incremental_session(session_id: str):
+    """
+    Current analysis of every sheet of an incremental session
+    """
+    return FastJSONResponse(_get_session(session_id).to_summary())
+
+
+@router.post("/incremental/{session_id}/sheets/{sheet_name}/rows")
+async def update_incremental_sheet(session_id: str, sheet_name: str,
+                                   changes: RowChanges):
+    """
+    Add, change or delete rows of a sheet and return its updated analysis
+
+    Each entry of rows carries the key column and the columns to set:
+    rows with a new key are appended, rows with a known key are updated
+    (columns left out keep their values), e.g. a status change is just
+    {"#": 12, "Status": "CLOSED"}. deleted lists the keys of rows to
+    remove. Only the changed rows are re-aggregated.
+    """
+    session = _get_session(session_id)
+    if sheet_name not in session.sheets:
+        raise HTTPException(
+            status_code=404, detail=f"No incrementally analyzed sheet '{sheet_name}'")
+
+    # Only the changed rows are looked up here; aggregating them and
+    # rebuilding the touched groups' entries runs on the worker pool
+    try:
+        summary = await session.update(
+            sheet_name, pd.DataFrame(changes.rows), changes.deleted,
+            analysis_pool.run)
+
+    except PoolBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many analyses in progress, please retry shortly",
+            headers={"Retry-After": "5"})
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Restart the session's time-to-live and account for its new size
+    if not incremental_store.set(session.id, session):
+        raise HTTPException(
+            status_code=413,
+            detail="Sheets grew too large to keep, the session was discarded")
+
+    return FastJSONResponse({
+        "session_id": session.id,
+        "sheet": sheet_name,
+        "changes": summary,
+        **session.sheet_result(sheet_name)
+    })
+
+
+@router.delete("/incremental/{session_id}")
+async def delete_incremental_session(session_id: str):
+    """
+    Discard an incremental session before it expires
+    """
+    _get_session(session_id)
+    incremental_store.delete(session_id)
+    return {"status": "deleted", "session_id": session_id}
+
+
+def _get_session(session_id):
+    session = incremental_store.get(session_id)
+    if session is None:
+        raise HTTPException(
+            status_code=404, detail="Session not found or it has expired")
+    return session
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, UploadFile, File, HTTPException  # type: ignore
+from fastapi.responses import JSONResponse, Response  # type: ignore
+from app.services.jobs import job_manager
+from app.services.worker_pool import PoolBusyError
+
+router = APIRouter()
+
+
+@router.post("/jobs", status_code=202)
+async def create_job(file: UploadFile = File(...)):
+    """
+    Start a background analysis of an uploaded Excel file
+
+    Runs the same format detection and analysis as /api/analyze, but
+    returns a job id straight away. Poll /api/jobs/{job_id} for progress
+    and fetch the response from /api/jobs/{job_id}/result once the job has
+    completed. Results are kept for JOB_RESULT_TTL seconds.
+    """
+    contents = await file.read()
+
+    try:
+        job = job_manager.submit(contents, file.filename)
+    except PoolBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many analysis jobs in progress, please retry shortly",
+            headers={"Retry-After": "30"})
+
+    return {
+        **job.to_status(),
+        "status_url": f"/api/jobs/{job.id}",
+        "result_url": f"/api/jobs/{job.id}/result"
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status of an analysis job with per-sheet progress
+
+    status is queued, running, completed or failed. Each sheet moves
+    through pending, running and completed.
+    """
+    job = _get_job(job_id)
+    return job.to_status()
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """
+    Result of a completed analysis job, in the /api/analyze response format
+
+    Returns 202 with the job status while it is still queued or running,
+    and 409 if it failed.
+    """
+    job = _get_job(job_id)
+
+    if job.status == "completed":
+        return Response(job.result, media_type="application/json")
+
+    if job.status == "failed":
+        raise HTTPException(
+            status_code=409, detail=f"Job failed: {job.error}")
+
+    return JSONResponse(job.to_status(), status_code=202)
+
+
+def _get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404, detail="Job not found or its result has expired")
+    return job
@@ -0,0 +1,95 @@
+from fastapi import APIRouter, HTTPException, Query  # type: ignore
+from app.services.response_shaping import (
+    DEFAULT_PAGE_SIZE,
+    FINDING_FIELDS,
+    MAX_PAGE_SIZE,
+    TENDER_FIELDS,
+    ResponseShape,
+    page_of,
+    paged_results,
+    parse_fields
+)
+from app.services.json_encoder import FastJSONResponse
+
+router = APIRouter()
+
+
+@router.get("/results/{result_id}/sheets/{sheet_name}/findings")
+async def get_result_findings(result_id: str, sheet_name: str,
+                              cursor: str = Query(None),
+                              limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                              fields: str = Query(None)):
+    """
+    A page of a multi-tender sheet's findings from /api/analyze?large_lists=paged
+
+    Start from the next_cursor of the sheet's detailed_findings and pass
+    each page's next_cursor on until it is null. fields keeps only the
+    named keys of each finding, as finding_fields does on /api/analyze.
+    """
+    lists = _get_sheet(result_id, sheet_name)
+    findings, next_cursor = _page(lists['findings'], cursor, limit)
+
+    try:
+        shape = ResponseShape(parse_fields(fields, FINDING_FIELDS, "finding fields"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return FastJSONResponse({
+        "result_id": result_id,
+        "sheet": sheet_name,
+        "total": len(lists['findings']),
+        "findings": [shape.finding(finding) for finding in findings],
+        "next_cursor": next_cursor
+    })
+
+
+@router.get("/results/{result_id}/sheets/{sheet_name}/tenders")
+async def get_result_tenders(result_id: str, sheet_name: str, pe: str = Query(...),
+                             cursor: str = Query(None),
+                             limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                             fields: str = Query(None)):
+    """
+    A page of one procuring entity's tenders from /api/analyze?large_lists=paged
+
+    The tenders_url of each pe_analysis entry points here.
+    """
+    lists = _get_sheet(result_id, sheet_name)
+    if pe not in lists['pe_tenders']:
+        raise HTTPException(status_code=404, detail=f"No procuring entity '{pe}'")
+
+    all_tenders = lists['pe_tenders'][pe]
+    tenders, next_cursor = _page(all_tenders, cursor, limit)
+
+    try:
+        shape = ResponseShape(tender_fields=parse_fields(fields, TENDER_FIELDS, "tender fields"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return FastJSONResponse({
+        "result_id": result_id,
+        "sheet": sheet_name,
+        "pe_name": pe,
+        "total": len(all_tenders),
+        "tenders": shape.tenders(tenders),
+        "next_cursor": next_cursor
+    })
+
+
+def _get_sheet(result_id, sheet_name):
+    entry = paged_results.get(result_id)
+    if entry is None:
+        raise HTTPException(
+            status_code=404, detail="Result not found or it has expired")
+
+    lists, _ = entry
+    if sheet_name not in lists:
+        raise HTTPException(
+            status_code=404, detail=f"No paged lists for sheet '{sheet_name}'")
+    return lists[sheet_name]
+
+
+def _page(items, cursor, limit):
+    try:
+        return page_of(items, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
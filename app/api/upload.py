@@ -0,0 +1,81 @@
+from fastapi import APIRouter, UploadFile, File, HTTPException  # type: ignore
+from app.services.pipeline import upload_workbook
+from app.services.response_cache import read_upload
+from app.services.uploads import UploadedWorkbook, upload_store
+from app.services.worker_pool import analysis_pool, PoolBusyError
+
+router = APIRouter()
+
+
+@router.post("/upload")
+async def upload_excel(file: UploadFile = File(...)):
+    """
+    Upload and parse an Excel file once for later requests
+
+    Returns a file_id that /api/validate, /api/preview and /api/analyze
+    accept (as the file_id form field) instead of the file, so the
+    workbook is not uploaded and parsed again for each of them. Uploads
+    expire after UPLOAD_TTL seconds, or earlier when the store is full.
+    """
+    contents, digest = await read_upload(file)
+
+    try:
+        headers, shapes, sheets = await analysis_pool.run(
+            upload_workbook, contents, digest)
+
+    except PoolBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many analyses in progress, please retry shortly",
+            headers={"Retry-After": "5"})
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=400, detail=f"Error reading file: {str(e)}")
+
+    upload = UploadedWorkbook(file.filename, digest, headers, shapes, contents,
+                              sheets)
+    if not upload_store.set(upload.id, upload):
+        raise HTTPException(
+            status_code=413,
+            detail="Workbook is too large to keep, upload it with each request instead")
+
+    return upload.to_summary()
+
+
+@router.delete("/upload/{file_id}")
+async def delete_upload(file_id: str):
+    """
+    Discard an uploaded workbook before it expires
+    """
+    get_upload(file_id)
+    upload_store.delete(file_id)
+    return {"status": "deleted", "file_id": file_id}
+
+
+def get_upload(file_id):
+    upload = upload_store.get(file_id)
+    if upload is None:
+        raise HTTPException(
+            status_code=404, detail="Upload not found or it has expired")
+    return upload
+
+
+async def resolve_upload(file, file_id):
+    """
+    (contents, digest, upload) for an endpoint taking either a file or a
+    file_id
+
+    contents is None for a file_id and upload is None for a file; digest is
+    the SHA-256 of the workbook's bytes either way.
+    """
+    if (file is None) == (file_id is None):
+        raise HTTPException(
+            status_code=400, detail="Send either a file or a file_id")
+
+    if file_id is not None:
+        upload = get_upload(file_id)
+        return None, upload.digest, upload
+
+    contents, digest = await read_upload(file)
+    return contents, digest, None
@@ -1,51 +1,44 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException  # type: ignore
-from app.services.excel_reader import load_excel
-from app.services.data_validator import (
-    validate_excel_structure,
-    get_data_quality_report,
-    sanitize_data,
-    validate_data_ranges
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request  # type: ignore
+from app.api.upload import resolve_upload
+from app.services.compression import compressed_response
+from app.services.pipeline import (
+    render_json,
+    validate_workbook,
+    validate_sheets,
+    preview_workbook,
+    preview_sheets
 )
+from app.services.uploads import run_with_contents
+from app.services.worker_pool import analysis_pool, PoolBusyError
 
 router = APIRouter()
 
 
 @router.post("/validate")
-async def validate_excel(file: UploadFile = File(...)):
+async def validate_excel(request: Request, file: UploadFile = File(None),
+                         file_id: str = Form(None)):
     """
     Validate Excel file structure and data quality before analysis
-    """
-    try:
-        sheets = load_excel(file.file)
-
-        validation_results = {}
-
-        for sheet_name, df in sheets.items():
-            # Validate structure
-            is_valid, errors = validate_excel_structure(df)
-
-            # Get data quality report
-            quality_report = get_data_quality_report(df)
 
-            # Validate data ranges
-            range_warnings = validate_data_ranges(df)
-
-            validation_results[sheet_name] = {
-                "is_valid": is_valid,
-                "errors": errors,
-                "quality_report": quality_report,
-                "range_warnings": range_warnings
-            }
-
-        # Overall validation status
-        all_valid = all(result["is_valid"]
-                        for result in validation_results.values())
+    Send either the file, or the file_id of a workbook sent to /api/upload.
+    """
+    contents, digest, upload = await resolve_upload(file, file_id)
 
-        return {
-            "status": "valid" if all_valid else "invalid",
-            "sheets_validated": len(validation_results),
-            "validation_results": validation_results
-        }
+    try:
+        if upload is not None and not upload.stored:
+            body = await analysis_pool.run(render_json, validate_sheets, upload.sheets)
+        else:
+            body = await run_with_contents(
+                lambda contents: analysis_pool.run(
+                    render_json, validate_workbook, contents, digest),
+                contents, upload)
+        return await compressed_response(request, body)
+
+    except PoolBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many analyses in progress, please retry shortly",
+            headers={"Retry-After": "5"})
 
     except Exception as e:
         raise HTTPException(
@@ -53,31 +46,30 @@ async def validate_excel(file: UploadFile = File(...)):
 
 
 @router.post("/preview")
-async def preview_excel(file: UploadFile = File(...)):
+async def preview_excel(request: Request, file: UploadFile = File(None),
+                        file_id: str = Form(None)):
     """
     Preview Excel file contents (first 10 rows of each sheet)
-    """
-    try:
-        sheets = load_excel(file.file)
-
-        preview_data = {}
 
-        for sheet_name, df in sheets.items():
-            # Get first 10 rows
-            preview_df = df.head(10)
-
-            preview_data[sheet_name] = {
-                "total_rows": len(df),
-                "total_columns": len(df.columns),
-                "columns": list(df.columns),
-                "preview": preview_df.to_dict(orient='records')
-            }
+    Send either the file, or the file_id of a workbook sent to /api/upload.
+    """
+    contents, digest, upload = await resolve_upload(file, file_id)
 
-        return {
-            "status": "success",
-            "sheets": len(preview_data),
-            "data": preview_data
-        }
+    try:
+        if upload is not None and not upload.stored:
+            body = await analysis_pool.run(render_json, preview_sheets, upload.sheets)
+        else:
+            body = await run_with_contents(
+                lambda contents: analysis_pool.run(
+                    render_json, preview_workbook, contents, digest),
+                contents, upload)
+        return await compressed_response(request, body)
+
+    except PoolBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many analyses in progress, please retry shortly",
+            headers={"Retry-After": "5"})
 
     except Exception as e:
         raise HTTPException(
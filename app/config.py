@@ -0,0 +1,87 @@
+"""
+Runtime settings, read from environment variables
+"""
+import os
+
+
+def _int_setting(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+# Worker processes that parse workbooks and run the analysis engines.
+# 0 runs them on a thread pool inside the API process instead.
+ANALYSIS_POOL_SIZE = _int_setting("ANALYSIS_POOL_SIZE", os.cpu_count() or 1)
+
+# 1 parses and analyzes the sheets of an /api/analyze upload on separate
+# workers at once, 0 (the default) handles them one after another in a
+# single task. Every sheet task opens the workbook again, so even when on,
+# only workbooks with two or more sheets of PARALLEL_SHEET_ROWS data rows
+# (as their files record them) are split.
+PARALLEL_SHEETS = _int_setting("PARALLEL_SHEETS", 0)
+PARALLEL_SHEET_ROWS = _int_setting("PARALLEL_SHEET_ROWS", 5_000)
+
+# Uploads allowed to wait for a free worker. Requests beyond
+# ANALYSIS_POOL_SIZE + ANALYSIS_QUEUE_DEPTH get 503 instead of queueing.
+ANALYSIS_QUEUE_DEPTH = _int_setting("ANALYSIS_QUEUE_DEPTH", 8)
+
+# Seconds a finished /api/jobs result is kept before it is evicted
+JOB_RESULT_TTL = _int_setting("JOB_RESULT_TTL", 3600)
+
+# Jobs that may be queued or running at once; more get 503
+JOB_MAX_ACTIVE = _int_setting("JOB_MAX_ACTIVE", 32)
+
+# Memory budget in bytes for finished /api/jobs results; the oldest go first
+JOB_RESULT_BYTES = _int_setting("JOB_RESULT_BYTES", 256 * 1024 * 1024)
+
+# Detailed findings and multi-tender sheets with more data rows than this
+# are analyzed chunk by chunk as they are read instead of being loaded
+# whole, so memory follows the chunk size rather than the sheet size.
+# 0 (the default) loads every sheet whole, which is faster: set it where
+# memory rather than time is short.
+CHUNKED_ANALYSIS_ROWS = _int_setting("CHUNKED_ANALYSIS_ROWS", 0)
+
+# Memory budget in bytes for cached /api/analyze responses; 0 disables it
+RESPONSE_CACHE_BYTES = _int_setting("RESPONSE_CACHE_BYTES", 256 * 1024 * 1024)
+
+# Memory budget in bytes for cached per-sheet analysis results; 0 disables it
+SHEET_CACHE_BYTES = _int_setting("SHEET_CACHE_BYTES", 128 * 1024 * 1024)
+
+# Seconds a workbook uploaded to /api/upload stays available by file id
+UPLOAD_TTL = _int_setting("UPLOAD_TTL", 1800)
+
+# Memory budget in bytes for uploaded workbooks; the oldest are evicted first
+UPLOAD_STORE_BYTES = _int_setting("UPLOAD_STORE_BYTES", 512 * 1024 * 1024)
+
+# Seconds an /api/incremental session is kept after it was last updated
+INCREMENTAL_TTL = _int_setting("INCREMENTAL_TTL", 1800)
+
+# Memory budget in bytes for /api/incremental sessions; the least recently
+# updated are evicted first
+INCREMENTAL_STORE_BYTES = _int_setting("INCREMENTAL_STORE_BYTES", 256 * 1024 * 1024)
+
+# Seconds the lists paged out of an /api/analyze response stay available
+# from /api/results
+PAGED_RESULT_TTL = _int_setting("PAGED_RESULT_TTL", 1800)
+
+# Memory budget in bytes for paged-out result lists; the oldest go first
+PAGED_RESULT_BYTES = _int_setting("PAGED_RESULT_BYTES", 256 * 1024 * 1024)
+
+# /api/analyze, /api/validate and /api/preview bodies smaller than this
+# are sent uncompressed whatever the client accepts
+COMPRESSION_MIN_BYTES = _int_setting("COMPRESSION_MIN_BYTES", 1024)
+
+# Compression levels, at the fast end of each codec's range by default:
+# large analyses are compressed per request, so speed matters more than
+# the last few percent of size. zstd needs zstandard, br needs brotli.
+GZIP_LEVEL = _int_setting("GZIP_LEVEL", 5)
+ZSTD_LEVEL = _int_setting("ZSTD_LEVEL", 3)
+BROTLI_QUALITY = _int_setting("BROTLI_QUALITY", 4)
+
+# Directory for the on-disk columnar (Feather) cache of parsed sheets.
+# Needs pyarrow; unset disables the cache.
+COLUMNAR_CACHE_DIR = os.getenv("COLUMNAR_CACHE_DIR", "")
+
+# Disk budget in bytes for COLUMNAR_CACHE_DIR; least recently used
+# workbooks are deleted beyond it
+COLUMNAR_CACHE_MAX_BYTES = _int_setting("COLUMNAR_CACHE_MAX_BYTES", 1024 * 1024 * 1024)
@@ -1,7 +1,24 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI  # type: ignore
 from fastapi.middleware.cors import CORSMiddleware  # type: ignore
 from app.api.analyze import router as analyze_router
 from app.api.validate import router as validate_router
+from app.api.jobs import router as jobs_router
+from app.api.upload import router as upload_router
+from app.api.incremental import router as incremental_router
+from app.api.results import router as results_router
+from app.services.json_encoder import FastJSONResponse
+from app.services.jobs import job_manager
+from app.services.worker_pool import analysis_pool
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    # Stop background jobs and the analysis worker processes with the server
+    job_manager.shutdown()
+    analysis_pool.shutdown()
+
 
 app = FastAPI(
     title="Audit Intelligence Engine",
@@ -22,6 +39,10 @@ app = FastAPI(
     1. Upload your Excel file using `/api/analyze` endpoint
     2. Validate data quality with `/api/validate` endpoint
     3. Preview data with `/api/preview` endpoint
+    4. For very large workbooks, start a background job with `/api/jobs` and poll it
+    5. To validate, preview and analyze one workbook, send it once to `/api/upload` and pass the returned `file_id`
+    6. To keep an analysis current as findings change, start a session with `/api/incremental` and send only the changed rows
+    7. For large multi-tender sheets, analyze with `large_lists=paged` and page through the lists with `/api/results`
     """,
     version="2.0.0",
     contact={
@@ -30,7 +51,9 @@ app = FastAPI(
     },
     license_info={
         "name": "MIT",
-    }
+    },
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # CORS middleware configuration
@@ -45,6 +68,10 @@ app.add_middleware(
 # Include routers
 app.include_router(analyze_router, prefix="/api", tags=["Analysis"])
 app.include_router(validate_router, prefix="/api", tags=["Validation"])
+app.include_router(jobs_router, prefix="/api", tags=["Jobs"])
+app.include_router(upload_router, prefix="/api", tags=["Uploads"])
+app.include_router(incremental_router, prefix="/api", tags=["Incremental"])
+app.include_router(results_router, prefix="/api", tags=["Results"])
 
 
 @app.get("/")
@@ -58,6 +85,10 @@ async def root():
         "status": "operational",
         "endpoints": {
             "analysis": "/api/analyze",
+            "jobs": "/api/jobs",
+            "upload": "/api/upload",
+            "incremental": "/api/incremental",
+            "results": "/api/results",
             "validation": "/api/validate",
             "preview": "/api/preview",
             "required_columns": "/api/columns/required",
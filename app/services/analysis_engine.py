@@ -1,8 +1,15 @@
 import pandas as pd
+import numpy as np
 import math
 from datetime import datetime
 from collections import defaultdict
 
+try:
+    # numpy >= 2.0 variable-width strings, whose strip/replace/float casts run in C
+    from numpy.dtypes import StringDType
+except ImportError:
+    StringDType = None
+
 
 def clean_percentage(value):
     """Convert percentage string to float (e.g., '75.5%' -> 75.5)"""
@@ -35,61 +42,257 @@ def clean_numeric(value):
     return None
 
 
-def analyze_by_pe_name(df):
-    """Analyze findings grouped by PE Name"""
-    if "PE Name" not in df.columns:
-        return {}
+def clean_percentage_series(series):
+    """Column-level clean_percentage (e.g. '75.5%' -> 75.5) returning float64"""
+    return _clean_numeric_series(series, '%')
 
-    pe_analysis = {}
 
-    for pe_name, group in df.groupby("PE Name"):
-        if pd.isna(pe_name) or str(pe_name).strip() == "":
-            continue
+def clean_numeric_series(series):
+    """Column-level clean_numeric (e.g. '1,200' -> 1200.0) returning float64"""
+    return _clean_numeric_series(series, ',')
 
-        pe_name_str = str(pe_name).strip()
 
-        # Calculate metrics for this PE
-        total_findings = len(group)
-        open_findings = int(
-            (group["Status"].astype(str).str.upper() == "OPEN").sum())
-        closed_findings = int(
-            (group["Status"].astype(str).str.upper() == "CLOSED").sum())
+def _clean_numeric_series(series, remove):
+    """
+    Vectorized equivalent of clean_percentage/clean_numeric
 
-        # Compliance
-        valid_compliance = group[group["Compliance %"].notna()]
-        avg_compliance = round(float(valid_compliance["Compliance %"].mean()), 2) if len(
-            valid_compliance) > 0 else 0.0
+    Numbers pass through, strings are stripped, have `remove` taken out and
+    are parsed as floats, and everything else becomes NaN.
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return series.astype('float64')
 
-        # Budget
-        budget_total = 0.0
-        if "Estimated Budget" in group.columns:
-            budget_data = group[group["Estimated Budget"].notna()]
-            budget_total = float(budget_data["Estimated Budget"].sum()) if len(
-                budget_data) > 0 else 0.0
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
 
-        # Risk
-        high_risk = int(
-            len(group[(group["Compliance %"] < 50) & (group["Score Gap"] > 0)]))
+    if inferred in ('integer', 'floating', 'mixed-integer-float', 'boolean'):
+        return series.astype('float64')
 
-        # Red flags
-        red_flags = 0
-        if "Red Flag" in group.columns:
-            red_flags = int((group["Red Flag"].astype(
-                str).str.upper() == "YES").sum())
+    values = series.to_numpy(dtype=object)
+    result = np.full(len(values), np.nan)
+
+    if inferred == 'empty':
+        return pd.Series(result, index=series.index)
+
+    if inferred == 'string':
+        is_text = series.notna().to_numpy()
+    else:
+        # Mixed column: sort cells by Python type first
+        kinds = np.fromiter(map(type, values), dtype=object, count=len(values))
+        is_text = kinds == str
+
+        is_number = np.zeros(len(values), dtype=bool)
+        for kind in set(kinds):
+            if issubclass(kind, (int, float, np.integer, np.floating)):
+                is_number |= kinds == kind
+        result[is_number] = values[is_number].astype('float64')
+
+    if is_text.any():
+        result[is_text] = _parse_text(values[is_text], remove)
+
+    return pd.Series(result, index=series.index)
+
+
+def _parse_text(values, remove):
+    """Strip, drop `remove` and parse an object array of strings as float"""
+    if StringDType is not None:
+        strings = np.strings.replace(
+            np.strings.strip(values.astype(StringDType())), remove, '')
+        try:
+            # numpy parses strings with the same rules as float()
+            return strings.astype('float64')
+        except ValueError:
+            cleaned = strings.astype(object)
+    else:
+        cleaned = pd.Series(values).str.strip().str.replace(
+            remove, '', regex=False).to_numpy(dtype=object)
+
+    # Some cells are not numbers: parse each distinct value once, since
+    # columns with junk tend to repeat the same few placeholders
+    codes, uniques = pd.factorize(cleaned)
+    parsed = np.array([_float_or_nan(value) for value in uniques], dtype='float64')
+    return parsed[codes]
+
+
+def _float_or_nan(value):
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+# Bands shared by the risk and compliance breakdowns, lowest compliance first
+COMPLIANCE_BANDS = ["poor", "fair", "good", "excellent"]
+RISK_BANDS = ["high", "medium", "low"]
+
+# Columns added by prepare_frame
+PREPARED_COLUMNS = ["is_open", "is_closed", "is_red_flag",
+                    "risk_band", "compliance_band"]
+
+
+def prepare_frame(df):
+    """
+    Add the normalised columns every breakdown reads
+
+    Expects Compliance % and Score Gap already cleaned to numbers. Adds
+    is_open / is_closed (Status), is_red_flag (Red Flag == YES) as booleans,
+    compliance_band (poor < 50 <= fair < 75 <= good < 90 <= excellent) and
+    risk_band (high / medium / low for findings with a positive Score Gap)
+    as categoricals. Returns a new frame; the input is left untouched.
+    """
+    status = df["Status"].astype(str).str.upper()
+
+    if "Red Flag" in df.columns:
+        is_red_flag = df["Red Flag"].astype(str).str.upper() == "YES"
+    else:
+        is_red_flag = pd.Series(False, index=df.index)
+
+    # Explicit comparisons rather than pd.cut, whose top bin leaves out an
+    # infinite compliance; blank compliance gets no band (-1)
+    compliance = df["Compliance %"]
+    band_codes = np.select(
+        [compliance < 50, compliance < 75, compliance < 90, compliance >= 90],
+        [0, 1, 2, 3],
+        default=-1
+    ).astype("int8")
+    compliance_band = pd.Series(
+        pd.Categorical.from_codes(band_codes, categories=COMPLIANCE_BANDS),
+        index=df.index)
+
+    # poor -> high, fair -> medium, good/excellent -> low
+    risk_codes = np.array([0, 1, 2, 2], dtype="int8")[band_codes]
+    risk_codes[(band_codes < 0) | ~(df["Score Gap"] > 0).to_numpy()] = -1
+    risk_band = pd.Categorical.from_codes(risk_codes, categories=RISK_BANDS)
+
+    return df.assign(
+        is_open=status == "OPEN",
+        is_closed=status == "CLOSED",
+        is_red_flag=is_red_flag,
+        risk_band=pd.Series(risk_band, index=df.index),
+        compliance_band=compliance_band
+    )
+
+
+def _prepared(df):
+    """df itself when prepare_frame has already run on it, else a prepared copy"""
+    if all(col in df.columns for col in PREPARED_COLUMNS):
+        return df
+    return prepare_frame(df)
+
+
+def _finding_indicators(df):
+    """Per-row columns the grouped breakdowns aggregate over"""
+    risk_band = df["risk_band"]
+
+    indicators = pd.DataFrame({
+        "is_open": df["is_open"],
+        "is_closed": df["is_closed"],
+        "is_red_flag": df["is_red_flag"],
+        "compliance": df["Compliance %"],
+        "score_gap": df["Score Gap"],
+        "is_high_risk": risk_band == "high",
+        "is_medium_risk": risk_band == "medium",
+        "is_low_risk": risk_band == "low"
+    }, index=df.index)
+
+    if "Estimated Budget" in df.columns:
+        indicators["budget"] = df["Estimated Budget"]
+    else:
+        indicators["budget"] = np.nan
+    indicators["open_budget"] = indicators["budget"].where(indicators["is_open"])
+
+    return indicators
+
+
+def _grouped_findings(df, keys, **aggregations):
+    """
+    _finding_indicators(df) aggregated per key, plus each group's
+    average_compliance (NaN when it has no compliance values)
+    """
+    indicators = _finding_indicators(df)
+    grouped = indicators.groupby(keys)
+    table = grouped.agg(**aggregations)
+    table["average_compliance"] = _group_means(
+        indicators["compliance"], grouped.ngroup(), len(table))
+    return table
+
+
+def _group_means(values, group_ids, groups):
+    """
+    Mean of the non-blank values per group id (0 to groups - 1)
+
+    groupby().mean() adds a group up with Kahan summation, while the
+    per-group Series.mean() these breakdowns used to call sums with
+    NumPy's pairwise summation. The two can differ in the last bit, and
+    with it the rounding of an average that lands on a tie (49.145 to
+    49.14 or 49.15), so each group's values are summed as one NumPy row
+    here: groups of the same size are stacked and summed along the rows,
+    which sums every row pairwise just as Series.mean() does.
+    """
+    rows = (values.notna() & group_ids.notna()).to_numpy()
+    ids = group_ids.to_numpy()[rows].astype(np.intp)
+    order = np.argsort(ids, kind="stable")
+    ordered = values.to_numpy(dtype="float64")[rows][order]
+    counts = np.bincount(ids, minlength=groups)
+    starts = np.cumsum(counts) - counts
+
+    sums = np.zeros(groups)
+    for size in np.unique(counts[counts > 0]):
+        same_size = np.flatnonzero(counts == size)
+        sums[same_size] = ordered[starts[same_size, None] + np.arange(size)].sum(axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+def _first_values(df, key_column, value_column):
+    """{group key: value_column of the group's first row}"""
+    first_rows = df.drop_duplicates(key_column)
+    return dict(zip(first_rows[key_column], first_rows[value_column]))
+
+
+def _mean_or_zero(value):
+    return round(float(value), 2) if pd.notna(value) else 0.0
+
+
+def analyze_by_pe_name(df):
+    """Analyze findings grouped by PE Name"""
+    if "PE Name" not in df.columns:
+        return {}
+
+    df = _prepared(df)
+    grouped = _grouped_findings(
+        df, df["PE Name"],
+        total_findings=("is_open", "size"),
+        open_findings=("is_open", "sum"),
+        closed_findings=("is_closed", "sum"),
+        total_budget=("budget", "sum"),
+        high_risk_findings=("is_high_risk", "sum"),
+        red_flags=("is_red_flag", "sum")
+    )
+
+    categories = {}
+    if "PE Category" in df.columns:
+        categories = _first_values(df, "PE Name", "PE Category")
+
+    pe_analysis = {}
+
+    for pe_name, row in zip(grouped.index, grouped.itertuples(index=False)):
+        pe_name_str = str(pe_name).strip()
+        if pe_name_str == "":
+            continue
 
-        # PE Category
         pe_category = "N/A"
-        if "PE Category" in group.columns and len(group) > 0:
-            pe_category = str(group["PE Category"].iloc[0])
+        if "PE Category" in df.columns:
+            pe_category = str(categories[pe_name])
 
         pe_analysis[pe_name_str] = {
-            "total_findings": total_findings,
-            "open_findings": open_findings,
-            "closed_findings": closed_findings,
-            "average_compliance": avg_compliance,
-            "total_budget": round(budget_total, 2),
-            "high_risk_findings": high_risk,
-            "red_flags": red_flags,
+            "total_findings": int(row.total_findings),
+            "open_findings": int(row.open_findings),
+            "closed_findings": int(row.closed_findings),
+            "average_compliance": _mean_or_zero(row.average_compliance),
+            "total_budget": round(float(row.total_budget), 2),
+            "high_risk_findings": int(row.high_risk_findings),
+            "red_flags": int(row.red_flags),
             "pe_category": pe_category
         }
 
@@ -101,43 +304,36 @@ def analyze_by_checklist(df):
     if "Checklist Title" not in df.columns:
         return {}
 
-    checklist_analysis = {}
-
-    for checklist, group in df.groupby("Checklist Title"):
-        if pd.isna(checklist) or str(checklist).strip() == "":
-            continue
-
-        checklist_str = str(checklist).strip()
+    df = _prepared(df)
+    grouped = _grouped_findings(
+        df, df["Checklist Title"],
+        total_findings=("is_open", "size"),
+        open_findings=("is_open", "sum"),
+        closed_findings=("is_closed", "sum"),
+        total_score_gap=("score_gap", "sum")
+    )
 
-        total_findings = len(group)
-        open_findings = int(
-            (group["Status"].astype(str).str.upper() == "OPEN").sum())
-        closed_findings = int(
-            (group["Status"].astype(str).str.upper() == "CLOSED").sum())
+    audit_types = {}
+    if "Audit Type" in df.columns:
+        audit_types = _first_values(df, "Checklist Title", "Audit Type")
 
-        # Compliance
-        valid_compliance = group[group["Compliance %"].notna()]
-        avg_compliance = round(float(valid_compliance["Compliance %"].mean()), 2) if len(
-            valid_compliance) > 0 else 0.0
+    checklist_analysis = {}
 
-        # Score gap
-        score_gap_total = 0.0
-        if "Score Gap" in group.columns:
-            gap_data = group[group["Score Gap"].notna()]
-            score_gap_total = float(gap_data["Score Gap"].sum()) if len(
-                gap_data) > 0 else 0.0
+    for checklist, row in zip(grouped.index, grouped.itertuples(index=False)):
+        checklist_str = str(checklist).strip()
+        if checklist_str == "":
+            continue
 
-        # Audit Type
         audit_type = "N/A"
-        if "Audit Type" in group.columns and len(group) > 0:
-            audit_type = str(group["Audit Type"].iloc[0])
+        if "Audit Type" in df.columns:
+            audit_type = str(audit_types[checklist])
 
         checklist_analysis[checklist_str] = {
-            "total_findings": total_findings,
-            "open_findings": open_findings,
-            "closed_findings": closed_findings,
-            "average_compliance": avg_compliance,
-            "total_score_gap": round(score_gap_total, 2),
+            "total_findings": int(row.total_findings),
+            "open_findings": int(row.open_findings),
+            "closed_findings": int(row.closed_findings),
+            "average_compliance": _mean_or_zero(row.average_compliance),
+            "total_score_gap": round(float(row.total_score_gap), 2),
             "audit_type": audit_type
         }
 
@@ -146,8 +342,6 @@ def analyze_by_checklist(df):
 
 def analyze_by_entity(df):
     """Analyze findings grouped by Entity Name and Entity Number combination"""
-    entity_analysis = {}
-
     # Check if we have entity columns
     has_entity_name = "Entity Name" in df.columns
     has_entity_number = "Entity Number" in df.columns
@@ -155,65 +349,46 @@ def analyze_by_entity(df):
     if not has_entity_name and not has_entity_number:
         return {}
 
-    # Create a combined entity key
-    df_copy = df.copy()
+    df = _prepared(df)
 
+    # Create a combined entity key
     if has_entity_name and has_entity_number:
-        df_copy["Entity_Key"] = df_copy["Entity Name"].astype(
-            str) + " (" + df_copy["Entity Number"].astype(str) + ")"
+        entity_key = df["Entity Name"].astype(
+            str) + " (" + df["Entity Number"].astype(str) + ")"
     elif has_entity_name:
-        df_copy["Entity_Key"] = df_copy["Entity Name"].astype(str)
+        entity_key = df["Entity Name"].astype(str)
     else:
-        df_copy["Entity_Key"] = df_copy["Entity Number"].astype(str)
-
-    for entity_key, group in df_copy.groupby("Entity_Key"):
-        if pd.isna(entity_key) or str(entity_key).strip() in ["", "nan", "nan (nan)"]:
-            continue
-
-        entity_key_str = str(entity_key).strip()
-
-        total_findings = len(group)
-        open_findings = int(
-            (group["Status"].astype(str).str.upper() == "OPEN").sum())
-        closed_findings = int(
-            (group["Status"].astype(str).str.upper() == "CLOSED").sum())
-
-        # Budget
-        budget_total = 0.0
-        budget_open = 0.0
-        if "Estimated Budget" in group.columns:
-            budget_data = group[group["Estimated Budget"].notna()]
-            budget_total = float(budget_data["Estimated Budget"].sum()) if len(
-                budget_data) > 0 else 0.0
-
-            open_budget_data = budget_data[budget_data["Status"].astype(
-                str).str.upper() == "OPEN"]
-            budget_open = float(open_budget_data["Estimated Budget"].sum()) if len(
-                open_budget_data) > 0 else 0.0
+        entity_key = df["Entity Number"].astype(str)
+
+    grouped = _grouped_findings(
+        df, entity_key,
+        total_findings=("is_open", "size"),
+        open_findings=("is_open", "sum"),
+        closed_findings=("is_closed", "sum"),
+        total_budget=("budget", "sum"),
+        budget_at_risk=("open_budget", "sum"),
+        high_risk=("is_high_risk", "sum"),
+        medium_risk=("is_medium_risk", "sum"),
+        low_risk=("is_low_risk", "sum")
+    )
 
-        # Compliance
-        valid_compliance = group[group["Compliance %"].notna()]
-        avg_compliance = round(float(valid_compliance["Compliance %"].mean()), 2) if len(
-            valid_compliance) > 0 else 0.0
+    entity_analysis = {}
 
-        # Risk
-        high_risk = int(
-            len(group[(group["Compliance %"] < 50) & (group["Score Gap"] > 0)]))
-        medium_risk = int(len(group[(group["Compliance %"] >= 50) & (
-            group["Compliance %"] < 75) & (group["Score Gap"] > 0)]))
-        low_risk = int(
-            len(group[(group["Compliance %"] >= 75) & (group["Score Gap"] > 0)]))
+    for key, row in zip(grouped.index, grouped.itertuples(index=False)):
+        entity_key_str = str(key).strip()
+        if entity_key_str in ["", "nan", "nan (nan)"]:
+            continue
 
         entity_analysis[entity_key_str] = {
-            "total_findings": total_findings,
-            "open_findings": open_findings,
-            "closed_findings": closed_findings,
-            "average_compliance": avg_compliance,
-            "total_budget": round(budget_total, 2),
-            "budget_at_risk": round(budget_open, 2),
-            "high_risk": high_risk,
-            "medium_risk": medium_risk,
-            "low_risk": low_risk
+            "total_findings": int(row.total_findings),
+            "open_findings": int(row.open_findings),
+            "closed_findings": int(row.closed_findings),
+            "average_compliance": _mean_or_zero(row.average_compliance),
+            "total_budget": round(float(row.total_budget), 2),
+            "budget_at_risk": round(float(row.budget_at_risk), 2),
+            "high_risk": int(row.high_risk),
+            "medium_risk": int(row.medium_risk),
+            "low_risk": int(row.low_risk)
         }
 
     return entity_analysis
@@ -221,13 +396,15 @@ def analyze_by_entity(df):
 
 def analyze_status_details(df):
     """Detailed analysis of OPEN vs CLOSED findings"""
+    df = _prepared(df)
+
     status_analysis = {
         "OPEN": {},
         "CLOSED": {}
     }
 
-    for status in ["OPEN", "CLOSED"]:
-        status_df = df[df["Status"].astype(str).str.upper() == status]
+    for status, flag in [("OPEN", "is_open"), ("CLOSED", "is_closed")]:
+        status_df = df[df[flag]]
 
         if len(status_df) == 0:
             status_analysis[status] = {
@@ -260,14 +437,10 @@ def analyze_status_details(df):
                 gap_data) > 0 else 0.0
 
         # Risk
-        high_risk = int(
-            len(status_df[(status_df["Compliance %"] < 50) & (status_df["Score Gap"] > 0)]))
+        high_risk = int((status_df["risk_band"] == "high").sum())
 
         # Red flags
-        red_flags = 0
-        if "Red Flag" in status_df.columns:
-            red_flags = int((status_df["Red Flag"].astype(
-                str).str.upper() == "YES").sum())
+        red_flags = int(status_df["is_red_flag"].sum())
 
         # Audit types
         audit_type_dist = {}
@@ -345,7 +518,24 @@ def analyze_budget_distribution(df):
     }
 
 
-def analyze_sheet(df):
+# Grouped breakdowns analyze_sheet adds to the headline metrics, by result
+# key; each one is a full pass over the sheet
+ANALYSIS_SECTIONS = {
+    "pe_name_analysis": analyze_by_pe_name,
+    "checklist_detailed_analysis": analyze_by_checklist,
+    "entity_analysis": analyze_by_entity,
+    "status_detailed_analysis": analyze_status_details,
+    "budget_distribution": analyze_budget_distribution
+}
+
+
+def analyze_sheet(df, sections=None):
+    """
+    Headline metrics and grouped breakdowns of a detailed findings sheet
+
+    sections limits the breakdowns to those named (ANALYSIS_SECTIONS
+    keys); None computes all of them.
+    """
     required_columns = [
         "Compliance %",
         "Score Gap",
@@ -363,16 +553,20 @@ def analyze_sheet(df):
     df = df.copy()
 
     # Clean percentage and numeric columns
-    df["Compliance %"] = df["Compliance %"].apply(clean_percentage)
-    df["Score Gap"] = df["Score Gap"].apply(clean_numeric)
+    df["Compliance %"] = clean_percentage_series(df["Compliance %"])
+    df["Score Gap"] = clean_numeric_series(df["Score Gap"])
 
     # Clean other numeric columns if they exist
     if "Expected Score" in df.columns:
-        df["Expected Score"] = df["Expected Score"].apply(clean_numeric)
+        df["Expected Score"] = clean_numeric_series(df["Expected Score"])
     if "Actual Score" in df.columns:
-        df["Actual Score"] = df["Actual Score"].apply(clean_numeric)
+        df["Actual Score"] = clean_numeric_series(df["Actual Score"])
     if "Estimated Budget" in df.columns:
-        df["Estimated Budget"] = df["Estimated Budget"].apply(clean_numeric)
+        df["Estimated Budget"] = clean_numeric_series(df["Estimated Budget"])
+
+    # Normalised Status / Red Flag flags and risk / compliance bands,
+    # shared by every breakdown below
+    df = prepare_frame(df)
 
     # Basic metrics
     total_records = int(len(df))
@@ -384,34 +578,14 @@ def analyze_sheet(df):
     avg_compliance = round(float(avg), 2) if not math.isnan(avg) else 0.0
 
     # Status analysis
-    open_findings = int(
-        (df["Status"].astype(str).str.upper() == "OPEN").sum()
-    )
-    closed_findings = int(
-        (df["Status"].astype(str).str.upper() == "CLOSED").sum()
-    )
+    open_findings = int(df["is_open"].sum())
+    closed_findings = int(df["is_closed"].sum())
 
     # Risk categorization
-    high_risk = df[
-        (df["Compliance %"] < 50) &
-        (df["Score Gap"] > 0)
-    ]
-    medium_risk = df[
-        (df["Compliance %"] >= 50) &
-        (df["Compliance %"] < 75) &
-        (df["Score Gap"] > 0)
-    ]
-    low_risk = df[
-        (df["Compliance %"] >= 75) &
-        (df["Score Gap"] > 0)
-    ]
+    risk_counts = df["risk_band"].value_counts()
 
     # Red flag analysis
-    red_flag_count = 0
-    if "Red Flag" in df.columns:
-        red_flag_count = int(
-            (df["Red Flag"].astype(str).str.upper() == "YES").sum()
-        )
+    red_flag_count = int(df["is_red_flag"].sum())
 
     # Audit type breakdown
     audit_type_breakdown = {}
@@ -434,9 +608,7 @@ def analyze_sheet(df):
             avg_budget = budget_df["Estimated Budget"].mean()
 
             # Budget at risk (open findings)
-            budget_at_risk_df = budget_df[
-                budget_df["Status"].astype(str).str.upper() == "OPEN"
-            ]
+            budget_at_risk_df = budget_df[budget_df["is_open"]]
             budget_at_risk = budget_at_risk_df["Estimated Budget"].sum() if len(
                 budget_at_risk_df) > 0 else 0
 
@@ -482,11 +654,9 @@ def analyze_sheet(df):
         top_entities = {str(k): int(v) for k, v in entity_counts.items()}
 
     # Compliance distribution
+    compliance_counts = df["compliance_band"].value_counts()
     compliance_distribution = {
-        "excellent": int(len(df[df["Compliance %"] >= 90])),
-        "good": int(len(df[(df["Compliance %"] >= 75) & (df["Compliance %"] < 90)])),
-        "fair": int(len(df[(df["Compliance %"] >= 50) & (df["Compliance %"] < 75)])),
-        "poor": int(len(df[df["Compliance %"] < 50]))
+        band: int(compliance_counts[band]) for band in reversed(COMPLIANCE_BANDS)
     }
 
     # Checklist analysis
@@ -496,31 +666,14 @@ def analyze_sheet(df):
         checklist_breakdown = {str(k): int(v)
                                for k, v in list(checklist_counts.items())[:10]}
 
-    # === NEW ADVANCED ANALYSIS ===
-
-    # PE Name detailed analysis
-    pe_name_analysis = analyze_by_pe_name(df)
-
-    # Checklist detailed analysis
-    checklist_detailed_analysis = analyze_by_checklist(df)
-
-    # Entity (Name + Number) analysis
-    entity_analysis = analyze_by_entity(df)
-
-    # Status (OPEN vs CLOSED) detailed analysis
-    status_detailed_analysis = analyze_status_details(df)
-
-    # Budget distribution analysis
-    budget_distribution = analyze_budget_distribution(df)
-
-    return {
+    analysis = {
         "total_records": total_records,
         "average_compliance": avg_compliance,
         "open_findings": open_findings,
         "closed_findings": closed_findings,
-        "high_risk_findings": int(len(high_risk)),
-        "medium_risk_findings": int(len(medium_risk)),
-        "low_risk_findings": int(len(low_risk)),
+        "high_risk_findings": int(risk_counts["high"]),
+        "medium_risk_findings": int(risk_counts["medium"]),
+        "low_risk_findings": int(risk_counts["low"]),
         "red_flag_count": red_flag_count,
         "audit_type_breakdown": audit_type_breakdown,
         "category_breakdown": category_breakdown,
@@ -528,12 +681,15 @@ def analyze_sheet(df):
         "score_analysis": score_analysis,
         "top_entities": top_entities,
         "compliance_distribution": compliance_distribution,
-        "checklist_breakdown": checklist_breakdown,
-
-        # Advanced grouped analysis
-        "pe_name_analysis": pe_name_analysis,
-        "checklist_detailed_analysis": checklist_detailed_analysis,
-        "entity_analysis": entity_analysis,
-        "status_detailed_analysis": status_detailed_analysis,
-        "budget_distribution": budget_distribution
+        "checklist_breakdown": checklist_breakdown
     }
+
+    # === NEW ADVANCED ANALYSIS ===
+
+    # PE Name, checklist, entity (Name + Number), status (OPEN vs CLOSED)
+    # and budget distribution breakdowns, those requested only
+    for section, analyze in ANALYSIS_SECTIONS.items():
+        if sections is None or section in sections:
+            analysis[section] = analyze(df)
+
+    return analysis
@@ -0,0 +1,299 @@
+"""
+On-disk columnar cache of parsed sheets
+
+openpyxl parsing is the slowest stage of every request and the process
+caches (response_cache, sheet_cache, upload sessions) are lost on
+restart. When COLUMNAR_CACHE_DIR is set and pyarrow is installed, each
+parsed sheet is also written as an uncompressed Feather (Arrow IPC) file
+keyed by the SHA-256 of the uploaded workbook, and later requests for the
+same file read the sheets back with memory-mapping instead of parsing the
+xlsx again. Feather is columnar, so a read loads only the columns the
+engine needs.
+
+Layout: <COLUMNAR_CACHE_DIR>/<digest>/manifest.json holds the header
+probes, and one small JSON entry per stored sheet names its Feather file
+and columns, or records that the sheet could not be stored (so it is not
+converted again on every request). Sheets of one workbook may be stored by different worker
+processes at once, so each sheet's entry is a separate file, and every
+file is written to a temporary name and moved into place with os.replace.
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    feather = None
+
+from app.config import COLUMNAR_CACHE_DIR, COLUMNAR_CACHE_MAX_BYTES
+
+MANIFEST = "manifest.json"
+
+# Bump when the layout or the way sheets are converted changes
+CACHE_FORMAT_VERSION = 3
+
+
+class ColumnarSheetCache:
+    """
+    Parsed sheets of uploaded workbooks stored as Feather files
+
+    Disabled (every lookup misses and store() does nothing) without a
+    directory or without pyarrow. Sheets that do not survive a round trip
+    through Arrow unchanged (e.g. a column mixing numbers and text) are
+    stored, so a workbook with such a sheet keeps being parsed from xlsx;
+    stats() counts them. Once the directory holds more than max_bytes the least recently
+    used workbooks are deleted.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @property
+    def enabled(self):
+        return feather is not None and bool(self.directory)
+
+    def headers(self, digest):
+        """probe_excel() output stored for the workbook, or None"""
+        manifest = self._read_manifest(digest)
+        return manifest["headers"] if manifest is not None else None
+
+    def sheets(self, digest, columns):
+        """
+        Load stored sheets as DataFrames
+
+        columns is {sheet_name: [column, ...] or None for every column}.
+        Returns None unless every requested sheet was stored with at least
+        the requested columns.
+        """
+        manifest = self._read_manifest(digest)
+        if manifest is None:
+            return None
+
+        entry_dir = self._entry_dir(digest)
+        sheets = {}
+
+        for sheet_name, sheet_columns in columns.items():
+            stored = self._stored_sheet(manifest, digest, sheet_name, sheet_columns)
+            if stored is None:
+                return None
+
+            table = feather.read_table(
+                os.path.join(entry_dir, stored["file"]),
+                columns=sheet_columns, memory_map=True)
+            sheets[sheet_name] = table.to_pandas()
+
+        # Record the use for least-recently-used eviction
+        os.utime(os.path.join(entry_dir, MANIFEST))
+        return sheets
+
+    def stored(self, digest, sheet_names):
+        """Whether every named sheet is stored with all of its columns"""
+        manifest = self._read_manifest(digest)
+        return manifest is not None and all(
+            self._stored_sheet(manifest, digest, sheet_name, None) is not None
+            for sheet_name in sheet_names)
+
+    def store(self, digest, headers, sheets):
+        """
+        Write sheets ({sheet_name: DataFrame}) of the workbook with this
+        digest
+
+        A sheet already stored with the same or more columns is kept, and
+        one that could not be converted is not tried again with the same or
+        fewer columns.
+        """
+        if not self.enabled:
+            return
+
+        entry_dir = self._entry_dir(digest)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        if self._read_manifest(digest) is None:
+            self._write_json(os.path.join(entry_dir, MANIFEST), {
+                "version": CACHE_FORMAT_VERSION,
+                "headers": headers
+            })
+
+        for sheet_name, df in sheets.items():
+            sheet_path = self._sheet_path(digest, sheet_name)
+            stored = self._read_json(sheet_path)
+            if stored is not None and set(df.columns) <= set(stored["columns"]):
+                continue
+
+            table = _to_arrow(df)
+            if table is None:
+                # A stored projection of the sheet is still worth keeping
+                if stored is None:
+                    self._write_json(sheet_path, {
+                        "columns": list(df.columns),
+                        "skipped": True
+                    })
+                continue
+
+            filename = f"{uuid.uuid4().hex}.feather"
+            # Uncompressed, so reads can memory-map the columns
+            feather.write_feather(table, os.path.join(entry_dir, filename),
+                                  compression="uncompressed")
+            self._write_json(sheet_path, {
+                "file": filename,
+                "columns": list(df.columns),
+                "rows": len(df)
+            })
+            if stored is not None and "file" in stored:
+                _remove(os.path.join(entry_dir, stored["file"]))
+
+        self._evict(keep=digest)
+
+    def stats(self):
+        """
+        Stored workbooks and sheets on disk, and sheets that could not be
+        stored
+
+        Read from the directory, so sheets stored by every worker process
+        are counted.
+        """
+        if not self.enabled:
+            return {"enabled": False}
+
+        workbooks = sheets = skipped = size = 0
+        for digest in _listdir(self.directory):
+            if self._read_manifest(digest) is None:
+                continue
+            workbooks += 1
+            for entry in os.scandir(self._entry_dir(digest)):
+                try:
+                    size += entry.stat().st_size
+                except OSError:
+                    continue
+                if entry.name.startswith("sheet-"):
+                    stored = self._read_json(entry.path)
+                    if stored is not None and "file" in stored:
+                        sheets += 1
+                    elif stored is not None:
+                        skipped += 1
+
+        return {
+            "enabled": True,
+            "workbooks": workbooks,
+            "sheets": sheets,
+            "skipped_sheets": skipped,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes
+        }
+
+    def _stored_sheet(self, manifest, digest, sheet_name, columns):
+        """A sheet's entry if it is stored with these columns, else None"""
+        stored = self._read_json(self._sheet_path(digest, sheet_name))
+        if stored is None or "file" not in stored:
+            return None
+
+        if columns is None:
+            # Only a projection may have been stored for this sheet
+            if stored["columns"] != manifest["headers"][sheet_name]["columns"]:
+                return None
+        elif not set(columns) <= set(stored["columns"]):
+            return None
+        return stored
+
+    def _entry_dir(self, digest):
+        return os.path.join(self.directory, digest)
+
+    def _sheet_path(self, digest, sheet_name):
+        # Sheet names may hold characters that are not valid in file names
+        name = hashlib.sha256(sheet_name.encode()).hexdigest()[:32]
+        return os.path.join(self._entry_dir(digest), f"sheet-{name}.json")
+
+    def _read_manifest(self, digest):
+        if not self.enabled:
+            return None
+
+        manifest = self._read_json(os.path.join(self._entry_dir(digest), MANIFEST))
+        if manifest is None or manifest.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        return manifest
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_json(path, value):
+        temporary = os.path.join(os.path.dirname(path), f".{uuid.uuid4().hex}.tmp")
+        with open(temporary, "w") as f:
+            json.dump(value, f)
+        os.replace(temporary, path)
+
+    def _evict(self, keep):
+        """Delete least recently used workbooks beyond max_bytes"""
+        entries = []
+        total = 0
+
+        for digest in os.listdir(self.directory):
+            entry_dir = self._entry_dir(digest)
+            try:
+                used = os.stat(os.path.join(entry_dir, MANIFEST)).st_mtime
+                size = sum(entry.stat().st_size for entry in os.scandir(entry_dir))
+            except OSError:
+                continue
+            entries.append((used, digest, size))
+            total += size
+
+        for _, digest, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            shutil.rmtree(self._entry_dir(digest), ignore_errors=True)
+            total -= size
+
+
+def _to_arrow(df):
+    """
+    Arrow table for a sheet, or None if reading it back would not give
+    the same DataFrame
+    """
+    # Sheets are read back with a fresh RangeIndex
+    if not df.index.equals(pd.RangeIndex(len(df))):
+        return None
+
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowException, TypeError, ValueError):
+        return None
+
+    # The column names and dtypes a read would give, from the schema alone
+    # (no data is converted back): e.g. an object column of ints and blanks
+    # would come back as float64, one of text as str
+    restored = table.schema.empty_table().to_pandas()
+    if not (restored.columns.equals(df.columns) and restored.dtypes.equals(df.dtypes)):
+        return None
+    return table
+
+
+def _listdir(path):
+    try:
+        return os.listdir(path)
+    except OSError:
+        return []
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+columnar_cache = ColumnarSheetCache(COLUMNAR_CACHE_DIR, COLUMNAR_CACHE_MAX_BYTES)
@@ -0,0 +1,188 @@
+"""
+Compressed responses negotiated through Accept-Encoding
+
+Multi-tender analyses run to tens of MB of JSON, most of it repeated keys
+and tender details, which compress very well. compressed_response() picks
+the best encoding the client accepts: zstd (needs zstandard), br (needs
+brotli), then gzip. Levels default to the fast end of each codec's range,
+which keeps most of the size reduction at a fraction of the CPU time.
+Bodies under COMPRESSION_MIN_BYTES are sent as they are, since the
+headers would eat what little compression saves.
+
+The codecs release the GIL, so large bodies are compressed on a thread
+rather than on the event loop or an analysis worker.
+
+Streamed responses (compressed_stream) are gzip'd only, flushing after
+every chunk so the client can decode each one as it arrives.
+"""
+import asyncio
+import gzip
+import zlib
+
+from fastapi.responses import Response, StreamingResponse  # type: ignore
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from app.config import BROTLI_QUALITY, COMPRESSION_MIN_BYTES, GZIP_LEVEL, ZSTD_LEVEL
+
+# Bodies at least this large are compressed off the event loop
+THREAD_MIN_BYTES = 256 * 1024
+
+
+def _zstd(body):
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+
+
+def _brotli(body):
+    return brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+def _gzip(body):
+    # mtime=0 keeps the output the same for the same body
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+# Available encodings in order of preference
+ENCODERS = {
+    name: encode for name, encode, available in [
+        ("zstd", _zstd, zstandard is not None),
+        ("br", _brotli, brotli is not None),
+        ("gzip", _gzip, True)
+    ] if available
+}
+
+
+class CompressionStats:
+    """Bytes in and out per encoding, for /api/compression/stats"""
+
+    def __init__(self):
+        self.encodings = {}
+        self.uncompressed = 0
+
+    def record(self, encoding, size, compressed_size):
+        entry = self.encodings.setdefault(
+            encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+        entry["responses"] += 1
+        entry["bytes_in"] += size
+        entry["bytes_out"] += compressed_size
+
+    def stats(self):
+        return {
+            "available": list(ENCODERS),
+            "min_bytes": COMPRESSION_MIN_BYTES,
+            "uncompressed_responses": self.uncompressed,
+            "encodings": {
+                encoding: {
+                    **entry,
+                    "ratio": round(entry["bytes_in"] / entry["bytes_out"], 2)
+                    if entry["bytes_out"] else 0.0
+                }
+                for encoding, entry in self.encodings.items()
+            }
+        }
+
+
+def negotiate(accept_encoding, encodings=ENCODERS):
+    """
+    The preferred of encodings the Accept-Encoding header allows, or None
+    for none
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    accepted = [
+        name for name in encodings
+        if weights.get(name, wildcard) > 0
+    ]
+    if not accepted:
+        return None
+    # Highest q-value first, the server's preference among equals
+    return max(accepted, key=lambda name: weights.get(name, wildcard))
+
+
+async def compressed_response(request, body, headers=None,
+                              media_type="application/json"):
+    """
+    A Response of body, compressed as the request's Accept-Encoding allows
+    """
+    headers = dict(headers or {})
+    headers["Vary"] = ", ".join(filter(None, [headers.get("Vary"), "Accept-Encoding"]))
+    encoding = negotiate(request.headers.get("accept-encoding"))
+
+    if encoding is None or len(body) < COMPRESSION_MIN_BYTES:
+        compression_stats.uncompressed += 1
+        return Response(body, media_type=media_type, headers=headers)
+
+    encode = ENCODERS[encoding]
+    if len(body) >= THREAD_MIN_BYTES:
+        compressed = await asyncio.to_thread(encode, body)
+    else:
+        compressed = encode(body)
+
+    compression_stats.record(encoding, len(body), len(compressed))
+    headers["Content-Encoding"] = encoding
+    return Response(compressed, media_type=media_type, headers=headers)
+
+
+def compressed_stream(request, chunks, headers=None,
+                      media_type="application/json"):
+    """
+    A StreamingResponse of the async iterator chunks, gzip'd when the
+    request's Accept-Encoding allows
+    """
+    headers = dict(headers or {})
+    headers["Vary"] = ", ".join(filter(None, [headers.get("Vary"), "Accept-Encoding"]))
+
+    if negotiate(request.headers.get("accept-encoding"), ("gzip",)) is None:
+        compression_stats.uncompressed += 1
+        return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+    headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(_gzip_stream(chunks), media_type=media_type,
+                             headers=headers)
+
+
+async def _gzip_stream(chunks):
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    size = compressed_size = 0
+
+    def compress(chunk):
+        return compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    async for chunk in chunks:
+        if len(chunk) >= THREAD_MIN_BYTES:
+            compressed = await asyncio.to_thread(compress, chunk)
+        else:
+            compressed = compress(chunk)
+        size += len(chunk)
+        compressed_size += len(compressed)
+        yield compressed
+
+    compressed = compressor.flush()
+    compression_stats.record("gzip", size, compressed_size + len(compressed))
+    yield compressed
+
+
+compression_stats = CompressionStats()
@@ -3,7 +3,7 @@ Data validation utilities for audit analysis
 """
 import pandas as pd
 from typing import Dict, List, Tuple
-from app.services.analysis_engine import clean_percentage, clean_numeric
+from app.services.analysis_engine import clean_percentage_series, clean_numeric_series
 
 
 def validate_excel_structure(df: pd.DataFrame) -> Tuple[bool, List[str]]:
@@ -116,8 +116,8 @@ def validate_data_ranges(df: pd.DataFrame) -> List[str]:
 
     # Compliance should be 0-100
     if "Compliance %" in df_clean.columns:
-        df_clean["Compliance %"] = df_clean["Compliance %"].apply(
-            clean_percentage)
+        df_clean["Compliance %"] = clean_percentage_series(
+            df_clean["Compliance %"])
         invalid_compliance = df_clean[
             (df_clean["Compliance %"].notna()) &
             ((df_clean["Compliance %"] < 0) | (df_clean["Compliance %"] > 100))
@@ -129,7 +129,7 @@ def validate_data_ranges(df: pd.DataFrame) -> List[str]:
 
     # Score Gap should not be negative (typically)
     if "Score Gap" in df_clean.columns:
-        df_clean["Score Gap"] = df_clean["Score Gap"].apply(clean_numeric)
+        df_clean["Score Gap"] = clean_numeric_series(df_clean["Score Gap"])
         negative_gaps = df_clean[
             (df_clean["Score Gap"].notna()) &
             (df_clean["Score Gap"] < 0)
@@ -141,10 +141,10 @@ def validate_data_ranges(df: pd.DataFrame) -> List[str]:
 
     # Expected Score should be >= Actual Score (typically)
     if "Expected Score" in df_clean.columns and "Actual Score" in df_clean.columns:
-        df_clean["Expected Score"] = df_clean["Expected Score"].apply(
-            clean_numeric)
-        df_clean["Actual Score"] = df_clean["Actual Score"].apply(
-            clean_numeric)
+        df_clean["Expected Score"] = clean_numeric_series(
+            df_clean["Expected Score"])
+        df_clean["Actual Score"] = clean_numeric_series(
+            df_clean["Actual Score"])
         invalid_scores = df_clean[
             (df_clean["Expected Score"].notna()) &
             (df_clean["Actual Score"].notna()) &
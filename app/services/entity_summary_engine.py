@@ -4,7 +4,7 @@ Handles aggregated entity-level data
 """
 import pandas as pd
 import math
-from app.services.analysis_engine import clean_percentage, clean_numeric
+from app.services.analysis_engine import clean_percentage_series, clean_numeric_series
 
 
 def analyze_entity_summary(df):
@@ -31,7 +31,7 @@ def analyze_entity_summary(df):
 
     # Clean percentage columns
     if 'Overall %' in df.columns:
-        df['Overall %'] = df['Overall %'].apply(clean_percentage)
+        df['Overall %'] = clean_percentage_series(df['Overall %'])
         # If values are in decimal form (0-1 range), multiply by 100
         if df['Overall %'].notna().any():
             max_val = df[df['Overall %'].notna()]['Overall %'].max()
@@ -39,7 +39,7 @@ def analyze_entity_summary(df):
                 df['Overall %'] = df['Overall %'] * 100
 
     if 'Tendering Avg' in df.columns:
-        df['Tendering Avg'] = df['Tendering Avg'].apply(clean_percentage)
+        df['Tendering Avg'] = clean_percentage_series(df['Tendering Avg'])
         # If values are in decimal form (0-1 range), multiply by 100
         if df['Tendering Avg'].notna().any():
             max_val = df[df['Tendering Avg'].notna()]['Tendering Avg'].max()
@@ -48,11 +48,11 @@ def analyze_entity_summary(df):
 
     # Clean numeric columns
     if 'Tenders' in df.columns:
-        df['Tenders'] = df['Tenders'].apply(clean_numeric)
+        df['Tenders'] = clean_numeric_series(df['Tenders'])
     if 'App Marks' in df.columns:
-        df['App Marks'] = df['App Marks'].apply(clean_numeric)
+        df['App Marks'] = clean_numeric_series(df['App Marks'])
     if 'Institution' in df.columns:
-        df['Institution'] = df['Institution'].apply(clean_numeric)
+        df['Institution'] = clean_numeric_series(df['Institution'])
 
     # Basic metrics
     total_entities = int(len(df))
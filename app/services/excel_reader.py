@@ -1,13 +1,433 @@
+import io
+
+import numpy as np
 import pandas as pd  # type: ignore
+from openpyxl import load_workbook  # type: ignore
+from openpyxl.utils.cell import column_index_from_string  # type: ignore
+from openpyxl.workbook.workbook import Workbook  # type: ignore
+from openpyxl.xml.constants import SHEET_MAIN_NS  # type: ignore
+
+# Projected reads drive openpyxl's (private) sheet parser; releases that
+# change it fall back to reading whole rows, see _iter_projected_rows
+try:
+    from openpyxl.worksheet._reader import WorkSheetParser  # type: ignore
+except ImportError:
+    WorkSheetParser = None
+
+
+# Number of rows materialised per DataFrame chunk by the streaming reader
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def load_excel(file, streaming=False, chunk_size=DEFAULT_CHUNK_SIZE,
+               sheet_names=None, columns=None):
+    """
+    Load the sheets of an Excel workbook into DataFrames
 
+    With streaming=True the workbook is read through openpyxl's read-only
+    row iterator instead of pd.read_excel, which avoids building cell
+    objects for the whole workbook and keeps peak memory lower on large files.
+    A workbook returned by open_workbook can be passed instead of a file in
+    streaming mode. sheet_names limits loading to the given sheets, and
+    columns ({sheet_name: [column, ...]}) loads only those columns of a sheet.
+    """
+    if streaming:
+        return load_excel_streaming(file, chunk_size=chunk_size,
+                                    sheet_names=sheet_names, columns=columns)
 
-def load_excel(file):
     xls = pd.ExcelFile(file)
     sheets = {}
 
     for sheet in xls.sheet_names:
-        df = pd.read_excel(xls, sheet)
+        if sheet_names is not None and sheet not in sheet_names:
+            continue
+
+        usecols = None
+        if columns is not None and sheet in columns:
+            usecols = _column_filter(columns[sheet])
+
+        df = pd.read_excel(xls, sheet, usecols=usecols)
         df.columns = df.columns.str.strip()
         sheets[sheet] = df
 
     return sheets
+
+
+def load_excel_streaming(file, chunk_size=DEFAULT_CHUNK_SIZE, sheet_names=None,
+                         columns=None):
+    """
+    Load sheets by concatenating the chunks from iter_excel_chunks
+    """
+    sheets = {}
+    chunks = {}
+
+    for sheet_name, chunk in iter_excel_chunks(file, chunk_size=chunk_size,
+                                               sheet_names=sheet_names,
+                                               columns=columns):
+        chunks.setdefault(sheet_name, []).append(chunk)
+
+    for sheet_name, sheet_chunks in chunks.items():
+        if len(sheet_chunks) == 1:
+            sheets[sheet_name] = sheet_chunks[0]
+        else:
+            # Columns that were empty in some chunks come back as object
+            sheets[sheet_name] = pd.concat(
+                sheet_chunks, ignore_index=True).infer_objects()
+
+    return sheets
+
+
+def iter_excel_chunks(file, chunk_size=DEFAULT_CHUNK_SIZE, sheet_names=None,
+                      columns=None):
+    """
+    Stream a workbook sheet by sheet as (sheet_name, DataFrame) row chunks
+
+    Uses openpyxl read_only/values_only iteration so only one chunk of rows
+    is held in memory at a time. Every sheet yields at least one chunk (an
+    empty DataFrame with the header columns when it has no data rows), and
+    chunk indexes continue across chunks so concatenating them reproduces
+    the RangeIndex pd.read_excel would produce.
+    """
+    workbook, owned = _as_workbook(file)
+
+    try:
+        for worksheet in workbook.worksheets:
+            if sheet_names is not None and worksheet.title not in sheet_names:
+                continue
+
+            sheet_columns = None
+            if columns is not None:
+                sheet_columns = columns.get(worksheet.title)
+
+            for chunk in iter_sheet_chunks(worksheet, chunk_size=chunk_size,
+                                           columns=sheet_columns):
+                yield worksheet.title, chunk
+    finally:
+        if owned:
+            workbook.close()
+
+
+class SheetChunks:
+    """
+    Re-iterable row chunks of one sheet, in place of its DataFrame
+
+    For sheets too large to load whole: each pass over it opens the
+    workbook from contents and yields the iter_sheet_chunks DataFrames one
+    at a time. rows is the number of data rows once a pass has finished.
+    """
+
+    def __init__(self, contents, sheet_name, columns=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+        self.contents = contents
+        self.sheet_name = sheet_name
+        self.columns = columns
+        self.chunk_size = chunk_size
+        self.rows = None
+
+    def __iter__(self):
+        workbook = open_workbook(io.BytesIO(self.contents))
+
+        try:
+            rows = 0
+            for chunk in iter_sheet_chunks(workbook[self.sheet_name],
+                                           chunk_size=self.chunk_size,
+                                           columns=self.columns):
+                rows += len(chunk)
+                yield chunk
+            self.rows = rows
+        finally:
+            workbook.close()
+
+
+def probe_excel(file):
+    """
+    Read only the header row of every sheet
+
+    Returns {sheet_name: {'columns': [...], 'total_rows': n}} in workbook
+    order. total_rows comes from the sheet's <dimension> record, so it is an
+    estimate (None when the file does not carry one) and no data rows are
+    parsed.
+    """
+    workbook, owned = _as_workbook(file)
+    probes = {}
+
+    try:
+        for worksheet in workbook.worksheets:
+            header = next(worksheet.iter_rows(max_row=1, values_only=True), None)
+            max_row = worksheet.max_row
+
+            probes[worksheet.title] = {
+                'columns': _normalize_header(header) if header else [],
+                'total_rows': max(max_row - 1, 0) if max_row else None
+            }
+    finally:
+        if owned:
+            workbook.close()
+
+    return probes
+
+
+def open_workbook(file):
+    """Open a workbook in openpyxl read-only mode with cached formula values"""
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    return load_workbook(file, read_only=True, data_only=True)
+
+
+def _as_workbook(file):
+    """Return (workbook, owned) - owned workbooks are closed by the caller"""
+    if isinstance(file, Workbook):
+        return file, False
+    return open_workbook(file), True
+
+
+def iter_sheet_chunks(worksheet, chunk_size=DEFAULT_CHUNK_SIZE, columns=None):
+    """
+    Yield DataFrame chunks for a single read-only worksheet
+
+    Mirrors pd.read_excel: the first row is the header, blank rows in the
+    middle of the data are kept while trailing blank rows are dropped.
+    When columns is given only those columns are loaded, and cells in the
+    other columns are skipped before openpyxl converts them.
+    """
+    header = next(worksheet.iter_rows(max_row=1, values_only=True), None)
+
+    if header is None:
+        yield pd.DataFrame()
+        return
+
+    names = _normalize_header(header)
+
+    if columns is None:
+        positions = list(range(len(names)))
+        rows = _iter_value_rows(worksheet, len(names))
+    else:
+        wanted = set(columns)
+        positions = [i for i, name in enumerate(names) if name in wanted]
+        rows = _iter_projected_rows(worksheet, positions)
+
+    selected = [names[i] for i in positions]
+    width = len(selected)
+
+    buffer = []
+    pending_blank = []
+    start = 0
+
+    for row, has_data in rows:
+        if not has_data:
+            # Only keep blank rows once we know data follows them
+            pending_blank.append(row)
+            continue
+
+        if pending_blank:
+            buffer.extend(pending_blank)
+            pending_blank = []
+        buffer.append(row)
+
+        if len(buffer) >= chunk_size:
+            yield _build_chunk(buffer, selected, start)
+            start += len(buffer)
+            buffer = []
+
+    if buffer or start == 0:
+        yield _build_chunk(buffer, selected, start)
+
+
+def _iter_value_rows(worksheet, width):
+    """
+    (row, has_data) for the data rows, with rows as value tuples padded or
+    cut to the header width
+    """
+    for row in worksheet.iter_rows(min_row=2, values_only=True):
+        has_data = any(value is not None for value in row)
+        row = tuple(row[:width])
+        if len(row) < width:
+            row = row + (None,) * (width - len(row))
+        yield row, has_data
+
+
+def _iter_projected_rows(worksheet, positions):
+    """
+    (row, has_data) for the data rows, with rows holding only the cells at
+    the given 0-based column positions
+
+    openpyxl's values_only iteration still converts every cell of a row
+    (shared string lookups, number casting, date detection). This drives
+    openpyxl's sheet parser directly and drops unwanted <c> elements from
+    each row before they are converted, so parse time follows the number
+    of columns kept. Rows missing from the XML are yielded as blank rows,
+    as openpyxl does. has_data also counts the dropped cells, so rows with
+    data only outside the projection are kept like pd.read_excel keeps
+    them.
+
+    Where openpyxl's parser is not what this expects, whole rows are read
+    and sliced instead.
+    """
+    parser = _projected_parser(worksheet, positions)
+    if parser is None:
+        yield from _iter_sliced_rows(worksheet, positions)
+        return
+
+    wanted = parser.wanted_columns
+    blank = (None,) * len(positions)
+
+    with parser.source:
+        expected_row = 2
+        for row_index, cells in parser.parse():
+            if row_index < 2:
+                continue
+
+            for _ in range(expected_row, row_index):
+                yield blank, False
+            expected_row = row_index + 1
+
+            values = [None] * len(positions)
+            for cell in cells:
+                slot = wanted.get(cell['column'])
+                if slot is not None:
+                    values[slot] = cell['value']
+            has_data = (any(value is not None for value in values)
+                        or parser.dropped_values())
+            yield tuple(values), has_data
+
+
+def _iter_sliced_rows(worksheet, positions):
+    """_iter_projected_rows from whole rows, without openpyxl's parser"""
+    for row in worksheet.iter_rows(min_row=2, values_only=True):
+        has_data = any(value is not None for value in row)
+        yield tuple(row[i] if i < len(row) else None for i in positions), has_data
+
+
+def _projected_parser(worksheet, positions):
+    """
+    A _ProjectedSheetParser over the worksheet's XML, or None when this
+    openpyxl's read-only internals differ from the ones it is built on
+    """
+    parent = worksheet.parent
+    required = [
+        (worksheet, '_get_source'), (worksheet, '_shared_strings'),
+        (parent, '_date_formats'), (parent, '_timedelta_formats'),
+        (WorkSheetParser, 'parse'), (WorkSheetParser, 'parse_row')
+    ]
+    if WorkSheetParser is None or not all(hasattr(owner, name) for owner, name in required):
+        return None
+
+    wanted = {position + 1: slot for slot, position in enumerate(positions)}
+    source = worksheet._get_source()
+    try:
+        return _ProjectedSheetParser(
+            source,
+            worksheet._shared_strings,
+            wanted,
+            data_only=parent.data_only,
+            epoch=parent.epoch,
+            date_formats=parent._date_formats,
+            timedelta_formats=parent._timedelta_formats
+        )
+    except TypeError:
+        source.close()
+        return None
+
+
+# Children of a <c> element that hold its value
+_VALUE_TAGS = {f"{{{SHEET_MAIN_NS}}}v", f"{{{SHEET_MAIN_NS}}}is"}
+
+
+class _ProjectedSheetParser(WorkSheetParser or object):
+    """WorkSheetParser that only converts cells in the wanted columns"""
+
+    def __init__(self, src, shared_strings, wanted_columns, **kwargs):
+        super().__init__(src, shared_strings, **kwargs)
+        self.source = src
+        self.wanted_columns = wanted_columns
+        self.column_cache = {}
+        # Cells of the last parsed row left out of the projection
+        self.dropped = []
+
+    def dropped_values(self):
+        """Whether a cell left out of the last parsed row holds a value"""
+        return any(
+            child.tag in _VALUE_TAGS and (child.text or len(child))
+            for cell in self.dropped for child in cell
+        )
+
+    def parse_row(self, row):
+        kept = []
+        dropped = []
+
+        for cell in row:
+            coordinate = cell.get('r')
+            if not coordinate:
+                # Positional cells need the parser's column counter, so
+                # leave rows without coordinates untouched
+                kept = None
+                break
+
+            letters = coordinate.rstrip('0123456789')
+            column = self.column_cache.get(letters)
+            if column is None:
+                column = column_index_from_string(letters)
+                self.column_cache[letters] = column
+
+            if column in self.wanted_columns:
+                kept.append(cell)
+            else:
+                dropped.append(cell)
+
+        if kept is not None:
+            row[:] = kept
+        self.dropped = dropped if kept is not None else []
+
+        return super().parse_row(row)
+
+
+def _column_filter(columns):
+    """usecols callable for pd.read_excel matching stripped column names"""
+    wanted = set(columns)
+
+    def keep(name):
+        return str(name).strip() in wanted
+
+    return keep
+
+
+def _normalize_header(header):
+    """
+    Turn a raw header row into column names the way pd.read_excel does:
+    trailing empty cells are dropped, empty cells become 'Unnamed: n',
+    duplicates get a '.n' suffix, and names are stripped of whitespace
+    """
+    header = list(header)
+    while header and header[-1] is None:
+        header.pop()
+
+    columns = []
+    seen = {}
+
+    for position, value in enumerate(header):
+        name = f"Unnamed: {position}" if value is None else str(value).strip()
+
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+
+        columns.append(name)
+
+    return columns
+
+
+def _build_chunk(rows, columns, start):
+    chunk = pd.DataFrame.from_records(rows, columns=columns)
+    chunk.index = pd.RangeIndex(start, start + len(chunk))
+
+    # pd.read_excel reads blank cells as NaN, not None, and an entirely
+    # empty column as float
+    for col in chunk.columns[chunk.dtypes == object]:
+        if len(chunk) > 0 and chunk[col].isna().all():
+            chunk[col] = chunk[col].astype('float64')
+        else:
+            chunk[col] = chunk[col].where(chunk[col].notna(), np.nan)
+
+    return chunk
@@ -2,7 +2,7 @@
 Detect and handle different Excel data formats
 """
 import pandas as pd
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 
 
 def detect_data_format(df: pd.DataFrame) -> str:
@@ -15,23 +15,34 @@ def detect_data_format(df: pd.DataFrame) -> str:
         'entity_summary' - Aggregated entity-level data
         'unknown' - Cannot determine format
     """
+    return detect_format_from_columns(df.columns)
+
+
+def detect_format_from_columns(columns) -> str:
+    """
+    Detect the data format from column names alone
+
+    Lets callers classify a sheet from its header row before parsing any
+    data rows. Returns the same values as detect_data_format.
+    """
+    columns = set(columns)
 
     # Check for detailed findings format (original)
     # Required columns: Compliance %, Score Gap, Status, Checklist Title
     detailed_required = ['Compliance %',
                          'Score Gap', 'Status', 'Checklist Title']
-    has_detailed = all(col in df.columns for col in detailed_required)
+    has_detailed = all(col in columns for col in detailed_required)
 
     # Check for detailed findings with multi-tender format
     # Required columns: PE Name, Checklist Title, Tenders, Total Budget, Tender Count, Finding Title, Status, Red Flag
     multi_tender_required = ['PE Name', 'Checklist Title', 'Tenders',
                              'Total Budget', 'Tender Count', 'Finding Title',
                              'Status', 'Red Flag']
-    has_multi_tender = all(col in df.columns for col in multi_tender_required)
+    has_multi_tender = all(col in columns for col in multi_tender_required)
 
     # Check for entity summary format
     summary_columns = ['Procuring Entity', 'Overall %', 'Tenders']
-    has_summary = all(col in df.columns for col in summary_columns)
+    has_summary = all(col in columns for col in summary_columns)
 
     if has_detailed:
         return 'detailed_findings'
@@ -47,13 +58,24 @@ def get_format_info(df: pd.DataFrame) -> Dict:
     """
     Get information about the detected format
     """
-    format_type = detect_data_format(df)
+    return get_format_info_from_columns(df.columns, len(df))
+
+
+def get_format_info_from_columns(columns: List[str],
+                                 total_rows: Optional[int]) -> Dict:
+    """
+    Get format information from column names and a row count
+
+    Used for sheets classified from their header row alone, where
+    total_rows is the reader's estimate rather than a parsed count.
+    """
+    format_type = detect_format_from_columns(columns)
 
     info = {
         'format': format_type,
-        'total_rows': len(df),
-        'total_columns': len(df.columns),
-        'columns': list(df.columns)
+        'total_rows': total_rows,
+        'total_columns': len(columns),
+        'columns': list(columns)
     }
 
     if format_type == 'detailed_findings':
@@ -76,3 +98,39 @@ def get_format_info(df: pd.DataFrame) -> Dict:
         info['key_fields'] = []
 
     return info
+
+
+# Columns each analysis engine reads for a format. Anything else in the
+# sheet (Requirement Name, Implication, Management Response, Auditor
+# Opinion and other free-text columns) is skipped when the sheet is parsed.
+FORMAT_COLUMNS = {
+    'detailed_findings': [
+        'Compliance %', 'Score Gap', 'Status', 'Checklist Title',
+        'Expected Score', 'Actual Score', 'Estimated Budget', 'Red Flag',
+        'Audit Type', 'PE Category', 'PE Name', 'Entity Name', 'Entity Number'
+    ],
+    'detailed_findings_multi_tender': [
+        'PE Name', 'Checklist Title', 'Tenders', 'Total Budget',
+        'Tender Count', 'Finding Title', 'Status', 'Red Flag',
+        'Finding Description', 'Recommendation', 'Created At'
+    ],
+    'entity_summary': [
+        'Procuring Entity', 'Overall %', 'Status', 'Pe Category',
+        'Tenders', 'Tendering Avg', 'App Marks', 'Institution', 'Tender Number'
+    ]
+}
+
+
+def get_format_columns(format_type: str, columns: List[str]) -> Optional[List[str]]:
+    """
+    Get the columns of a sheet that the engine for format_type reads
+
+    Keeps the sheet's column order. Returns None for formats without a
+    declared column set, meaning the whole sheet should be loaded.
+    """
+    needed = FORMAT_COLUMNS.get(format_type)
+    if needed is None:
+        return None
+
+    needed = set(needed)
+    return [col for col in columns if col in needed]
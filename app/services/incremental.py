@@ -0,0 +1,453 @@
+"""
+Incremental re-analysis of detailed findings sheets
+
+Findings workbooks mostly change a few rows at a time: new findings are
+appended and existing ones move from OPEN to CLOSED. An IncrementalSheet
+keeps a sheet's rows, keyed by a row key column, next to its
+SheetAggregate; update() takes only the new, changed and deleted rows,
+retracts the old versions' contributions from the aggregate and adds the
+new ones (see SheetAggregate.replace), so the analysis stays equal to
+analyze_sheet over the current rows (up to 0.01 in an average on a
+rounding tie) without re-aggregating all of them.
+
+The rows themselves are kept because retracting a row needs its old
+values, and because a few row-order details (a key's first row, the top
+budget items) can only be settled from the rows when a change touches
+them; the aggregate is then rebuilt from the stored rows. The finalized
+analysis is kept too, and an update only rebuilds the PE, checklist and
+entity entries of the groups its rows belong to (see updated_analysis).
+"""
+import asyncio
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.config import INCREMENTAL_TTL, INCREMENTAL_STORE_BYTES
+from app.services.analysis_engine import ANALYSIS_SECTIONS
+from app.services.format_detector import get_format_columns
+from app.services.pipeline import classify_sheets, probe_workbook, read_sheet
+from app.services.sheet_aggregate import (
+    GROUP_SECTIONS,
+    REQUIRED_COLUMNS,
+    SheetAggregate
+)
+from app.services.ttl_store import TTLStore
+
+
+class IncrementalSheet:
+    """
+    A detailed findings sheet's rows by row key, their aggregate and its
+    finalized analysis
+    """
+
+    def __init__(self, df, key_column):
+        keys = _row_keys(df[key_column], key_column)
+        _check_unique(keys, key_column)
+
+        self.key_column = key_column
+        # The columns analyze_sheet reads, indexed by row key in sheet order
+        self.rows = df[get_format_columns(
+            "detailed_findings", list(df.columns))].set_axis(keys)
+        # Sheet position of every row; appended rows get new positions
+        self.positions = np.arange(len(df))
+        self.next_position = len(df)
+        self.aggregate = SheetAggregate.from_rows(self.rows)
+        # Kept so an update only rebuilds the group entries it touches
+        self.result = self.aggregate.finalize()
+
+    @property
+    def size(self):
+        return int(self.rows.memory_usage(deep=True).sum())
+
+    def update(self, rows, deleted=()):
+        """
+        Apply new and changed rows and delete rows by key
+
+        rows holds the key column and any of the sheet's columns; columns
+        left out keep their values (or are blank for new rows). Rows whose
+        values did not change are ignored. Returns the number of rows
+        added, updated, unchanged and deleted.
+
+        The aggregation runs in this process; IncrementalSession.update
+        hands it to a worker instead.
+        """
+        changes = self.changes(rows, deleted)
+        outcome = updated_analysis(self.aggregate, changes)
+        if outcome is None:
+            outcome = rebuilt_analysis(
+                *changes.applied(self.rows.copy(), self.positions))
+        return self.commit(changes, *outcome)
+
+    def changes(self, rows, deleted=()):
+        """
+        The SheetChanges of an update (see update()), found by key lookups
+        without touching the sheet's other rows
+
+        Raises ValueError for rows without a key, keys sent twice and rows
+        both updated and deleted.
+        """
+        if self.key_column not in rows.columns:
+            if len(rows):
+                raise ValueError(f"Rows need a '{self.key_column}' value")
+            rows = rows.assign(**{self.key_column: pd.Series(dtype=object)})
+
+        keys = _row_keys(rows[self.key_column], self.key_column)
+        _check_unique(keys, self.key_column)
+        rows = rows.set_axis(keys)
+
+        deleted = _row_keys(pd.Series(list(deleted), dtype=object),
+                            self.key_column).unique()
+        both = deleted.intersection(keys)
+        if len(both):
+            raise ValueError(
+                f"Rows both updated and deleted: {', '.join(both[:5])}")
+
+        # Row numbers in self.rows; the index keeps its hash table between
+        # updates, so these lookups do not scan the sheet
+        found = self.rows.index.get_indexer(keys)
+        existing = found >= 0
+        deleted_at = self.rows.index.get_indexer(deleted)
+        deleted_at = np.sort(deleted_at[deleted_at >= 0])
+
+        current = self.rows.iloc[found[existing]]
+        updated = current.copy()
+        columns = [column for column in self.rows.columns if column in rows.columns]
+        for column in columns:
+            updated[column] = rows.loc[existing, column]
+        differs = _differs(current[columns], updated[columns])
+        changed = differs.any(axis=1)
+        # Only columns with a changed value are written back
+        columns = [column for column, written
+                   in zip(columns, differs[changed].any(axis=0)) if written]
+        updated_at = found[existing][changed]
+        order = np.argsort(updated_at)
+        updated_at = updated_at[order]
+        updated = updated.iloc[np.flatnonzero(changed)[order]]
+
+        added = rows.loc[~existing].reindex(columns=self.rows.columns)
+        replaced = np.sort(np.concatenate([updated_at, deleted_at]))
+
+        return SheetChanges(
+            columns,
+            self.rows.iloc[replaced], self.positions[replaced],
+            updated_at, self.positions[updated_at], updated, deleted_at,
+            added, np.arange(self.next_position, self.next_position + len(added)),
+            {
+                "added": len(added),
+                "updated": len(updated),
+                "unchanged": int(existing.sum()) - len(updated),
+                "deleted": len(deleted_at)
+            }
+        )
+
+    def commit(self, changes, aggregate, analysis, entries=None):
+        """
+        Apply changes to the rows and take on the aggregate and analysis
+        updated_analysis (or rebuilt_analysis) computed for them
+
+        Returns the changes' row counts.
+        """
+        self.rows, self.positions = changes.applied(self.rows, self.positions)
+        self.next_position += len(changes.added)
+        self.aggregate = aggregate
+        self.result = (analysis if entries is None
+                       else _patched(self.result, analysis, entries))
+        return changes.counts
+
+    def analysis(self):
+        """analyze_sheet's result for the current rows"""
+        return self.result
+
+
+class SheetChanges:
+    """
+    An update of an IncrementalSheet: the rows it replaces and their new
+    versions, the rows it deletes and the rows it appends
+
+    Holds only those rows, so it is cheap to send to a worker.
+    """
+
+    def __init__(self, columns, replaced, replaced_positions, updated_at,
+                 updated_positions, updated, deleted_at, added, added_positions,
+                 counts):
+        # Columns the update sets
+        self.columns = columns
+        # Current versions of the updated and deleted rows, in sheet order
+        self.replaced = replaced
+        self.replaced_positions = replaced_positions
+        # Row numbers, sheet positions and new versions of the updated rows
+        self.updated_at = updated_at
+        self.updated_positions = updated_positions
+        self.updated = updated
+        # Row numbers of the deleted rows
+        self.deleted_at = deleted_at
+        # Appended rows and the sheet positions they get
+        self.added = added
+        self.added_positions = added_positions
+        # Rows added, updated, unchanged and deleted
+        self.counts = counts
+
+    def applied(self, rows, positions):
+        """(rows, positions) with the changes made, writing into rows"""
+        for column in self.columns:
+            _set_values(rows, self.updated_at, column, self.updated[column])
+        if len(self.deleted_at):
+            keep = np.ones(len(rows), dtype=bool)
+            keep[self.deleted_at] = False
+            rows = rows[keep]
+            positions = positions[keep]
+        if len(self.added):
+            rows = pd.concat([rows, self.added]) if len(rows) else self.added
+            positions = np.concatenate([positions, self.added_positions])
+        return rows, positions
+
+
+def updated_analysis(aggregate, changes):
+    """
+    (aggregate, analysis, entries) for a sheet's aggregate after changes
+
+    The old versions' contributions are taken out of the aggregate and the
+    new ones put in (see SheetAggregate.replace). analysis is finalized
+    without the GROUP_SECTIONS; entries holds, per group section, the
+    group_entries of just the groups the changes touched. None when the
+    aggregate has to be rebuilt from the rows (see rebuilt_analysis).
+    """
+    # Appended rows go in with the new versions, after every other row
+    new_rows = [rows for rows in (changes.updated, changes.added) if len(rows)]
+    parts = []
+    if new_rows:
+        parts.append(SheetAggregate.from_rows(
+            pd.concat(new_rows) if len(new_rows) > 1 else new_rows[0],
+            positions=np.concatenate([changes.updated_positions,
+                                      changes.added_positions])))
+    if len(changes.replaced):
+        old = SheetAggregate.from_rows(changes.replaced,
+                                       positions=changes.replaced_positions)
+        new = parts[0] if parts else SheetAggregate.from_rows(
+            changes.replaced.iloc[:0], positions=[])
+        aggregate = aggregate.replace(old, new)
+        if aggregate is None:
+            return None
+        parts.append(old)
+    elif parts:
+        aggregate = aggregate.merge(parts[0])
+
+    analysis = aggregate.finalize(sections=[
+        section for section in ANALYSIS_SECTIONS if section not in GROUP_SECTIONS])
+    entries = {}
+    for section, name in GROUP_SECTIONS.items():
+        if parts and name in aggregate.groups:
+            keys = parts[0].groups[name].index.append(
+                [part.groups[name].index for part in parts[1:]]).unique()
+            entries[section] = aggregate.group_entries(section, keys)
+
+    return aggregate, analysis, entries
+
+
+def rebuilt_analysis(rows, positions):
+    """(aggregate, analysis) of a sheet's rows aggregated from scratch"""
+    aggregate = SheetAggregate.from_rows(rows, positions=positions)
+    return aggregate, aggregate.finalize()
+
+
+class IncrementalSession:
+    """The incrementally analyzed sheets of one workbook"""
+
+    def __init__(self, filename, key_column, sheets, skipped):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.key_column = key_column
+        self.sheets = sheets
+        # {sheet_name: reason} for the sheets that are not analyzed
+        self.skipped = skipped
+        self.created_at = datetime.now().isoformat()
+        self.updated_at = self.created_at
+        # Updates of a session are applied one at a time
+        self.lock = asyncio.Lock()
+
+    @property
+    def size(self):
+        return sum(sheet.size for sheet in self.sheets.values())
+
+    async def update(self, sheet_name, rows, deleted, run):
+        """
+        IncrementalSheet.update with the aggregation run by run (e.g.
+        analysis_pool.run); the sheet is left as it was if run raises
+        """
+        async with self.lock:
+            sheet = self.sheets[sheet_name]
+            changes = sheet.changes(rows, deleted)
+            outcome = await run(updated_analysis, sheet.aggregate, changes)
+            if outcome is None:
+                outcome = await run(
+                    rebuilt_analysis, *changes.applied(sheet.rows.copy(), sheet.positions))
+            counts = sheet.commit(changes, *outcome)
+            self.updated_at = datetime.now().isoformat()
+            return counts
+
+    def sheet_result(self, sheet_name):
+        sheet = self.sheets[sheet_name]
+        return {
+            "total_rows": len(sheet.rows),
+            "analysis": sheet.analysis()
+        }
+
+    def to_summary(self):
+        return {
+            "session_id": self.id,
+            "filename": self.filename,
+            "key_column": self.key_column,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "expires_in": INCREMENTAL_TTL,
+            "memory_bytes": self.size,
+            "sheets": {
+                sheet_name: self.sheet_result(sheet_name)
+                for sheet_name in self.sheets
+            },
+            "skipped_sheets": self.skipped
+        }
+
+
+def open_sheets(contents, digest, key_column):
+    """
+    IncrementalSheets of an uploaded workbook's detailed findings sheets
+
+    Returns (sheets, skipped) as keyed_sheets does, reading only the
+    columns they need.
+    """
+    headers, _, _ = probe_workbook(contents, digest)
+    columns = _keyed_columns(headers, key_column)
+    return keyed_sheets(headers, {
+        sheet_name: read_sheet(contents, digest, headers, sheet_name, projection)
+        for sheet_name, projection in columns.items()
+    }, key_column)
+
+
+def open_parsed_sheets(headers, sheets, key_column):
+    """open_sheets for a workbook already loaded by parse_workbook"""
+    columns = _keyed_columns(headers, key_column)
+    return keyed_sheets(headers, {
+        sheet_name: sheets[sheet_name][projection]
+        for sheet_name, projection in columns.items()
+    }, key_column)
+
+
+def keyed_sheets(headers, sheets, key_column):
+    """
+    ({sheet_name: IncrementalSheet}, {sheet_name: reason skipped}) for the
+    loaded detailed findings sheets of a workbook
+
+    Raises ValueError when a sheet's row keys are blank or not unique.
+    """
+    formats, _ = classify_sheets(headers)
+    incremental = {}
+    skipped = {}
+
+    for sheet_name, probe in headers.items():
+        if formats[sheet_name] != "detailed_findings":
+            skipped[sheet_name] = (
+                f"Not a detailed findings sheet ({formats[sheet_name]})")
+        elif key_column not in probe["columns"]:
+            skipped[sheet_name] = f"No '{key_column}' column"
+        else:
+            missing = [col for col in REQUIRED_COLUMNS if col not in probe["columns"]]
+            if missing:
+                skipped[sheet_name] = f"Missing required column: {missing[0]}"
+            else:
+                try:
+                    incremental[sheet_name] = IncrementalSheet(
+                        sheets[sheet_name], key_column)
+                except ValueError as e:
+                    raise ValueError(f"Sheet '{sheet_name}': {e}")
+
+    return incremental, skipped
+
+
+def _keyed_columns(headers, key_column):
+    """Columns to load per detailed findings sheet: the engine's and the key"""
+    formats, projections = classify_sheets(headers)
+    columns = {}
+
+    for sheet_name, format_type in formats.items():
+        if format_type == "detailed_findings" and key_column in headers[sheet_name]["columns"]:
+            projection = projections[sheet_name]
+            columns[sheet_name] = projection + [key_column] \
+                if key_column not in projection else projection
+
+    return columns
+
+
+def _row_keys(values, key_column):
+    """
+    Row keys as strings, with whole numbers written without a decimal
+    part, so a key read from Excel as 12.0 matches 12 and "12" in updates
+    """
+    if values.isna().any():
+        raise ValueError(f"Rows without a '{key_column}' value")
+
+    def key(value):
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value).strip()
+
+    return pd.Index([key(value) for value in values], dtype=object)
+
+
+def _check_unique(keys, key_column):
+    duplicated = keys[keys.duplicated()].unique()
+    if len(duplicated):
+        raise ValueError(
+            f"Duplicate '{key_column}' values: {', '.join(duplicated[:5])}")
+
+
+def _set_values(df, at, column, values):
+    """df[column] at row numbers at = values, in place"""
+    if not len(at):
+        return
+    try:
+        df.iloc[at, df.columns.get_loc(column)] = values.to_numpy()
+    except (TypeError, ValueError):
+        # e.g. text in a column read as numbers: widen the column first
+        df[column] = df[column].astype(object)
+        df.iloc[at, df.columns.get_loc(column)] = values.to_numpy()
+
+
+def _patched(result, analysis, entries):
+    """
+    A kept result with analysis's sections and the touched group entries
+    (see updated_analysis) put in; the group sections are updated in place
+    """
+    patched = {}
+    for key, value in result.items():
+        if key in entries:
+            patched[key] = _patched_entries(value, entries[key])
+        else:
+            patched[key] = analysis.get(key, value)
+    return patched
+
+
+def _patched_entries(section, entries):
+    """A group section with entries set, and removed where they are None"""
+    added = False
+    for key, entry in entries.items():
+        if entry is None:
+            section.pop(key, None)
+        else:
+            added = added or key not in section
+            section[key] = entry
+    # Groups are listed in key order
+    return dict(sorted(section.items())) if added else section
+
+
+def _differs(current, updated):
+    """Boolean array of the values of updated that differ from current's"""
+    same = (current == updated) | (current.isna() & updated.isna())
+    # A blank compared with a value is NA, and a change
+    return ~same.fillna(False).to_numpy(dtype=bool)
+
+
+incremental_store = TTLStore(INCREMENTAL_TTL, max_bytes=INCREMENTAL_STORE_BYTES,
+                             sizeof=lambda session: session.size)
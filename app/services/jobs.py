@@ -0,0 +1,140 @@
+"""
+Background analysis jobs for workbooks too large to analyze within one
+request
+
+A job runs the same pipeline as /api/analyze, one pool task per step
+(probing the workbook, each sheet, the combined response), so its status
+can report progress sheet by sheet. Each sheet is read and analyzed on
+the same worker and only its pickled result comes back, so no sheet's
+rows pass through the API process. Finished jobs are kept in a TTLStore
+until their result expires or JOB_RESULT_BYTES is used up.
+"""
+import asyncio
+import uuid
+from datetime import datetime
+
+from app.config import JOB_RESULT_BYTES, JOB_RESULT_TTL, JOB_MAX_ACTIVE
+from app.services.pipeline import (
+    analyze_changed_sheet,
+    combine_pickled_results,
+    probe_workbook,
+    render_json
+)
+from app.services.ttl_store import TTLStore
+from app.services.worker_pool import analysis_pool, PoolBusyError
+
+
+class Job:
+    """State of one analysis job"""
+
+    def __init__(self, filename):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = "queued"
+        self.sheets = {}
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.finished_at = None
+        self.task = None
+
+    def to_status(self):
+        completed = sum(1 for sheet in self.sheets.values()
+                        if sheet["status"] == "completed")
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "progress": {
+                "sheets_total": len(self.sheets),
+                "sheets_completed": completed,
+                "sheets": self.sheets
+            },
+            "error": self.error
+        }
+
+
+class JobManager:
+    """Starts jobs on the analysis pool and keeps their results for a while"""
+
+    def __init__(self, pool, ttl, max_active, max_bytes):
+        self.pool = pool
+        self.max_active = max_active
+        self.max_bytes = max_bytes
+        self.active = {}
+        self.finished = TTLStore(ttl, max_bytes=max_bytes, sizeof=_job_size)
+
+    def submit(self, contents, filename=None):
+        """Queue an analysis of the workbook bytes and return its Job"""
+        if len(self.active) >= self.max_active:
+            raise PoolBusyError(f"{len(self.active)} jobs already queued or running")
+
+        job = Job(filename)
+        self.active[job.id] = job
+        job.task = asyncio.create_task(self._run(job, contents))
+        return job
+
+    def get(self, job_id):
+        return self.active.get(job_id) or self.finished.get(job_id)
+
+    def shutdown(self):
+        for job in list(self.active.values()):
+            job.task.cancel()
+
+    async def _run(self, job, contents):
+        try:
+            # Job steps were admitted when the job was, so they wait for a
+            # worker instead of being turned away by the pool's queue limit
+            headers, formats, projections = await self.pool.run(
+                probe_workbook, contents, bounded=False)
+            job.status = "running"
+            job.sheets = {
+                sheet_name: {"data_format": format_type, "status": "pending"}
+                for sheet_name, format_type in formats.items()
+            }
+
+            results = []
+            for sheet_name, format_type in formats.items():
+                job.sheets[sheet_name]["status"] = "running"
+                _, _, result = await self.pool.run(
+                    analyze_changed_sheet, frozenset(), contents, None, headers,
+                    sheet_name, format_type, projections.get(sheet_name),
+                    bounded=False)
+                results.append((sheet_name, result))
+                job.sheets[sheet_name]["status"] = "completed"
+
+            job.result = await self.pool.run(
+                render_json, combine_pickled_results, results, bounded=False)
+            job.status = "completed"
+
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "Job was cancelled"
+            raise
+
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+
+        finally:
+            job.finished_at = datetime.now().isoformat()
+            job.task = None
+            self.active.pop(job.id, None)
+            # The result's time-to-live starts when the job finishes
+            if not self.finished.set(job.id, job):
+                job.status = "failed"
+                job.error = (f"Result of {len(job.result)} bytes is larger "
+                             f"than JOB_RESULT_BYTES ({self.max_bytes})")
+                job.result = None
+                self.finished.set(job.id, job)
+
+
+def _job_size(job):
+    # The rendered result plus a rough allowance for the job's status
+    return len(job.result or b"") + 1024
+
+
+job_manager = JobManager(analysis_pool, JOB_RESULT_TTL, JOB_MAX_ACTIVE,
+                         JOB_RESULT_BYTES)
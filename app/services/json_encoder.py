@@ -0,0 +1,93 @@
+"""
+JSON encoding of analysis results
+
+FastAPI encodes a returned dict by walking all of it with jsonable_encoder
+and then running json.dumps over the copy; neither knows NumPy scalars,
+pandas timestamps or missing values, so the engines convert every value
+by hand. dumps() encodes such values directly: NumPy scalars and arrays
+as numbers and lists, pandas Timestamps as ISO strings, and NaN, NaT and
+pd.NA as null. It uses orjson when it is installed, which encodes a large
+multi-tender response several times faster than the FastAPI path (see
+benchmarks/bench_json_encoding.py), and the standard library otherwise.
+"""
+import datetime
+import decimal
+import json
+import math
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import JSONResponse  # type: ignore
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content):
+    """content as compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, default=encodable, option=ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. NumPy dict keys, which orjson does not take
+            return orjson.dumps(_native(content), option=ORJSON_OPTIONS)
+    return json.dumps(_native(content), ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with dumps, for content with NumPy and pandas values"""
+
+    def render(self, content):
+        return dumps(content)
+
+
+def encodable(value):
+    """
+    The JSON-ready form of a value orjson does not encode itself; also the
+    default hook of the other result encoders (see result_formats)
+    """
+    if isinstance(value, np.generic):
+        return _native(value.item())
+    if isinstance(value, (pd.Series, pd.Index, np.ndarray)):
+        return _native(value.tolist())
+    if isinstance(value, pd.Timestamp):
+        return None if value is pd.NaT else value.isoformat()
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _native(value):
+    """value with every nested value in a type json.dumps encodes, NaN as None"""
+    if isinstance(value, dict):
+        return {_key(key): _native(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_native(item) for item in value]
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if value is None or isinstance(value, (str, int)):
+        return value
+    return _native(encodable(value))
+
+
+def _key(key):
+    """A dict key as json.dumps writes it; orjson's OPT_NON_STR_KEYS agrees"""
+    if isinstance(key, np.generic):
+        key = key.item()
+    if isinstance(key, (str, int, float, bool)) or key is None:
+        return key
+    if isinstance(key, (datetime.date, datetime.time)):
+        return key.isoformat()
+    return str(key)
@@ -0,0 +1,262 @@
+"""
+Mergeable partial aggregates for the multi-tender findings analysis
+
+The counterpart of app/services/sheet_aggregate.py for
+analyze_multi_tender_findings: MultiTenderAggregate.from_rows() aggregates
+a row chunk, combine() merges chunks in any order and finalize() returns
+the analyze_multi_tender_findings result for all of them.
+
+The result lists every finding and every tender reference, so those are
+kept as they are (one entry per finding, one row per named tender); all
+other sections are kept as per-group sums. Budget sums match the
+engine's exactly for budgets in whole currency units.
+"""
+from functools import reduce
+from itertools import chain
+
+import pandas as pd
+
+from app.services.analysis_engine import clean_numeric_series
+from app.services.multi_tender_engine import (
+    parse_tender_column,
+    _budget_range_distribution,
+    _checklist_entry,
+    _detailed_findings,
+    _multi_tender_result,
+    _pe_entry,
+    _tender_records
+)
+from app.services.sheet_aggregate import (
+    _add,
+    _group_sums,
+    _merge_groups
+)
+
+REQUIRED_COLUMNS = ['PE Name', 'Checklist Title', 'Tenders', 'Total Budget',
+                    'Tender Count', 'Finding Title', 'Status', 'Red Flag']
+
+
+class MultiTenderAggregate:
+    """
+    Partial analyze_multi_tender_findings state for a set of rows of one
+    sheet
+
+    Build with from_rows(), merge with combine() and turn into the engine's
+    result with finalize().
+    """
+
+    def __init__(self, start, totals, pe, checklist, checklist_pes, tenders,
+                 findings):
+        # Position of the first aggregated row in the sheet
+        self.start = start
+        # Named scalar sums and counts
+        self.totals = totals
+        # PE and checklist group tables (see sheet_aggregate._group_sums)
+        self.pe = pe
+        self.checklist = checklist
+        # Distinct (checklist, PE Name) pairs, for affected_entities
+        self.checklist_pes = checklist_pes
+        # Named tender references in sheet order, with the finding's PE
+        self.tenders = tenders
+        # detailed_findings entries of the rows, in sheet order
+        self.findings = findings
+
+    @classmethod
+    def from_rows(cls, df, offset=0):
+        """
+        Aggregate rows of a multi-tender findings sheet
+
+        offset is the position of df's first row in the sheet.
+        """
+        df = df.copy()
+        df['Total Budget'] = clean_numeric_series(df['Total Budget'])
+        df['Tender Count'] = clean_numeric_series(df['Tender Count'])
+        positions = pd.Series(range(offset, offset + len(df)), index=df.index)
+
+        status = df['Status'].astype(str).str.upper()
+        red_flag_col = df['Red Flag'].astype(str).str.upper().str.strip()
+        sums = pd.DataFrame({
+            'size': 1,
+            'open': status == 'OPEN',
+            'closed': status == 'CLOSED',
+            'red_flags': (red_flag_col == 'RED FLAG') | (red_flag_col == 'YES'),
+            'budget_sum': df['Total Budget'],
+            'budget_count': df['Total Budget'].notna(),
+            'tenders_sum': df['Tender Count'],
+            'tenders_count': df['Tender Count'].notna()
+        }, index=df.index)
+
+        totals = {
+            name: sums[name].sum()
+            for name in ['size', 'open', 'closed', 'red_flags', 'budget_sum',
+                         'budget_count', 'tenders_sum', 'tenders_count']
+        }
+
+        tender_table = parse_tender_column(df['Tenders'])
+        tenders = tender_table[tender_table['tender_number'] != ''].copy()
+        tenders['pe'] = df['PE Name'].to_numpy()[tenders['finding'].to_numpy()]
+        tenders['finding'] += offset
+
+        checklist_pes = pd.DataFrame({
+            'checklist': df['Checklist Title'],
+            'pe': df['PE Name']
+        }).dropna().drop_duplicates()
+
+        return cls(
+            offset,
+            pd.Series(totals, dtype='float64'),
+            _group_sums(sums, df['PE Name'], positions,
+                        ['size', 'open', 'closed', 'budget_sum', 'red_flags']),
+            _group_sums(sums, df['Checklist Title'], positions,
+                        ['size', 'open', 'closed', 'budget_sum', 'budget_count',
+                         'tenders_sum', 'tenders_count', 'red_flags']),
+            checklist_pes,
+            tenders.reset_index(drop=True),
+            _detailed_findings(df, tender_table)
+        )
+
+    @classmethod
+    def combine(cls, aggregates):
+        """
+        Aggregate of the rows of all of aggregates (none is modified)
+
+        The findings and tenders of each are joined once, in sheet order,
+        rather than re-sorted every time two aggregates are merged.
+        """
+        aggregates = sorted(aggregates, key=lambda aggregate: aggregate.start)
+
+        return cls(
+            aggregates[0].start,
+            reduce(_add, [aggregate.totals for aggregate in aggregates]),
+            _merge_groups([aggregate.pe for aggregate in aggregates]),
+            _merge_groups([aggregate.checklist for aggregate in aggregates]),
+            pd.concat([aggregate.checklist_pes for aggregate in aggregates]
+                      ).drop_duplicates(),
+            pd.concat([aggregate.tenders for aggregate in aggregates],
+                      ignore_index=True),
+            list(chain.from_iterable(aggregate.findings for aggregate in aggregates))
+        )
+
+    def merge(self, other):
+        """Aggregate of the rows of both (neither is modified)"""
+        return MultiTenderAggregate.combine([self, other])
+
+    def finalize(self):
+        """The analyze_multi_tender_findings result for the aggregated rows"""
+        totals = self.totals
+
+        total_budget = 0.0
+        avg_budget_per_finding = 0.0
+        if totals['budget_count'] > 0:
+            total_budget = float(totals['budget_sum'])
+            avg_budget_per_finding = round(total_budget / totals['budget_count'], 2)
+
+        total_tenders = 0
+        avg_tenders_per_finding = 0.0
+        if totals['tenders_count'] > 0:
+            total_tenders = int(totals['tenders_sum'])
+            avg_tenders_per_finding = round(
+                float(totals['tenders_sum'] / totals['tenders_count']), 2)
+
+        # Only keep first occurrence of each tender number
+        budgeted = self.tenders[self.tenders['budget'] > 0].drop_duplicates(
+            'tender_number')
+        unique_tenders_with_budget = dict(
+            zip(budgeted['tender_number'], budgeted['budget'].tolist()))
+
+        return _multi_tender_result(
+            total_findings=int(totals['size']),
+            open_findings=int(totals['open']),
+            closed_findings=int(totals['closed']),
+            red_flags=int(totals['red_flags']),
+            total_budget=total_budget,
+            avg_budget_per_finding=avg_budget_per_finding,
+            total_tenders=total_tenders,
+            unique_tender_numbers=self.tenders['tender_number'].nunique(),
+            avg_tenders_per_finding=avg_tenders_per_finding,
+            budget_range_distribution=_budget_range_distribution(
+                unique_tenders_with_budget),
+            pe_analysis=self._pe_analysis(),
+            checklist_analysis=self._checklist_analysis(),
+            detailed_findings=self.findings
+        )
+
+    def _pe_analysis(self):
+        pe_analysis = {
+            'description': 'Analysis of findings grouped by Procuring Entity (PE), showing performance metrics and tender details for each entity'
+        }
+
+        # PE tenders - tender numbers and details in finding order
+        pe_tender_details = {}
+        for pe_name, tender in zip(self.tenders['pe'].tolist(),
+                                   _tender_records(self.tenders)):
+            pe_tender_details.setdefault(pe_name, []).append(tender)
+
+        table = self.pe.sort_index()
+        for pe_name, row in zip(table.index, table.itertuples(index=False)):
+            pe_name_str = str(pe_name).strip()
+            if pe_name_str == "":
+                continue
+
+            pe_analysis[pe_name_str] = _pe_entry(
+                row.size, row.open, row.closed, row.budget_sum, row.red_flags,
+                pe_tender_details.get(pe_name, []))
+
+        return pe_analysis
+
+    def _checklist_analysis(self):
+        checklist_analysis = {
+            'description': 'Detailed breakdown of findings grouped by checklist/compliance requirement, showing status, budget impact, and risk indicators'
+        }
+
+        affected = self.checklist_pes.groupby('checklist')['pe'].nunique()
+
+        table = self.checklist.sort_index()
+        for checklist, row in zip(table.index, table.itertuples(index=False)):
+            if str(checklist).strip() == "":
+                continue
+
+            checklist_budget = 0.0
+            checklist_avg_budget = 0.0
+            if row.budget_count > 0:
+                checklist_budget = float(row.budget_sum)
+                checklist_avg_budget = round(checklist_budget / row.budget_count, 2)
+
+            checklist_tenders = 0
+            checklist_avg_tenders = 0.0
+            if row.tenders_count > 0:
+                checklist_tenders = int(row.tenders_sum)
+                checklist_avg_tenders = round(
+                    float(row.tenders_sum / row.tenders_count), 2)
+
+            checklist_analysis[str(checklist).strip()] = _checklist_entry(
+                int(row.size), int(row.open), int(row.closed),
+                checklist_budget, checklist_avg_budget, checklist_tenders,
+                checklist_avg_tenders, int(row.red_flags),
+                int(affected.get(checklist, 0)))
+
+        return checklist_analysis
+
+
+def analyze_multi_tender_chunks(chunks):
+    """
+    analyze_multi_tender_findings for a sheet read as row chunks
+
+    Only one chunk is held at a time, next to the chunk aggregates, which
+    are merged once every chunk is read.
+    """
+    parts = []
+    offset = 0
+
+    for chunk in chunks:
+        if not parts:
+            for col in REQUIRED_COLUMNS:
+                if col not in chunk.columns:
+                    return {
+                        "error": f"Missing required column for multi-tender findings: {col}"
+                    }
+
+        parts.append(MultiTenderAggregate.from_rows(chunk, offset))
+        offset += len(chunk)
+
+    return MultiTenderAggregate.combine(parts).finalize()
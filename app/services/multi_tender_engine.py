@@ -2,9 +2,28 @@
 Analysis engine for detailed findings with multiple tenders per row
 Handles findings where each row contains multiple tender references
 """
+import itertools
+import numpy as np
 import pandas as pd
 import re
-from app.services.analysis_engine import clean_numeric
+from app.services.analysis_engine import clean_numeric_series
+
+
+# Tender reference patterns, compiled once and shared by the per-string and
+# column-level parsers. A Tenders cell is a comma separated list of parts
+# like 'TR152/006/2024/2025/W/07 (Own Funds, Budget: 150000000, Works,
+# National Competitive Tendering)', where a new part starts at 'TR<digits>/'.
+TENDER_SEPARATOR = re.compile(r',\s*(?=TR\d+/)')
+TENDER_NUMBER = re.compile(r'(TR\d+/[\d/]+/[A-Z]/\d+)')
+TENDER_BUDGET = re.compile(r'Budget:\s*([\d,]+)')
+TENDER_DETAILS = re.compile(r'\(([^)]*)\)')
+
+# Checked in this order, so 'Goods and Works' counts as Works
+TENDER_TYPES = ['Works', 'Goods', 'Services']
+
+# Columns of parse_tender_column after 'finding'
+TENDER_FIELDS = ['tender_number', 'budget', 'funding_source', 'type',
+                 'procurement_method']
 
 
 def parse_tender_details(tender_string):
@@ -18,43 +37,127 @@ def parse_tender_details(tender_string):
         return []
 
     tenders = []
-    # Split by line breaks or common separators
-    tender_parts = re.split(r',\s*(?=TR\d+/)', str(tender_string))
-
-    for part in tender_parts:
-        part = part.strip()
-        if not part:
-            continue
-
-        # Extract tender number (e.g., TR152/006/2024/2025/W/07)
-        tender_match = re.search(r'(TR\d+/[\d/]+/[A-Z]/\d+)', part)
-        tender_number = tender_match.group(
-            1) if tender_match else part.split('(')[0].strip()
-
-        # Extract budget if present
-        budget = 0
-        budget_match = re.search(r'Budget:\s*([\d,]+)', part)
-        if budget_match:
-            budget = float(budget_match.group(1).replace(',', ''))
-
-        # Extract type (Works, Goods, Services, etc.)
-        tender_type = 'Unknown'
-        if 'Works' in part:
-            tender_type = 'Works'
-        elif 'Goods' in part:
-            tender_type = 'Goods'
-        elif 'Services' in part:
-            tender_type = 'Services'
-
+    for part in _split_tenders(tender_string):
+        tender_number, budget, _, tender_type, _ = _parse_tender_part(part)
         tenders.append({
             'tender_number': tender_number,
-            'budget': budget,
+            'budget': 0 if budget is None else budget,
             'type': tender_type
         })
 
     return tenders
 
 
+def parse_tender_column(tenders):
+    """
+    Parse a whole Tenders column into a long frame, one row per tender
+
+    Column-level equivalent of calling parse_tender_details on every cell.
+    Each distinct cell is split once and each distinct tender reference is
+    parsed once, so findings that repeat a tender list, and tenders cited by
+    several findings, cost nothing extra. The rows are then laid out per
+    finding with numpy index arithmetic.
+
+    Columns:
+    - finding: 0-based position of the cell in `tenders`
+    - tender_number: '' when the part has no usable number
+    - budget: NaN when the part carries no budget
+    - funding_source: first item in the parentheses, e.g. 'Own Funds'
+    - type: Works, Goods, Services or Unknown
+    - procurement_method: last item in the parentheses, e.g.
+      'National Competitive Tendering'
+
+    funding_source and procurement_method are None when that item is
+    missing or is the budget or tender type instead.
+    """
+    cell_codes, cells = pd.factorize(pd.Series(tenders).to_numpy(dtype=object))
+
+    # Distinct cells -> tender parts, kept in cell order
+    split = [_split_tenders(cell) if isinstance(cell, str) else []
+             for cell in cells]
+    part_codes, unique_parts = pd.factorize(
+        np.array(list(itertools.chain.from_iterable(split)), dtype=object))
+
+    fields = pd.DataFrame.from_records(
+        [_parse_tender_part(part) for part in unique_parts],
+        columns=TENDER_FIELDS, nrows=len(unique_parts))
+    fields['budget'] = fields['budget'].astype('float64')
+
+    # The parts of distinct cell c are part_codes[starts[c]:starts[c] + counts[c]];
+    # repeat them for every finding holding that cell
+    counts = np.array([len(parts) for parts in split], dtype='int64')
+    starts = np.cumsum(counts) - counts
+
+    findings = np.flatnonzero(cell_codes >= 0)
+    sizes = counts[cell_codes[findings]]
+    offsets = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    take = np.repeat(starts[cell_codes[findings]], sizes) + offsets
+
+    table = fields.iloc[part_codes[take]].reset_index(drop=True)
+    table.insert(0, 'finding', np.repeat(findings, sizes))
+
+    return table
+
+
+def _split_tenders(tender_string):
+    """Stripped, non-empty tender parts of a Tenders cell"""
+    # Split at the comma before each 'TR<digits>/' tender number
+    parts = (part.strip() for part in TENDER_SEPARATOR.split(tender_string))
+    return [part for part in parts if part]
+
+
+def _parse_tender_part(part):
+    """Fields of one tender part, in TENDER_FIELDS order"""
+    # Extract tender number (e.g., TR152/006/2024/2025/W/07)
+    tender_match = TENDER_NUMBER.search(part)
+    tender_number = tender_match.group(
+        1) if tender_match else part.split('(')[0].strip()
+
+    # Extract budget if present
+    budget = None
+    budget_match = TENDER_BUDGET.search(part)
+    if budget_match:
+        budget = float(budget_match.group(1).replace(',', ''))
+
+    # Extract type (Works, Goods, Services, etc.)
+    tender_type = next(
+        (name for name in TENDER_TYPES if name in part), 'Unknown')
+
+    # Funding source and procurement method are the first and last of the
+    # comma separated items in the parentheses
+    funding_source = procurement_method = None
+    details_match = TENDER_DETAILS.search(part)
+    if details_match:
+        items = details_match.group(1).split(',')
+        funding_source = _tender_detail(items[0])
+        if len(items) > 1:
+            procurement_method = _tender_detail(items[-1])
+
+    return tender_number, budget, funding_source, tender_type, procurement_method
+
+
+def _tender_detail(item):
+    """A stripped detail item, or None when it is empty, a budget or a type"""
+    item = item.strip()
+    if not item or item.startswith('Budget') or item in TENDER_TYPES:
+        return None
+    return item
+
+
+def _tender_records(table):
+    """Tender table rows as the dicts parse_tender_details returns"""
+    return [
+        {
+            'tender_number': tender_number,
+            'budget': 0 if budget != budget else budget,
+            'type': tender_type
+        }
+        for tender_number, budget, tender_type in zip(
+            table['tender_number'].tolist(), table['budget'].tolist(),
+            table['type'].tolist())
+    ]
+
+
 def analyze_multi_tender_findings(df):
     """
     Analyze detailed findings with multiple tenders per finding
@@ -91,25 +194,29 @@ def analyze_multi_tender_findings(df):
 
     # Clean numeric columns
     if 'Total Budget' in df.columns:
-        df['Total Budget'] = df['Total Budget'].apply(clean_numeric)
+        df['Total Budget'] = clean_numeric_series(df['Total Budget'])
     if 'Tender Count' in df.columns:
-        df['Tender Count'] = df['Tender Count'].apply(clean_numeric)
+        df['Tender Count'] = clean_numeric_series(df['Tender Count'])
 
     # Basic metrics
     total_findings = int(len(df))
 
     # Status analysis
-    open_findings = int((df['Status'].astype(str).str.upper() == 'OPEN').sum())
-    closed_findings = int(
-        (df['Status'].astype(str).str.upper() == 'CLOSED').sum())
+    status = df['Status'].astype(str).str.upper()
+    is_open = status == 'OPEN'
+    is_closed = status == 'CLOSED'
+    open_findings = int(is_open.sum())
+    closed_findings = int(is_closed.sum())
 
     # Red flag analysis
-    red_flags = 0
-    if 'Red Flag' in df.columns:
-        red_flag_col = df['Red Flag'].astype(str).str.upper().str.strip()
-        # Only count actual red flags, not "NOT RED FLAG"
-        red_flags = int(((red_flag_col == 'RED FLAG') |
-                        (red_flag_col == 'YES')).sum())
+    red_flag_col = df['Red Flag'].astype(str).str.upper().str.strip()
+    # Only count actual red flags, not "NOT RED FLAG"
+    is_red_flag = (red_flag_col == 'RED FLAG') | (red_flag_col == 'YES')
+    red_flags = int(is_red_flag.sum())
+
+    # Every tender reference parsed once, one row per (finding, tender)
+    tender_table = parse_tender_column(df['Tenders'])
+    named_tenders = tender_table[tender_table['tender_number'] != '']
 
     # Budget analysis
     total_budget = 0.0
@@ -123,14 +230,7 @@ def analyze_multi_tender_findings(df):
     # Tender count analysis
     total_tenders = 0
     avg_tenders_per_finding = 0.0
-    unique_tender_numbers = set()
-
-    # Parse all tenders to get unique tender numbers
-    for idx, row in df.iterrows():
-        tenders = parse_tender_details(row.get('Tenders', ''))
-        for tender in tenders:
-            if tender['tender_number']:
-                unique_tender_numbers.add(tender['tender_number'])
+    unique_tender_numbers = named_tenders['tender_number'].nunique()
 
     if 'Tender Count' in df.columns:
         tender_data = df[df['Tender Count'].notna()]
@@ -140,41 +240,14 @@ def analyze_multi_tender_findings(df):
                 float(tender_data['Tender Count'].mean()), 2)
 
     # Budget range distribution (with unique tenders only)
-    budget_range_distribution = {
-        'description': 'Distribution of unique tenders across budget ranges, removing duplicates to get accurate budget allocation insights',
-        'ranges': {}
-    }
-
     # Collect unique tenders with their budgets
-    unique_tenders_with_budget = {}
-    for idx, row in df.iterrows():
-        tenders = parse_tender_details(row.get('Tenders', ''))
-        for tender in tenders:
-            if tender['tender_number'] and tender['budget'] > 0:
-                # Only keep first occurrence of each tender number
-                if tender['tender_number'] not in unique_tenders_with_budget:
-                    unique_tenders_with_budget[tender['tender_number']
-                                               ] = tender['budget']
-
-    # Define budget ranges (in TZS)
-    ranges = [
-        ('0-50M', 0, 50_000_000),
-        ('50M-100M', 50_000_000, 100_000_000),
-        ('100M-200M', 100_000_000, 200_000_000),
-        ('200M-500M', 200_000_000, 500_000_000),
-        ('500M+', 500_000_000, float('inf'))
-    ]
-
-    for range_name, min_val, max_val in ranges:
-        count = sum(1 for budget in unique_tenders_with_budget.values()
-                    if min_val <= budget < max_val)
-        range_total_budget = sum(budget for budget in unique_tenders_with_budget.values()
-                                 if min_val <= budget < max_val)
-        budget_range_distribution['ranges'][range_name] = {
-            'count': count,
-            'total_budget': round(range_total_budget, 2),
-            'percentage': round((count / len(unique_tenders_with_budget) * 100), 2) if unique_tenders_with_budget else 0
-        }
+    # Only keep first occurrence of each tender number
+    budgeted = named_tenders[named_tenders['budget'] > 0].drop_duplicates(
+        'tender_number')
+    unique_tenders_with_budget = dict(
+        zip(budgeted['tender_number'], budgeted['budget'].tolist()))
+    budget_range_distribution = _budget_range_distribution(
+        unique_tenders_with_budget)
 
     # PE Name analysis
     pe_analysis = {
@@ -182,63 +255,36 @@ def analyze_multi_tender_findings(df):
     }
 
     if 'PE Name' in df.columns:
-        for pe_name, group in df.groupby('PE Name'):
-            if pd.isna(pe_name) or str(pe_name).strip() == "":
-                continue
-
+        pe_groups = pd.DataFrame({
+            'is_open': is_open,
+            'is_closed': is_closed,
+            'is_red_flag': is_red_flag,
+            'budget': df['Total Budget']
+        }, index=df.index).groupby(df['PE Name']).agg(
+            total_findings=('is_open', 'size'),
+            open_findings=('is_open', 'sum'),
+            closed_findings=('is_closed', 'sum'),
+            total_budget=('budget', 'sum'),
+            red_flags=('is_red_flag', 'sum')
+        )
+
+        # PE tenders - tender numbers and details in finding order
+        pe_of_finding = df['PE Name'].to_numpy()
+        pe_tender_details = {}
+        for finding, tender in zip(named_tenders['finding'].tolist(),
+                                   _tender_records(named_tenders)):
+            pe_tender_details.setdefault(
+                pe_of_finding[finding], []).append(tender)
+
+        for pe_name, row in zip(pe_groups.index, pe_groups.itertuples(index=False)):
             pe_name_str = str(pe_name).strip()
+            if pe_name_str == "":
+                continue
 
-            # Calculate metrics for this PE
-            pe_findings = len(group)
-            pe_open = int((group['Status'].astype(
-                str).str.upper() == 'OPEN').sum())
-            pe_closed = int((group['Status'].astype(
-                str).str.upper() == 'CLOSED').sum())
-
-            # PE budget
-            pe_budget = 0.0
-            if 'Total Budget' in group.columns:
-                pe_budget_data = group[group['Total Budget'].notna()]
-                pe_budget = float(pe_budget_data['Total Budget'].sum()) if len(
-                    pe_budget_data) > 0 else 0.0
-
-            # PE tenders - collect tender numbers
-            pe_tenders = 0
-            pe_tender_numbers = []
-            pe_tender_details = []
-
-            for idx, row in group.iterrows():
-                tenders = parse_tender_details(row.get('Tenders', ''))
-                for tender in tenders:
-                    if tender['tender_number']:
-                        pe_tender_numbers.append(tender['tender_number'])
-                        pe_tender_details.append({
-                            'tender_number': tender['tender_number'],
-                            'budget': tender['budget'],
-                            'type': tender['type']
-                        })
-
-            pe_tenders = len(pe_tender_numbers)
-
-            # PE red flags
-            pe_red_flags = 0
-            if 'Red Flag' in group.columns:
-                pe_red_flag_col = group['Red Flag'].astype(
-                    str).str.upper().str.strip()
-                # Only count actual red flags, not "NOT RED FLAG"
-                pe_red_flags = int(
-                    ((pe_red_flag_col == 'RED FLAG') | (pe_red_flag_col == 'YES')).sum())
-
-            pe_analysis[pe_name_str] = {
-                'total_findings': pe_findings,
-                'open_findings': pe_open,
-                'closed_findings': pe_closed,
-                'total_budget': round(pe_budget, 2),
-                'total_tenders': pe_tenders,
-                'tender_numbers': pe_tender_numbers,
-                'tender_details': pe_tender_details,
-                'red_flags': pe_red_flags
-            }
+            pe_analysis[pe_name_str] = _pe_entry(
+                row.total_findings, row.open_findings, row.closed_findings,
+                row.total_budget, row.red_flags,
+                pe_tender_details.get(pe_name, []))
 
     # Checklist analysis (enhanced with more metrics)
     checklist_analysis = {
@@ -292,52 +338,159 @@ def analyze_multi_tender_findings(df):
             affected_pes = group['PE Name'].nunique(
             ) if 'PE Name' in group.columns else 0
 
-            # Completion rate
-            completion_rate = round(
-                (checklist_closed / checklist_findings * 100), 2) if checklist_findings > 0 else 0
-
-            checklist_analysis[checklist_str] = {
-                'total_findings': checklist_findings,
-                'open_findings': checklist_open,
-                'closed_findings': checklist_closed,
-                'completion_rate': completion_rate,
-                'total_budget': round(checklist_budget, 2),
-                'average_budget_per_finding': checklist_avg_budget,
-                'total_tenders': checklist_tenders,
-                'average_tenders_per_finding': checklist_avg_tenders,
-                'red_flags': checklist_red_flags,
-                'affected_entities': affected_pes,
-                'risk_level': 'High' if checklist_red_flags > 0 else ('Medium' if checklist_open > checklist_closed else 'Low')
-            }
+            checklist_analysis[checklist_str] = _checklist_entry(
+                checklist_findings, checklist_open, checklist_closed,
+                checklist_budget, checklist_avg_budget, checklist_tenders,
+                checklist_avg_tenders, checklist_red_flags, affected_pes)
 
     # Detailed findings with parsed tenders
+    detailed_findings = _detailed_findings(df, tender_table)
+
+    return _multi_tender_result(
+        total_findings=total_findings,
+        open_findings=open_findings,
+        closed_findings=closed_findings,
+        red_flags=red_flags,
+        total_budget=total_budget,
+        avg_budget_per_finding=avg_budget_per_finding,
+        total_tenders=total_tenders,
+        unique_tender_numbers=unique_tender_numbers,
+        avg_tenders_per_finding=avg_tenders_per_finding,
+        budget_range_distribution=budget_range_distribution,
+        pe_analysis=pe_analysis,
+        checklist_analysis=checklist_analysis,
+        detailed_findings=detailed_findings
+    )
+
+
+def _budget_range_distribution(unique_tenders_with_budget):
+    """Unique tenders per budget range, from {tender_number: budget}"""
+    budget_range_distribution = {
+        'description': 'Distribution of unique tenders across budget ranges, removing duplicates to get accurate budget allocation insights',
+        'ranges': {}
+    }
+
+    # Define budget ranges (in TZS)
+    ranges = [
+        ('0-50M', 0, 50_000_000),
+        ('50M-100M', 50_000_000, 100_000_000),
+        ('100M-200M', 100_000_000, 200_000_000),
+        ('200M-500M', 200_000_000, 500_000_000),
+        ('500M+', 500_000_000, float('inf'))
+    ]
+
+    for range_name, min_val, max_val in ranges:
+        count = sum(1 for budget in unique_tenders_with_budget.values()
+                    if min_val <= budget < max_val)
+        range_total_budget = sum(budget for budget in unique_tenders_with_budget.values()
+                                 if min_val <= budget < max_val)
+        budget_range_distribution['ranges'][range_name] = {
+            'count': count,
+            'total_budget': round(range_total_budget, 2),
+            'percentage': round((count / len(unique_tenders_with_budget) * 100), 2) if unique_tenders_with_budget else 0
+        }
+
+    return budget_range_distribution
+
+
+def _pe_entry(total_findings, open_findings, closed_findings, total_budget,
+              red_flags, tender_details):
+    """One PE of pe_analysis"""
+    return {
+        'total_findings': int(total_findings),
+        'open_findings': int(open_findings),
+        'closed_findings': int(closed_findings),
+        'total_budget': round(float(total_budget), 2),
+        'total_tenders': len(tender_details),
+        'tender_numbers': [tender['tender_number'] for tender in tender_details],
+        'tender_details': tender_details,
+        'red_flags': int(red_flags)
+    }
+
+
+def _checklist_entry(checklist_findings, checklist_open, checklist_closed,
+                     checklist_budget, checklist_avg_budget, checklist_tenders,
+                     checklist_avg_tenders, checklist_red_flags, affected_pes):
+    """One checklist of checklist_analysis"""
+    # Completion rate
+    completion_rate = round(
+        (checklist_closed / checklist_findings * 100), 2) if checklist_findings > 0 else 0
+
+    return {
+        'total_findings': checklist_findings,
+        'open_findings': checklist_open,
+        'closed_findings': checklist_closed,
+        'completion_rate': completion_rate,
+        'total_budget': round(checklist_budget, 2),
+        'average_budget_per_finding': checklist_avg_budget,
+        'total_tenders': checklist_tenders,
+        'average_tenders_per_finding': checklist_avg_tenders,
+        'red_flags': checklist_red_flags,
+        'affected_entities': affected_pes,
+        'risk_level': 'High' if checklist_red_flags > 0 else ('Medium' if checklist_open > checklist_closed else 'Low')
+    }
+
+
+def _detailed_findings(df, tender_table):
+    """
+    detailed_findings entries for the rows of a cleaned frame, given
+    parse_tender_column of its Tenders
+    """
+    finding_tenders = [[] for _ in range(len(df))]
+    for finding, tender in zip(tender_table['finding'].tolist(),
+                               _tender_records(tender_table)):
+        finding_tenders[finding].append(tender)
+
+    optional_columns = {
+        column: df[column].tolist() if column in df.columns else [None] * len(df)
+        for column in ['Finding Description', 'Recommendation', 'Created At']
+    }
+
     detailed_findings = []
-    for idx, row in df.iterrows():
+    for (pe_name, checklist, finding_title, finding_status, red_flag,
+         finding_budget, tender_count, tenders, description, recommendation,
+         created_at) in zip(
+            df['PE Name'].tolist(), df['Checklist Title'].tolist(),
+            df['Finding Title'].tolist(), df['Status'].tolist(),
+            df['Red Flag'].tolist(), df['Total Budget'].tolist(),
+            df['Tender Count'].tolist(), finding_tenders,
+            optional_columns['Finding Description'],
+            optional_columns['Recommendation'],
+            optional_columns['Created At']):
         finding = {
-            'pe_name': str(row.get('PE Name', 'Unknown')),
-            'checklist': str(row.get('Checklist Title', 'Unknown')),
-            'finding_title': str(row.get('Finding Title', 'N/A')),
-            'status': str(row.get('Status', 'Unknown')),
-            'red_flag': str(row.get('Red Flag', 'N/A')),
-            'total_budget': float(row.get('Total Budget', 0)) if pd.notna(row.get('Total Budget')) else 0.0,
-            'tender_count': int(row.get('Tender Count', 0)) if pd.notna(row.get('Tender Count')) else 0,
-            'tenders': parse_tender_details(row.get('Tenders', ''))
+            'pe_name': str(pe_name),
+            'checklist': str(checklist),
+            'finding_title': str(finding_title),
+            'status': str(finding_status),
+            'red_flag': str(red_flag),
+            'total_budget': float(finding_budget) if pd.notna(finding_budget) else 0.0,
+            'tender_count': int(tender_count) if pd.notna(tender_count) else 0,
+            'tenders': tenders
         }
 
         # Add optional fields if present
-        if 'Finding Description' in row and pd.notna(row.get('Finding Description')):
-            finding['description'] = str(row['Finding Description'])[:200] + '...' if len(
-                str(row['Finding Description'])) > 200 else str(row['Finding Description'])
+        if pd.notna(description):
+            finding['description'] = str(description)[:200] + '...' if len(
+                str(description)) > 200 else str(description)
 
-        if 'Recommendation' in row and pd.notna(row.get('Recommendation')):
-            finding['recommendation'] = str(row['Recommendation'])[
-                :200] + '...' if len(str(row['Recommendation'])) > 200 else str(row['Recommendation'])
+        if pd.notna(recommendation):
+            finding['recommendation'] = str(recommendation)[
+                :200] + '...' if len(str(recommendation)) > 200 else str(recommendation)
 
-        if 'Created At' in row and pd.notna(row.get('Created At')):
-            finding['created_at'] = str(row['Created At'])
+        if pd.notna(created_at):
+            finding['created_at'] = str(created_at)
 
         detailed_findings.append(finding)
 
+    return detailed_findings
+
+
+def _multi_tender_result(*, total_findings, open_findings, closed_findings,
+                         red_flags, total_budget, avg_budget_per_finding,
+                         total_tenders, unique_tender_numbers,
+                         avg_tenders_per_finding, budget_range_distribution,
+                         pe_analysis, checklist_analysis, detailed_findings):
+    """The analyze_multi_tender_findings result from its computed parts"""
     # Top entities by budget (with tender details)
     top_entities_by_budget = {
         'description': 'Top 5 procuring entities ranked by total budget allocation across all their findings, including detailed tender information',
@@ -395,7 +548,7 @@ def analyze_multi_tender_findings(df):
         },
         'unique_tenders': {
             'description': 'Number of unique tender numbers after removing duplicates across findings',
-            'value': len(unique_tender_numbers)
+            'value': int(unique_tender_numbers)
         },
         'average_tenders_per_finding': {
             'description': 'Average number of tenders associated with each finding',
@@ -0,0 +1,608 @@
+"""
+Workbook-to-response pipelines behind the upload endpoints
+
+Each function takes the raw bytes of an uploaded workbook and returns the
+endpoint's response body. They are plain module-level functions so they
+can run in a worker process (see app/services/worker_pool.py).
+"""
+import hashlib
+import io
+import pickle
+
+import pandas as pd
+
+from app.config import CHUNKED_ANALYSIS_ROWS
+from app.services.excel_reader import (
+    SheetChunks,
+    load_excel,
+    open_workbook,
+    probe_excel
+)
+from app.services.columnar_cache import columnar_cache
+from app.services.analysis_engine import ANALYSIS_SECTIONS, analyze_sheet
+from app.services.entity_summary_engine import analyze_entity_summary
+from app.services.multi_tender_engine import analyze_multi_tender_findings
+from app.services.multi_tender_aggregate import analyze_multi_tender_chunks
+from app.services.sheet_aggregate import analyze_sheet_chunks
+from app.services.json_encoder import dumps
+from app.services.format_detector import (
+    detect_format_from_columns,
+    get_format_columns,
+    get_format_info_from_columns
+)
+from app.services.data_validator import (
+    validate_excel_structure,
+    get_data_quality_report,
+    validate_data_ranges
+)
+from app.services.summary_engine import (
+    generate_summary,
+    generate_insights,
+    OVERALL_SUMMARY_KEYS,
+    generate_overall_summary,
+    generate_entity_summary,
+    generate_entity_insights,
+    generate_multi_tender_summary,
+    generate_multi_tender_insights
+)
+
+# Bump whenever an engine's output changes, so cached responses and sheet
+# results from the previous version are no longer served
+ENGINE_VERSION = "2.0.0"
+
+# Engines that can run over a sheet's row chunks (see CHUNKED_ANALYSIS_ROWS)
+CHUNKED_ENGINES = {
+    'detailed_findings': analyze_sheet_chunks,
+    'detailed_findings_multi_tender': analyze_multi_tender_chunks
+}
+
+# Rows per chunk of a chunked sheet. Aggregating a chunk takes a few dozen
+# pandas calls whose fixed cost dwarfs the rows' own in small chunks
+CHUNK_ROWS = 50_000
+
+
+# Parts of a sheet's /api/analyze result that can be asked for on their
+# own: analyze_sheet's breakdowns, the summary and the insights. The
+# headline metrics, and the overall summary built from them, always come.
+SECTIONS = list(ANALYSIS_SECTIONS) + ['summary', 'insights']
+
+# What else a section needs computed: the summary and insights text draw
+# on every breakdown
+SECTION_DEPENDENCIES = {
+    'summary': list(ANALYSIS_SECTIONS),
+    'insights': list(ANALYSIS_SECTIONS)
+}
+
+
+class SheetsNotStored(Exception):
+    """
+    Raised when a pipeline run without the workbook's contents (an upload
+    session, see app/services/uploads.py) needs sheets the columnar cache
+    does not hold
+    """
+
+
+def parse_sections(value):
+    """
+    The sections named in a comma-separated list, as a frozenset
+
+    None (no list at all) means every section and an empty list none, i.e.
+    the headline metrics only. Raises ValueError for names that are not in
+    SECTIONS.
+    """
+    if value is None:
+        return None
+
+    names = [name.strip() for name in value.split(',') if name.strip()]
+
+    unknown = [name for name in names if name not in SECTIONS]
+    if unknown:
+        raise ValueError(
+            f"Unknown sections: {', '.join(unknown)}. "
+            f"Available: {', '.join(SECTIONS)}")
+
+    return frozenset(names)
+
+
+def render_json(pipeline, *args):
+    """
+    Run a pipeline and return its response body as JSON bytes
+
+    Encodes with json_encoder.dumps, so NumPy and pandas values need no
+    conversion, and a worker can also take the (sizeable) encoding of a
+    large result off the event loop.
+    """
+    return dumps(pipeline(*args))
+
+
+def analyze_workbook(contents):
+    """Detect the format of every sheet and run the matching engine"""
+    results = {}
+
+    for sheet_name, probe, format_type, df in read_workbook(contents):
+        results[sheet_name] = analyze_loaded_sheet(
+            sheet_name, probe, format_type, df)
+
+    return combine_results(results)
+
+
+def analyze_changed_sheets(known_fingerprints, read, *args, sections=None):
+    """
+    Analyze the sheets whose content is not already cached
+
+    The sheets come from read(*args), i.e. read_workbook(contents) or
+    read_parsed_workbook(headers, sheets). sections is passed on to
+    analyze_loaded_sheet.
+
+    Returns [(sheet_name, fingerprint, result)] in workbook order. result is
+    the pickled analyze_loaded_sheet(...) entry, or None for sheets whose
+    fingerprint is in known_fingerprints (the caller has them). Sheets of
+    unknown format are cheap to describe and always come back fresh, with
+    fingerprint None.
+    """
+    return [
+        _analyze_if_changed(known_fingerprints, sheet_name, probe, format_type,
+                            df, sections)
+        for sheet_name, probe, format_type, df in read(*args)
+    ]
+
+
+def analyze_changed_sheet(known_fingerprints, contents, digest, headers,
+                          sheet_name, format_type, projection, sections=None):
+    """
+    analyze_changed_sheets for one sheet, loaded on its own
+
+    Lets the sheets of a workbook be parsed and analyzed on different
+    workers; headers, format_type and projection come from probe_workbook.
+    """
+    df = None
+    if sheet_name in chunked_sheets(headers, {sheet_name: format_type}):
+        df = SheetChunks(_required(contents), sheet_name, projection,
+                         chunk_size=CHUNK_ROWS)
+    elif format_type != 'unknown':
+        df = read_sheet(contents, digest, headers, sheet_name, projection)
+
+    return _analyze_if_changed(known_fingerprints, sheet_name,
+                               headers[sheet_name], format_type, df, sections)
+
+
+def _analyze_if_changed(known_fingerprints, sheet_name, probe, format_type, df,
+                        sections):
+    # Chunked sheets are not fingerprinted, which would mean reading them
+    # twice; like unknown sheets they are always analyzed
+    fingerprint = None
+    if df is not None and not isinstance(df, SheetChunks):
+        fingerprint = sheet_fingerprint(sheet_name, probe, format_type, df,
+                                        sections)
+        if fingerprint in known_fingerprints:
+            return sheet_name, fingerprint, None
+
+    result = analyze_loaded_sheet(sheet_name, probe, format_type, df, sections)
+    return sheet_name, fingerprint, pickle.dumps(result)
+
+
+def combine_pickled_results(entries):
+    """combine_results for [(sheet_name, pickled result)]"""
+    return combine_results({
+        sheet_name: pickle.loads(result) for sheet_name, result in entries
+    })
+
+
+def sheet_fingerprint(sheet_name, probe, format_type, df, sections=None):
+    """
+    Digest of everything a sheet's entry in the /api/analyze response
+    depends on: the parsed rows, its name (used in the summary text), the
+    full header row (reported in format_info), the detected format, the
+    requested sections and ENGINE_VERSION
+    """
+    digest = hashlib.sha256()
+    key = (ENGINE_VERSION, sheet_name, format_type, probe['columns'],
+           list(df.columns))
+    if sections is not None:
+        key += (sorted(sections),)
+    digest.update(repr(key).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def read_workbook(contents, digest=None):
+    """
+    Classify every sheet and load the ones an engine can analyze
+
+    Returns [(sheet_name, probe, format_type, df)] in workbook order, with
+    df None for sheets of unknown format and a SheetChunks for sheets
+    analyzed chunk by chunk (see chunked_sheets). With the upload's digest
+    the other sheets are read from, or saved to, the columnar cache; with
+    the digest alone (contents None) they must be there, or
+    SheetsNotStored is raised.
+    """
+    if digest is not None:
+        headers = columnar_cache.headers(digest)
+        if headers is not None:
+            formats, projections = classify_sheets(headers)
+            loaded = _loaded_projections(headers, formats, projections)
+            sheets = columnar_cache.sheets(digest, loaded)
+            if sheets is not None:
+                return _classified(headers, formats, sheets, contents, projections)
+
+    workbook = open_workbook(io.BytesIO(_required(contents)))
+
+    try:
+        # Classify every sheet from its header row first so cover sheets,
+        # pivot tabs and notes never have their rows parsed, and load only
+        # the columns the matching engine reads
+        headers = probe_excel(workbook)
+        formats, projections = classify_sheets(headers)
+        loaded = _loaded_projections(headers, formats, projections)
+        sheets = load_excel(workbook, streaming=True,
+                            sheet_names=list(loaded), columns=loaded)
+    finally:
+        workbook.close()
+
+    if digest is not None:
+        columnar_cache.store(digest, headers, sheets)
+
+    return _classified(headers, formats, sheets, contents, projections)
+
+
+def chunked_sheets(headers, formats):
+    """
+    Sheets to analyze chunk by chunk: those a CHUNKED_ENGINES engine
+    handles with more than CHUNKED_ANALYSIS_ROWS data rows
+
+    Sheets whose file gives no row count (no <dimension> record) are
+    chunked too, since they could be any size.
+    """
+    if not CHUNKED_ANALYSIS_ROWS:
+        return set()
+
+    def large(total_rows):
+        return total_rows is None or total_rows > CHUNKED_ANALYSIS_ROWS
+
+    return {
+        sheet_name for sheet_name, format_type in formats.items()
+        if format_type in CHUNKED_ENGINES
+        and large(headers[sheet_name]['total_rows'])
+    }
+
+
+def _loaded_projections(headers, formats, projections):
+    """The projections of the sheets that are loaded whole"""
+    chunked = chunked_sheets(headers, formats)
+    return {
+        sheet_name: columns for sheet_name, columns in projections.items()
+        if sheet_name not in chunked
+    }
+
+
+def probe_workbook(contents, digest=None):
+    """
+    (headers, formats, projections) of a workbook from its header rows
+
+    The first step of read_workbook, for callers that then load the
+    sheets one by one with read_sheet.
+    """
+    headers = columnar_cache.headers(digest) if digest is not None else None
+
+    if headers is None:
+        workbook = open_workbook(io.BytesIO(_required(contents)))
+        try:
+            headers = probe_excel(workbook)
+        finally:
+            workbook.close()
+
+    formats, projections = classify_sheets(headers)
+    return headers, formats, projections
+
+
+def read_sheet(contents, digest, headers, sheet_name, projection):
+    """
+    One sheet of a workbook with only the projection's columns (all of
+    them for None), from the columnar cache when possible
+    """
+    if digest is not None:
+        sheets = columnar_cache.sheets(digest, {sheet_name: projection})
+        if sheets is not None:
+            return sheets[sheet_name]
+
+    sheets = load_excel(io.BytesIO(_required(contents)), streaming=True,
+                        sheet_names=[sheet_name],
+                        columns={sheet_name: projection})
+
+    if digest is not None:
+        columnar_cache.store(digest, headers, sheets)
+
+    return sheets[sheet_name]
+
+
+def _classified(headers, formats, sheets, contents, projections):
+    chunked = chunked_sheets(headers, formats)
+    classified = []
+
+    for sheet_name, probe in headers.items():
+        df = sheets.get(sheet_name)
+        if sheet_name in chunked:
+            df = SheetChunks(_required(contents), sheet_name,
+                             projections[sheet_name], chunk_size=CHUNK_ROWS)
+        classified.append((sheet_name, probe, formats[sheet_name], df))
+
+    return classified
+
+
+def _required(contents):
+    """
+    The workbook's contents, for a step the columnar cache cannot serve
+    """
+    if contents is None:
+        raise SheetsNotStored("The workbook's sheets are not in the columnar cache")
+    return contents
+
+
+def read_parsed_workbook(headers, sheets):
+    """
+    read_workbook for a workbook already loaded by parse_workbook
+
+    Takes the engine's columns from the fully loaded sheets instead of
+    parsing the file again.
+    """
+    formats, projections = classify_sheets(headers)
+    loaded = []
+
+    for sheet_name, probe in headers.items():
+        df = None
+        if sheet_name in projections:
+            columns = projections[sheet_name]
+            df = sheets[sheet_name] if columns is None else sheets[sheet_name][columns]
+        loaded.append((sheet_name, probe, formats[sheet_name], df))
+
+    return loaded
+
+
+def parse_workbook(contents, digest=None):
+    """
+    Header probes and every sheet of a workbook, fully loaded
+
+    Returns (headers, sheets) as probe_excel and load_excel do. With the
+    upload's digest the sheets are read from, or saved to, the columnar
+    cache.
+    """
+    if digest is not None:
+        headers = columnar_cache.headers(digest)
+        if headers is not None:
+            sheets = columnar_cache.sheets(
+                digest, {sheet_name: None for sheet_name in headers})
+            if sheets is not None:
+                return headers, sheets
+
+    workbook = open_workbook(io.BytesIO(_required(contents)))
+
+    try:
+        headers = probe_excel(workbook)
+        sheets = load_excel(workbook, streaming=True)
+    finally:
+        workbook.close()
+
+    if digest is not None:
+        columnar_cache.store(digest, headers, sheets)
+
+    return headers, sheets
+
+
+def upload_workbook(contents, digest):
+    """
+    parse_workbook for an upload session: (headers, shapes, sheets)
+
+    shapes is {sheet_name: (rows, columns)}. sheets is None when the
+    columnar cache holds every sheet in full, so the session keeps only
+    the digest and workers read the sheets from disk.
+    """
+    headers, sheets = parse_workbook(contents, digest)
+    shapes = {sheet_name: df.shape for sheet_name, df in sheets.items()}
+
+    if columnar_cache.stored(digest, list(headers)):
+        sheets = None
+    return headers, shapes, sheets
+
+
+def classify_sheets(headers):
+    """
+    Detected format of every sheet and the columns its engine reads
+
+    Returns ({sheet_name: format_type}, {sheet_name: columns}); sheets of
+    unknown format have no projection.
+    """
+    formats = {
+        sheet_name: detect_format_from_columns(probe['columns'])
+        for sheet_name, probe in headers.items()
+    }
+    projections = {
+        sheet_name: get_format_columns(format_type, headers[sheet_name]['columns'])
+        for sheet_name, format_type in formats.items()
+        if format_type != 'unknown'
+    }
+    return formats, projections
+
+
+def analyze_loaded_sheet(sheet_name, probe, format_type, df, sections=None):
+    """
+    Run the engine for one sheet from read_workbook
+
+    sections (see parse_sections) limits the result to the headline
+    metrics and the named sections, computing only those and what they
+    depend on; None returns everything.
+    """
+    computed = None
+    if sections is not None:
+        computed = set(sections).union(
+            *(SECTION_DEPENDENCIES.get(section, []) for section in sections))
+
+    if isinstance(df, SheetChunks):
+        engine = CHUNKED_ENGINES[format_type]
+        analysis = engine(df, computed) if format_type == 'detailed_findings' \
+            else engine(df)
+        total_rows = df.rows
+    else:
+        analysis = None
+        total_rows = len(df) if df is not None else probe['total_rows']
+
+    # format_info describes the full sheet, not the projected columns
+    format_info = get_format_info_from_columns(probe['columns'], total_rows)
+
+    # Route to appropriate analysis engine
+    if format_type == 'detailed_findings':
+        if analysis is None:
+            analysis = analyze_sheet(df, computed)
+        summarize, gather_insights = generate_summary, generate_insights
+
+    elif format_type == 'detailed_findings_multi_tender':
+        if analysis is None:
+            analysis = analyze_multi_tender_findings(df)
+        summarize = generate_multi_tender_summary
+        gather_insights = generate_multi_tender_insights
+
+    elif format_type == 'entity_summary':
+        analysis = analyze_entity_summary(df)
+        summarize, gather_insights = generate_entity_summary, generate_entity_insights
+
+    else:
+        # Unknown format - provide basic info
+        analysis = {
+            "error": f"Unknown data format. Columns found: {', '.join(format_info['columns'][:10])}",
+            "format_info": format_info
+        }
+
+        def summarize(sheet_name, analysis):
+            return f"{sheet_name}: Unknown format - cannot analyze"
+        gather_insights = None
+
+    result = {
+        "data_format": format_type,
+        "format_info": format_info,
+        "analysis": analysis
+    }
+
+    if sections is None or 'summary' in sections:
+        result["summary"] = summarize(sheet_name, analysis)
+    if sections is None or 'insights' in sections:
+        result["insights"] = gather_insights(
+            analysis) if 'error' not in analysis else {}
+
+    if sections is not None:
+        # Breakdowns only computed for the summary or insights are left out
+        result["analysis"] = {
+            key: value for key, value in analysis.items()
+            if key not in ANALYSIS_SECTIONS or key in sections
+        }
+
+    return result
+
+
+def combine_results(results):
+    """The /api/analyze response from {sheet_name: analyze_loaded_sheet(...)}"""
+    return {
+        "status": "success",
+        "sheets_analyzed": len(results),
+        "overall_summary": overall_summary(results),
+        "results": results
+    }
+
+
+def overall_summary(results):
+    """
+    The overall_summary of an /api/analyze response, from every sheet's
+    analyze_loaded_sheet(...) or summary_entry(...)
+    """
+    detected_formats = {
+        sheet_name: result['format_info'] for sheet_name, result in results.items()
+    }
+
+    # Generate overall summary across all sheets
+    summary = generate_overall_summary(results)
+    summary['detected_formats'] = detected_formats
+    return summary
+
+
+def summary_entry(result):
+    """The part of an analyze_loaded_sheet(...) entry overall_summary reads"""
+    analysis = result.get('analysis', {})
+    return {
+        'format_info': result['format_info'],
+        'analysis': {key: analysis[key] for key in OVERALL_SUMMARY_KEYS
+                     if key in analysis}
+    }
+
+
+def render_sheet_line(sheet_name, result):
+    """
+    A pickled analyze_loaded_sheet(...) entry as an NDJSON line
+    {"sheet", "result"}, and its summary_entry
+    """
+    result = pickle.loads(result)
+    line = dumps({"sheet": sheet_name, "result": result}) + b"\n"
+    return line, summary_entry(result)
+
+
+def validate_workbook(contents, digest=None):
+    """Structure, data quality and range checks for every sheet"""
+    _, sheets = parse_workbook(contents, digest)
+    return validate_sheets(sheets)
+
+
+def validate_sheets(sheets):
+    """validate_workbook for {sheet_name: DataFrame}"""
+    validation_results = {}
+
+    for sheet_name, df in sheets.items():
+        # Validate structure
+        is_valid, errors = validate_excel_structure(df)
+
+        # Get data quality report
+        quality_report = get_data_quality_report(df)
+
+        # Validate data ranges
+        range_warnings = validate_data_ranges(df)
+
+        validation_results[sheet_name] = {
+            "is_valid": is_valid,
+            "errors": errors,
+            "quality_report": quality_report,
+            "range_warnings": range_warnings
+        }
+
+    # Overall validation status
+    all_valid = all(result["is_valid"]
+                    for result in validation_results.values())
+
+    return {
+        "status": "valid" if all_valid else "invalid",
+        "sheets_validated": len(validation_results),
+        "validation_results": validation_results
+    }
+
+
+def preview_workbook(contents, digest=None):
+    """First 10 rows of each sheet"""
+    _, sheets = parse_workbook(contents, digest)
+    return preview_sheets(sheets)
+
+
+def preview_sheets(sheets):
+    """preview_workbook for {sheet_name: DataFrame}"""
+    preview_data = {}
+
+    for sheet_name, df in sheets.items():
+        # Get first 10 rows
+        preview_df = df.head(10)
+
+        preview_data[sheet_name] = {
+            "total_rows": len(df),
+            "total_columns": len(df.columns),
+            "columns": list(df.columns),
+            "preview": preview_df.to_dict(orient='records')
+        }
+
+    return {
+        "status": "success",
+        "sheets": len(preview_data),
+        "data": preview_data
+    }
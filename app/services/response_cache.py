@@ -0,0 +1,338 @@
+"""
+Content-addressed caches of analysis results
+
+Reviewers re-open reports and dashboards refresh, so the same workbook is
+uploaded again and again. Two caches avoid repeating the work:
+
+- response_cache holds rendered responses keyed by the SHA-256 of the
+  upload (taken while it is read, see read_upload) plus ENGINE_VERSION, so
+  a repeat upload skips parsing and analysis entirely.
+- sheet_cache holds each sheet's analysis, summary and insights keyed by a
+  fingerprint of the sheet's parsed contents, so when one sheet of a
+  workbook is edited only that sheet is analyzed again.
+"""
+import asyncio
+import hashlib
+from collections import OrderedDict
+from functools import partial
+
+from app.config import PARALLEL_SHEET_ROWS, RESPONSE_CACHE_BYTES, SHEET_CACHE_BYTES
+from app.services.pipeline import (
+    ENGINE_VERSION,
+    analyze_changed_sheet,
+    analyze_changed_sheets,
+    combine_pickled_results,
+    overall_summary,
+    probe_workbook,
+    read_parsed_workbook,
+    read_workbook,
+    render_json,
+    render_sheet_line
+)
+from app.services.json_encoder import dumps
+from app.services.result_formats import render_as
+from app.services.response_shaping import render_shaped, store_paged_lists
+from app.services.uploads import run_with_contents
+from app.services.worker_pool import analysis_pool
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+async def read_upload(file):
+    """Read an UploadFile in chunks and return (contents, sha256 hex digest)"""
+    digest = hashlib.sha256()
+    chunks = []
+
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        chunks.append(chunk)
+
+    return b"".join(chunks), digest.hexdigest()
+
+
+def cache_key(endpoint, digest, sections=None, variants=()):
+    key = f"{endpoint}:{ENGINE_VERSION}:{digest}"
+    if sections is not None:
+        key += f":{','.join(sorted(sections))}"
+    for variant in variants:
+        if variant is not None:
+            key += f":{variant}"
+    return key
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized results (bytes) with a total size budget
+
+    The least recently used bodies are evicted once the budget is exceeded;
+    a body larger than the whole budget is never stored. max_bytes=0
+    disables the cache. Only meant for use from one thread (the event loop).
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+
+    def get(self, key):
+        body = self._items.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._items.move_to_end(key)
+        return body
+
+    def set(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+
+        self._items[key] = body
+        self.size += len(body)
+
+        while self.size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def count_miss(self):
+        """Record a miss for a lookup done elsewhere (e.g. in a worker)"""
+        self.misses += 1
+
+    def keys(self):
+        return frozenset(self._items)
+
+    def clear(self):
+        self._items.clear()
+        self.size = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "engine_version": ENGINE_VERSION,
+            "entries": len(self._items),
+            "size_bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+
+async def analyze_with_sheet_cache(read, *args, sections=None, shape=None,
+                                   result_format=None):
+    """
+    The /api/analyze response body for a workbook, reusing cached results
+    of unchanged sheets
+
+    The sheets come from read(*args) on a worker (read_workbook(contents),
+    or read_parsed_workbook for an upload session). They are still loaded,
+    since fingerprints are taken over the parsed rows, but only sheets
+    missing from sheet_cache are analyzed; the overall summary is then
+    rebuilt from cached and fresh results. sections limits each sheet's
+    result (see analyze_loaded_sheet), shape its large lists (see
+    response_shaping), and result_format encodes the body in something
+    other than JSON (see result_formats).
+    """
+    known = sheet_cache.keys()
+    bounded = True
+
+    while True:
+        entries = await analysis_pool.run(
+            partial(analyze_changed_sheets, sections=sections), known, read,
+            *args, bounded=bounded)
+
+        results = []
+        evicted = set()
+        for sheet_name, fingerprint, result in entries:
+            result = _take_result(fingerprint, result)
+            if result is None:
+                evicted.add(fingerprint)
+            results.append((sheet_name, result))
+
+        if not evicted:
+            break
+        # Other requests evicted a sheet while this one was being read;
+        # analyze again without counting on it
+        known = sheet_cache.keys() - evicted
+        bounded = False
+
+    return await _render(results, shape, result_format)
+
+
+async def analyze_sheets_in_parallel(contents, digest=None, sections=None,
+                                     shape=None, result_format=None,
+                                     min_rows=PARALLEL_SHEET_ROWS):
+    """
+    analyze_with_sheet_cache(read_workbook, contents, digest, ...) with
+    each sheet parsed and analyzed as a pool task of its own
+
+    Up to ANALYSIS_POOL_SIZE sheets run at once and the results are merged
+    back in workbook order, so the response is the same as the sequential
+    path's. Every task opens the workbook again, so this only pays off
+    with more than one worker and several sizeable sheets: workbooks with
+    fewer than two sheets of min_rows data rows (by the probe's row
+    counts) go the sequential way.
+    """
+    headers, formats, projections = await analysis_pool.run(
+        probe_workbook, contents, digest)
+    large = [sheet_name for sheet_name, probe in headers.items()
+             if (probe["total_rows"] or 0) >= min_rows]
+    if analysis_pool.size < 2 or len(large) < 2:
+        return await analyze_with_sheet_cache(
+            read_workbook, contents, digest, sections=sections, shape=shape,
+            result_format=result_format)
+
+    known = sheet_cache.keys()
+    # One request's sheets should not take up the whole wait queue
+    limit = asyncio.Semaphore(max(analysis_pool.size, 1))
+
+    async def analyze(sheet_name):
+        async with limit:
+            return await _analyze_sheet(
+                partial(analysis_pool.run, analyze_changed_sheet,
+                        bounded=False),
+                known, contents, digest, headers, sheet_name,
+                formats[sheet_name], projections.get(sheet_name), sections)
+
+    results = await asyncio.gather(*(analyze(name) for name in headers))
+
+    return await _render(results, shape, result_format)
+
+
+async def stream_analysis(contents=None, digest=None, upload=None,
+                          sections=None):
+    """
+    The /api/analyze response as NDJSON lines, sheet by sheet
+
+    Each sheet is analyzed as a pool task of its own, as in
+    analyze_sheets_in_parallel, and its {"sheet", "result"} line is
+    rendered as soon as it is done, so the first line does not wait for
+    the slowest sheet. Lines come in completion order; the last one is
+    {"status", "sheets_analyzed", "overall_summary"}, built from the few
+    metrics of each sheet it reads rather than from every result.
+
+    Takes the workbook's contents and digest, or an upload session.
+    Raises PoolBusyError before returning when the pool is full; the
+    async iterator it returns does the rest of the work.
+    """
+    if upload is None or upload.stored:
+        headers, formats, projections = await run_with_contents(
+            lambda contents: analysis_pool.run(probe_workbook, contents, digest),
+            contents, upload)
+
+        def sheet_task(sheet_name, known):
+            return run_with_contents(
+                lambda contents: _analyze_sheet(
+                    partial(analysis_pool.run, analyze_changed_sheet,
+                            bounded=False),
+                    known, contents, digest, headers, sheet_name,
+                    formats[sheet_name], projections.get(sheet_name), sections),
+                contents, upload)
+    else:
+        analysis_pool.admit()
+        headers = upload.headers
+
+        async def analyze_upload_sheet(known, sheet_name):
+            entries = await analysis_pool.run(
+                partial(analyze_changed_sheets, sections=sections), known,
+                read_parsed_workbook, {sheet_name: headers[sheet_name]},
+                {name: df for name, df in upload.sheets.items()
+                 if name == sheet_name},
+                bounded=False)
+            return entries[0]
+
+        def sheet_task(sheet_name, known):
+            return _analyze_sheet(analyze_upload_sheet, known, sheet_name)
+
+    known = sheet_cache.keys()
+    limit = asyncio.Semaphore(max(analysis_pool.size, 1))
+
+    async def analyze(sheet_name):
+        async with limit:
+            return await sheet_task(sheet_name, known)
+
+    async def lines():
+        # Only what overall_summary reads is kept, in workbook order
+        summaries = dict.fromkeys(headers)
+        tasks = [asyncio.ensure_future(analyze(name)) for name in headers]
+        try:
+            for task in asyncio.as_completed(tasks):
+                sheet_name, result = await task
+                line, summaries[sheet_name] = await analysis_pool.run(
+                    render_sheet_line, sheet_name, result, bounded=False)
+                yield line
+
+            yield dumps({
+                "status": "success",
+                "sheets_analyzed": len(summaries),
+                "overall_summary": overall_summary(summaries)
+            }) + b"\n"
+        finally:
+            # The client went away, or a sheet failed
+            for task in tasks:
+                task.cancel()
+
+    return lines()
+
+
+async def _analyze_sheet(run, known, *args):
+    """
+    (sheet_name, pickled result) of one sheet, where run(known, *args) is
+    an analyze_changed_sheet call for it on the pool
+    """
+    sheet_name, fingerprint, result = await run(known, *args)
+    result = _take_result(fingerprint, result)
+
+    if result is None:
+        # Evicted by another request since the lookup
+        sheet_name, fingerprint, result = await run(frozenset(), *args)
+        result = _take_result(fingerprint, result)
+
+    return sheet_name, result
+
+
+async def _render(results, shape, result_format):
+    """The response body for [(sheet_name, pickled result)]"""
+    if shape is None:
+        if result_format is None:
+            return await analysis_pool.run(
+                render_json, combine_pickled_results, results, bounded=False)
+        return await analysis_pool.run(
+            render_as, result_format, combine_pickled_results, results,
+            bounded=False)
+
+    body, lists = await analysis_pool.run(
+        render_shaped, shape, results, result_format, bounded=False)
+    store_paged_lists(shape.result_id, lists)
+    return body
+
+
+def _take_result(fingerprint, result):
+    """
+    The pickled result of an analyze_changed_sheet(s) entry, caching fresh
+    ones; None if the cached copy it refers to has been evicted
+    """
+    if result is None:
+        return sheet_cache.get(fingerprint)
+
+    if fingerprint is not None:
+        sheet_cache.count_miss()
+        sheet_cache.set(fingerprint, result)
+    return result
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_BYTES)
+sheet_cache = ResponseCache(SHEET_CACHE_BYTES)
@@ -0,0 +1,293 @@
+"""
+Field selection and paging of the large lists in /api/analyze responses
+
+A multi-tender sheet's analysis lists every finding with its tenders
+(detailed_findings.findings) and every PE's tenders (tender_numbers and
+tender_details in pe_analysis, which entity_analysis.data shares, and in
+top_entities_by_budget). On big sheets these lists are nearly all of the
+response. A ResponseShape trims them to what a client asks for:
+
+- finding_fields and tender_fields keep only the named keys of each
+  finding and each tender;
+- page_size moves the lists out of the response: it then carries the
+  first page of findings with a cursor for the next, and per-PE tender
+  links instead of tender lists. The lists are kept in paged_results for
+  the /api/results endpoints to serve a page at a time;
+- normalized emits every PE and every distinct tender once and refers to
+  them elsewhere (see normalize_multi_tender), so the response grows with
+  the number of entities and tenders rather than with their repetitions.
+
+Shaping runs on the worker that renders the response, so neither the
+dropped fields nor the paged-out lists are ever encoded.
+"""
+import base64
+import pickle
+import uuid
+from urllib.parse import quote
+
+from app.config import PAGED_RESULT_TTL, PAGED_RESULT_BYTES
+from app.services.pipeline import combine_pickled_results, render_json
+from app.services.result_formats import render_as
+from app.services.ttl_store import TTLStore
+
+FINDING_FIELDS = ['pe_name', 'checklist', 'finding_title', 'status', 'red_flag',
+                  'total_budget', 'tender_count', 'tenders', 'description',
+                  'recommendation', 'created_at']
+
+TENDER_FIELDS = ['tender_number', 'budget', 'type']
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class PagedListsTooLarge(Exception):
+    """The paged-out lists of a response do not fit in paged_results"""
+
+
+class ResponseShape:
+    """What a client asked to keep of the large lists of a response"""
+
+    def __init__(self, finding_fields=None, tender_fields=None, page_size=None,
+                 normalized=False):
+        # frozensets of FINDING_FIELDS / TENDER_FIELDS names, None for all
+        self.finding_fields = finding_fields
+        self.tender_fields = tender_fields
+        # Findings per page with the lists paged out, None to keep them inline
+        self.page_size = page_size
+        # Id the paged-out lists are kept under in paged_results
+        self.result_id = uuid.uuid4().hex if page_size is not None else None
+        # References instead of repeated PEs and tenders
+        self.normalized = normalized
+
+    @property
+    def paged(self):
+        return self.page_size is not None
+
+    def cache_variant(self):
+        """
+        Suffix for the response cache key, or None when nothing is left out
+
+        Paged responses refer to lists that expire on their own, so they
+        are not cached at all (see cacheable).
+        """
+        if (self.finding_fields is None and self.tender_fields is None
+                and not self.normalized):
+            return None
+        return (f"findings={','.join(sorted(self.finding_fields or FINDING_FIELDS))};"
+                f"tenders={','.join(sorted(self.tender_fields or TENDER_FIELDS))}"
+                + (";normalized" if self.normalized else ""))
+
+    @property
+    def cacheable(self):
+        return not self.paged
+
+    def finding(self, finding):
+        finding = _select(finding, self.finding_fields)
+        if 'tenders' in finding:
+            finding['tenders'] = self.tenders(finding['tenders'])
+        return finding
+
+    def tenders(self, tenders):
+        if self.tender_fields is None:
+            return tenders
+        return [_select(tender, self.tender_fields) for tender in tenders]
+
+
+def parse_fields(value, available, name):
+    """
+    Field names from a comma-separated list, as a frozenset (None for no
+    list); raises ValueError for names not in available
+    """
+    if value is None:
+        return None
+
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise ValueError(
+            f"Unknown {name}: {', '.join(unknown)}. Available: {', '.join(available)}")
+
+    return frozenset(fields)
+
+
+def render_shaped(shape, entries, result_format=None):
+    """
+    render_json(combine_pickled_results, entries) with the multi-tender
+    lists shaped, or render_as(result_format, ...) for other formats
+
+    Returns (body, lists) where lists is the pickled {sheet_name: paged-out
+    lists} for paged_results, or None when nothing was paged out.
+    """
+    def pipeline():
+        response = combine_pickled_results(entries)
+        lists.update(shape_response(response, shape))
+        return response
+
+    lists = {}
+    if result_format is None:
+        body = render_json(pipeline)
+    else:
+        body = render_as(result_format, pipeline)
+    return body, pickle.dumps(lists) if lists else None
+
+
+def shape_response(response, shape):
+    """
+    Apply shape to the multi-tender sheets of an /api/analyze response, in
+    place
+
+    Returns {sheet_name: {'findings': [...], 'pe_tenders': {pe: [...]}}}
+    with the lists taken out of paged sheets.
+    """
+    paged_out = {}
+
+    for sheet_name, result in response['results'].items():
+        analysis = result.get('analysis', {})
+        if (result.get('data_format') != 'detailed_findings_multi_tender'
+                or 'error' in analysis):
+            continue
+
+        findings = [shape.finding(finding)
+                    for finding in analysis['detailed_findings']['findings']]
+        pe_tenders = {}
+
+        # entity_analysis.data is the same dict as pe_analysis
+        pe_entries = [
+            (pe_name, entry) for pe_name, entry in analysis['pe_analysis'].items()
+            if isinstance(entry, dict)
+        ] + [
+            (entry['entity_name'], entry)
+            for entry in analysis['top_entities_by_budget']['entities']
+        ]
+        for pe_name, entry in pe_entries:
+            tenders = pe_tenders.setdefault(
+                pe_name, shape.tenders(entry['tender_details']))
+            if shape.paged:
+                del entry['tender_numbers']
+                del entry['tender_details']
+                entry['tenders_url'] = (f"{_sheet_url(shape.result_id, sheet_name)}"
+                                        f"/tenders?pe={quote(pe_name)}")
+            else:
+                entry['tender_details'] = tenders
+
+        if shape.paged:
+            page, next_cursor = page_of(findings, None, shape.page_size)
+            analysis['detailed_findings'] = {
+                'description': analysis['detailed_findings']['description'],
+                'total': len(findings),
+                'findings': page,
+                'next_cursor': next_cursor,
+                'findings_url': f"{_sheet_url(shape.result_id, sheet_name)}/findings"
+            }
+            paged_out[sheet_name] = {'findings': findings, 'pe_tenders': pe_tenders}
+        else:
+            analysis['detailed_findings']['findings'] = findings
+            if shape.normalized:
+                normalize_multi_tender(analysis)
+
+    return paged_out
+
+
+def normalize_multi_tender(analysis):
+    """
+    Rewrite a multi-tender analysis, in place, so each PE and each distinct
+    tender appears once
+
+    - tenders.items lists every distinct tender once; findings and
+      pe_analysis entries carry tender_ids (positions in it) instead of
+      their tenders and tender_details;
+    - pe_analysis keeps one entry per PE, keyed by PE name, which is the
+      PE's id; entity_analysis (the same data) and top_entities_by_budget
+      (copies of five entries) name PEs instead of repeating them.
+
+    tender_numbers is dropped where it only repeats the tender_details
+    numbers. analysis['layout'] is set to 'normalized'.
+    """
+    tenders = []
+    tender_index = {}
+
+    def tender_ids(records):
+        ids = []
+        for record in records:
+            key = tuple(record.items())
+            if key not in tender_index:
+                tender_index[key] = len(tenders)
+                tenders.append(record)
+            ids.append(tender_index[key])
+        return ids
+
+    for finding in analysis['detailed_findings']['findings']:
+        if 'tenders' in finding:
+            finding['tender_ids'] = tender_ids(finding.pop('tenders'))
+
+    for entry in analysis['pe_analysis'].values():
+        if isinstance(entry, dict) and 'tender_details' in entry:
+            details = entry.pop('tender_details')
+            if entry.get('tender_numbers') == [
+                    tender.get('tender_number') for tender in details]:
+                del entry['tender_numbers']
+            entry['tender_ids'] = tender_ids(details)
+
+    analysis['entity_analysis'] = {
+        'description': analysis['entity_analysis']['description'],
+        'data': 'pe_analysis'
+    }
+    top_entities = analysis['top_entities_by_budget']
+    top_entities['entities'] = [
+        entry['entity_name'] for entry in top_entities['entities']]
+
+    analysis['tenders'] = {
+        'description': 'Every distinct tender once; tender_ids elsewhere are positions in items',
+        'items': tenders
+    }
+    analysis['layout'] = 'normalized'
+
+
+def page_of(items, cursor, limit):
+    """(items of the page starting at cursor, cursor of the next page or None)"""
+    start = decode_cursor(cursor) if cursor else 0
+    stop = start + limit
+    return items[start:stop], encode_cursor(stop) if stop < len(items) else None
+
+
+def encode_cursor(offset):
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """The offset an encode_cursor cursor stands for; ValueError if invalid"""
+    try:
+        text = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        prefix, offset = text.split(':')
+        if prefix != 'o' or int(offset) < 0:
+            raise ValueError
+        return int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def store_paged_lists(result_id, lists):
+    """
+    Keep render_shaped's pickled lists for the /api/results endpoints;
+    raises PagedListsTooLarge when they are larger than PAGED_RESULT_BYTES
+    """
+    if lists is not None and not paged_results.set(
+            result_id, (pickle.loads(lists), len(lists))):
+        raise PagedListsTooLarge(
+            f"Paged-out lists of {len(lists)} bytes are larger than "
+            f"PAGED_RESULT_BYTES ({paged_results.max_bytes})")
+
+
+def _select(record, fields):
+    if fields is None:
+        return record
+    return {key: value for key, value in record.items() if key in fields}
+
+
+def _sheet_url(result_id, sheet_name):
+    return f"/api/results/{result_id}/sheets/{quote(sheet_name, safe='')}"
+
+
+# result_id -> ({sheet_name: paged-out lists}, pickled size)
+paged_results = TTLStore(PAGED_RESULT_TTL, max_bytes=PAGED_RESULT_BYTES,
+                         sizeof=lambda entry: entry[1])
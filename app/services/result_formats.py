@@ -0,0 +1,189 @@
+"""
+Binary encodings of /api/analyze results, chosen by the Accept header
+
+JSON stays the default. Clients that re-parse large analyses can ask for:
+
+- application/msgpack (needs msgpack): the same document as the JSON
+  response, in MessagePack;
+- application/vnd.apache.arrow.stream (needs pyarrow) with a table= query
+  parameter: one tabular section of every sheet as an Arrow IPC stream,
+  one row per finding, procuring entity or entity with a leading sheet
+  column. Nested lists such as a finding's tenders become list<struct>
+  columns. The schema metadata names the table.
+- application/x-ndjson: one JSON line per sheet as each is analyzed, then
+  the overall summary; streamed by response_cache.stream_analysis rather
+  than encoded here.
+
+Encoding runs on the worker that renders the response, as JSON does.
+"""
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from app.services.json_encoder import dumps, encodable
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+NDJSON = "application/x-ndjson"
+
+# Every format, and whether its library is installed
+_FORMATS = [
+    ("json", JSON, True),
+    ("msgpack", MSGPACK, msgpack is not None),
+    ("arrow", ARROW_STREAM, pa is not None),
+    ("ndjson", NDJSON, True)
+]
+
+# Media types by preference; JSON wins ties
+MEDIA_TYPES = {
+    name: media_type for name, media_type, available in _FORMATS if available
+}
+
+# Formats this server could send with another library installed
+UNAVAILABLE_MEDIA_TYPES = {
+    name: media_type for name, media_type, available in _FORMATS if not available
+}
+
+# Other names clients send for the same formats
+MEDIA_TYPE_ALIASES = {
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    "application/jsonlines": NDJSON,
+    "application/jsonl": NDJSON
+}
+
+
+class ResultFormat:
+    """How a response body is encoded: json, msgpack, or an arrow table"""
+
+    def __init__(self, name="json", table=None):
+        self.name = name
+        # Name of a TABLES section, for arrow
+        self.table = table
+
+    @property
+    def media_type(self):
+        return MEDIA_TYPES[self.name]
+
+    def cache_variant(self):
+        """Suffix for the response cache key, None for JSON"""
+        if self.name == "json":
+            return None
+        if self.name == "arrow":
+            return f"arrow={self.table}"
+        return self.name
+
+    def encode(self, response):
+        if self.name == "msgpack":
+            return msgpack.packb(response, default=encodable, use_bin_type=True)
+        if self.name == "arrow":
+            return arrow_stream(table_rows(response, self.table), self.table)
+        return dumps(response)
+
+
+def negotiate_format(accept):
+    """
+    The name of the format the Accept header prefers, or None when it
+    only asks for formats whose library is not installed
+
+    Headers that name none of the formats get JSON, as clients that send
+    text/plain or text/csv always have.
+    """
+    if not accept:
+        return "json"
+
+    weights = {}
+    for part in accept.split(","):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        media_type = MEDIA_TYPE_ALIASES.get(media_type.lower(), media_type.lower())
+        weight = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    weight = float(param[2:])
+                except ValueError:
+                    weight = 0.0
+        weights[media_type] = max(weight, weights.get(media_type, 0.0))
+
+    def weight(media_type):
+        for candidate in (media_type, media_type.split("/")[0] + "/*", "*/*"):
+            if candidate in weights:
+                return weights[candidate]
+        return 0.0
+
+    accepted = [name for name, media_type in MEDIA_TYPES.items()
+                if weight(media_type) > 0]
+    if not accepted:
+        if any(weights.get(media_type, 0.0) > 0
+               for media_type in UNAVAILABLE_MEDIA_TYPES.values()):
+            return None
+        return "json"
+    return max(accepted, key=lambda name: weight(MEDIA_TYPES[name]))
+
+
+def render_as(result_format, pipeline, *args):
+    """render_json(pipeline, *args) in result_format"""
+    return result_format.encode(pipeline(*args))
+
+
+def _multi_tender_findings(sheet_name, analysis):
+    for finding in analysis.get('detailed_findings', {}).get('findings', []):
+        yield {'sheet': sheet_name, **finding}
+
+
+def _multi_tender_pes(sheet_name, analysis):
+    for pe_name, entry in analysis.get('pe_analysis', {}).items():
+        if isinstance(entry, dict):
+            yield {'sheet': sheet_name, 'pe_name': pe_name, **entry}
+
+
+def _entities(sheet_name, analysis):
+    for entity_name, entry in analysis.get('detailed_entities', {}).items():
+        yield {'sheet': sheet_name, 'entity_name': entity_name, **entry}
+
+
+# table name -> (data format of the sheets it covers, rows of one sheet)
+TABLES = {
+    'detailed_findings': ('detailed_findings_multi_tender', _multi_tender_findings),
+    'pe_analysis': ('detailed_findings_multi_tender', _multi_tender_pes),
+    'detailed_entities': ('entity_summary', _entities)
+}
+
+
+def table_rows(response, table):
+    """The rows of a TABLES section across the sheets of an /api/analyze response"""
+    data_format, sheet_rows = TABLES[table]
+    rows = []
+    for sheet_name, result in response['results'].items():
+        analysis = result.get('analysis', {})
+        if result.get('data_format') == data_format and 'error' not in analysis:
+            rows.extend(sheet_rows(sheet_name, analysis))
+    return rows
+
+
+def arrow_stream(rows, table):
+    """rows (dicts) as an Arrow IPC stream of one record batch"""
+    # Rows may leave out optional keys, so the columns are the union of
+    # all of them in first-seen order
+    columns = {'sheet': None}
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+
+    if rows:
+        data = pa.table({column: [row.get(column) for row in rows]
+                         for column in columns})
+    else:
+        data = pa.table({'sheet': pa.array([], pa.string())})
+    data = data.replace_schema_metadata({'table': table})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, data.schema) as writer:
+        writer.write_table(data)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,839 @@
+"""
+Mergeable partial aggregates for the detailed findings analysis
+
+analyze_sheet needs the whole sheet in one frame. SheetAggregate holds
+everything it reports as counts, sums and per-group partials instead, so
+a sheet can be aggregated in row chunks and the chunk aggregates merged
+into the same result:
+
+    parts = [SheetAggregate.from_rows(chunk, offset), ...]   # per chunk
+    aggregate = SheetAggregate.combine(parts)                # in any order
+    analysis = aggregate.finalize()                          # == analyze_sheet
+
+Rows updated in place or deleted can be taken back out with replace(),
+which app/services/incremental.py uses to keep a sheet's analysis up to
+date as its findings change.
+
+Rankings that depend on row order (value_counts ties, the first PE
+Category of a PE, top budget items) keep the row position of each key's
+first occurrence, so chunks may be merged in any order.
+
+Float sums are added up chunk by chunk, so they can differ from
+analyze_sheet's in the last bit. That only shows when an average lands on
+a rounding tie (e.g. exactly 57.115), which can then come out 0.01 off.
+"""
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+from app.services.analysis_engine import (
+    COMPLIANCE_BANDS,
+    clean_numeric_series,
+    clean_percentage_series,
+    prepare_frame,
+    _finding_indicators,
+    _mean_or_zero
+)
+
+REQUIRED_COLUMNS = ["Compliance %", "Score Gap", "Status", "Checklist Title"]
+
+BUDGET_RANGES = ["< 10M", "10M - 50M", "50M - 100M", "> 100M"]
+
+# Columns reported as value counts: {column: number of keys kept}
+VALUE_COUNT_COLUMNS = {
+    "Audit Type": None,
+    "PE Category": None,
+    "Entity Name": 10,
+    "Checklist Title": 10
+}
+
+# Number of rows kept for budget_distribution's top_budget_items
+TOP_BUDGET_ITEMS = 5
+
+STATUSES = [("OPEN", "is_open"), ("CLOSED", "is_closed")]
+
+# Chunk aggregates analyze_sheet_chunks holds before merging them into one
+MERGE_BATCH = 16
+
+# Per-group breakdown sections and the group table each reports
+GROUP_SECTIONS = {
+    "pe_name_analysis": "pe",
+    "checklist_detailed_analysis": "checklist",
+    "entity_analysis": "entity"
+}
+
+
+class SheetAggregate:
+    """
+    Partial analyze_sheet state for a set of rows of one sheet
+
+    Build with from_rows(), combine with combine() or merge() and turn
+    into the analyze_sheet result with finalize(). Instances are plain pandas
+    objects and pickle cheaply, so they can be returned from workers.
+    """
+
+    def __init__(self, columns, totals, counts, groups, top_budget):
+        # Columns of the sheet, which decide the sections finalize() fills
+        self.columns = columns
+        # Named scalar sums and counts
+        self.totals = totals
+        # {name: DataFrame indexed by key with count and first position}
+        self.counts = counts
+        # {name: DataFrame indexed by group key with summed columns}
+        self.groups = groups
+        # Up to TOP_BUDGET_ITEMS candidate rows for top_budget_items
+        self.top_budget = top_budget
+
+    @classmethod
+    def from_rows(cls, df, offset=0, positions=None):
+        """
+        Aggregate rows of a detailed findings sheet
+
+        offset is the position of df's first row in the sheet, so merged
+        aggregates rank ties by the order rows appear in the sheet. Rows
+        that are not contiguous in the sheet pass their (ascending)
+        positions instead.
+        """
+        df = _clean(df)
+        prepared = prepare_frame(df)
+        indicators = _finding_indicators(prepared)
+        if positions is None:
+            positions = np.arange(offset, offset + len(df))
+        positions = pd.Series(np.asarray(positions), index=df.index)
+        columns = list(df.columns)
+
+        indicators["compliance_count"] = indicators["compliance"].notna()
+        indicators["budget_count"] = indicators["budget"].notna()
+
+        return cls(
+            columns,
+            _totals(prepared, indicators),
+            _counts(prepared, positions),
+            _groups(prepared, indicators, positions),
+            _top_budget(prepared, positions)
+        )
+
+    @classmethod
+    def combine(cls, aggregates):
+        """
+        Aggregate of the rows of all of aggregates (none is modified)
+
+        Each table is concatenated and grouped once, so merging many chunk
+        aggregates costs one pass over their tables rather than one per
+        chunk.
+        """
+        first = aggregates[0]
+        return cls(
+            first.columns,
+            reduce(_add, [aggregate.totals for aggregate in aggregates]),
+            {
+                name: _merge_counts([aggregate.counts[name] for aggregate in aggregates])
+                for name in first.counts
+            },
+            {
+                name: _merge_groups([aggregate.groups[name] for aggregate in aggregates])
+                for name in first.groups
+            },
+            _merge_top_budget([aggregate.top_budget for aggregate in aggregates])
+        )
+
+    def merge(self, other):
+        """Aggregate of the rows of both (neither is modified)"""
+        return SheetAggregate.combine([self, other])
+
+    def replace(self, old, new):
+        """
+        Aggregate with old's rows taken out and new's put in their place
+
+        old must aggregate rows of this one, and new the rows now at the
+        same positions (fewer of them for rows deleted), plus any rows
+        appended after the last one. The sums are taken
+        back exactly; what depends on row order cannot always be: when a
+        key's first row changes key, or top_budget_items loses a row with
+        no way of telling which row comes next, None is returned and the
+        aggregate has to be rebuilt from the rows.
+        """
+        counts = {}
+        for name, table in self.counts.items():
+            counts[name] = _replace_counts(table, old.counts[name], new.counts[name])
+            if counts[name] is None:
+                return None
+
+        groups = {}
+        for name, table in self.groups.items():
+            groups[name] = _replace_groups(table, old.groups[name], new.groups[name])
+            if groups[name] is None:
+                return None
+
+        top_budget = _replace_top_budget(self.top_budget, old.top_budget,
+                                         new.top_budget)
+        if top_budget is None:
+            return None
+
+        return SheetAggregate(
+            self.columns,
+            _add(_add(self.totals, -old.totals), new.totals),
+            counts,
+            groups,
+            top_budget
+        )
+
+    def finalize(self, sections=None):
+        """
+        The analyze_sheet result for the aggregated rows
+
+        sections limits the breakdowns as in analyze_sheet. An average that
+        lands on a rounding tie can differ from analyze_sheet's by 0.01.
+        """
+        totals = self.totals
+        columns = set(self.columns)
+
+        avg_compliance = _average(totals["compliance_sum"], totals["compliance_count"])
+
+        financial_analysis = {}
+        if "Estimated Budget" in columns and totals["budget_count"] > 0:
+            total_budget = totals["budget_sum"]
+            budget_at_risk = totals["budget_at_risk_sum"]
+            financial_analysis = {
+                "total_budget": round(float(total_budget), 2),
+                "average_budget": round(float(total_budget / totals["budget_count"]), 2),
+                "budget_at_risk": round(float(budget_at_risk), 2),
+                "budget_at_risk_percentage": round(
+                    (budget_at_risk / total_budget *
+                     100) if total_budget > 0 else 0,
+                    2
+                )
+            }
+
+        score_analysis = {}
+        if ("Expected Score" in columns and "Actual Score" in columns
+                and totals["score_count"] > 0):
+            total_expected = totals["expected_sum"]
+            total_actual = totals["actual_sum"]
+            score_analysis = {
+                "total_expected_score": round(float(total_expected), 2),
+                "total_actual_score": round(float(total_actual), 2),
+                "total_score_gap": round(float(totals["score_gap_sum"]), 2),
+                "score_achievement_rate": round(
+                    (total_actual / total_expected *
+                     100) if total_expected > 0 else 0,
+                    2
+                )
+            }
+
+        analysis = {
+            "total_records": int(totals["records"]),
+            "average_compliance": avg_compliance,
+            "open_findings": int(totals["open"]),
+            "closed_findings": int(totals["closed"]),
+            "high_risk_findings": int(totals["risk_high"]),
+            "medium_risk_findings": int(totals["risk_medium"]),
+            "low_risk_findings": int(totals["risk_low"]),
+            "red_flag_count": int(totals["red_flags"]),
+            "audit_type_breakdown": self._value_counts("Audit Type"),
+            "category_breakdown": self._value_counts("PE Category"),
+            "financial_analysis": financial_analysis,
+            "score_analysis": score_analysis,
+            "top_entities": self._value_counts("Entity Name"),
+            "compliance_distribution": {
+                band: int(totals[f"band_{band}"]) for band in reversed(COMPLIANCE_BANDS)
+            },
+            "checklist_breakdown": self._value_counts("Checklist Title")
+        }
+
+        # Advanced grouped analysis
+        breakdowns = {
+            "pe_name_analysis": self._pe_name_analysis,
+            "checklist_detailed_analysis": self._checklist_analysis,
+            "entity_analysis": self._entity_analysis,
+            "status_detailed_analysis": self._status_analysis,
+            "budget_distribution": self._budget_distribution
+        }
+        for section, breakdown in breakdowns.items():
+            if sections is None or section in sections:
+                analysis[section] = breakdown()
+
+        return analysis
+
+    def group_entries(self, section, keys):
+        """
+        {entry key: entry} of a GROUP_SECTIONS section for the groups keyed
+        by keys (an index of its group table's keys), with None for those
+        that no longer have rows
+
+        Lets a caller that keeps a finalized result bring it up to date
+        for the groups a change touched without rebuilding every entry.
+        """
+        name = GROUP_SECTIONS[section]
+        labels = _entity_labels(keys) if name == "entity" else keys
+        entries = dict.fromkeys(str(label).strip() for label in labels)
+
+        breakdown = {
+            "pe": self._pe_name_analysis,
+            "checklist": self._checklist_analysis,
+            "entity": self._entity_analysis
+        }[name]
+        entries.update(breakdown(keys))
+        return entries
+
+    def _group_table(self, name, keys):
+        """
+        Group table name, limited to keys when given and sorted as the
+        breakdowns list it
+        """
+        table = self.groups[name]
+        if name == "entity":
+            # Keys whose labels coincide are reported as one group
+            labels = _entity_labels(table.index)
+            if keys is not None:
+                rows = pd.Index(labels).isin(_entity_labels(keys))
+                table, labels = table[rows], labels[rows]
+            table = _relabeled(table, labels)
+        elif keys is not None:
+            table = table[table.index.isin(keys)]
+        return table.sort_index()
+
+    def _value_counts(self, column, name=None):
+        """{key: count} ordered like Series.value_counts()"""
+        if column not in self.columns:
+            return {}
+
+        counts = _ranked(self.counts[name or column])
+        limit = VALUE_COUNT_COLUMNS.get(column) if name is None else None
+        if limit is not None:
+            counts = counts.head(limit)
+        return {str(k): int(v) for k, v in counts.items()}
+
+    def _pe_name_analysis(self, keys=None):
+        if "PE Name" not in self.columns:
+            return {}
+
+        has_category = "PE Category" in self.columns
+        pe_analysis = {}
+
+        table = self._group_table("pe", keys)
+        averages = _averages(table)
+        for pe_name, row, average in zip(table.index, table.itertuples(index=False),
+                                         averages):
+            pe_name_str = str(pe_name).strip()
+            if pe_name_str == "":
+                continue
+
+            pe_analysis[pe_name_str] = {
+                "total_findings": int(row.size),
+                "open_findings": int(row.open),
+                "closed_findings": int(row.closed),
+                "average_compliance": _mean_or_zero(average),
+                "total_budget": round(float(row.budget_sum), 2),
+                "high_risk_findings": int(row.risk_high),
+                "red_flags": int(row.red_flags),
+                "pe_category": str(row.first_value) if has_category else "N/A"
+            }
+
+        return pe_analysis
+
+    def _checklist_analysis(self, keys=None):
+        has_audit_type = "Audit Type" in self.columns
+        checklist_analysis = {}
+
+        table = self._group_table("checklist", keys)
+        averages = _averages(table)
+        for checklist, row, average in zip(table.index, table.itertuples(index=False),
+                                           averages):
+            checklist_str = str(checklist).strip()
+            if checklist_str == "":
+                continue
+
+            checklist_analysis[checklist_str] = {
+                "total_findings": int(row.size),
+                "open_findings": int(row.open),
+                "closed_findings": int(row.closed),
+                "average_compliance": _mean_or_zero(average),
+                "total_score_gap": round(float(row.score_gap_sum), 2),
+                "audit_type": str(row.first_value) if has_audit_type else "N/A"
+            }
+
+        return checklist_analysis
+
+    def _entity_analysis(self, keys=None):
+        if "entity" not in self.groups:
+            return {}
+
+        entity_analysis = {}
+
+        table = self._group_table("entity", keys)
+        averages = _averages(table)
+        for key, row, average in zip(table.index, table.itertuples(index=False),
+                                     averages):
+            entity_key_str = str(key).strip()
+            if entity_key_str in ["", "nan", "nan (nan)"]:
+                continue
+
+            entity_analysis[entity_key_str] = {
+                "total_findings": int(row.size),
+                "open_findings": int(row.open),
+                "closed_findings": int(row.closed),
+                "average_compliance": _mean_or_zero(average),
+                "total_budget": round(float(row.budget_sum), 2),
+                "budget_at_risk": round(float(row.open_budget_sum), 2),
+                "high_risk": int(row.risk_high),
+                "medium_risk": int(row.risk_medium),
+                "low_risk": int(row.risk_low)
+            }
+
+        return entity_analysis
+
+    def _status_analysis(self):
+        totals = self.totals
+        status_analysis = {}
+
+        for status, flag in STATUSES:
+            prefix = f"{status.lower()}_"
+            count = int(totals[prefix + "count"])
+
+            if count == 0:
+                status_analysis[status] = {
+                    "count": 0,
+                    "average_compliance": 0.0,
+                    "total_budget": 0.0,
+                    "total_score_gap": 0.0,
+                    "high_risk_count": 0,
+                    "red_flag_count": 0
+                }
+                continue
+
+            status_analysis[status] = {
+                "count": count,
+                "average_compliance": _average(
+                    totals[prefix + "compliance_sum"],
+                    totals[prefix + "compliance_count"]),
+                "total_budget": round(float(totals[prefix + "budget_sum"]), 2),
+                "total_score_gap": round(float(totals[prefix + "score_gap_sum"]), 2),
+                "high_risk_count": int(totals[prefix + "risk_high"]),
+                "red_flag_count": int(totals[prefix + "red_flags"]),
+                "audit_type_distribution": self._value_counts(
+                    "Audit Type", name=f"{status} Audit Type")
+            }
+
+        return status_analysis
+
+    def _budget_distribution(self):
+        totals = self.totals
+        if "Estimated Budget" not in self.columns or totals["budget_count"] == 0:
+            return {}
+
+        total_budget = float(totals["budget_sum"])
+
+        # Categorical value_counts: category order, then stable by count
+        ranges = pd.Series(
+            [totals[f"range_{label}"] for label in BUDGET_RANGES],
+            index=BUDGET_RANGES
+        ).sort_values(ascending=False, kind="stable")
+        budget_range_analysis = {str(k): int(v) for k, v in ranges.items()}
+
+        top_budget_items = []
+        if "Entity Name" in self.columns:
+            for row in self.top_budget.itertuples(index=False):
+                budget = float(row.budget)
+                top_budget_items.append({
+                    "entity": str(row.entity),
+                    "budget": round(budget, 2),
+                    "status": str(row.status),
+                    "compliance": round(float(row.compliance), 2),
+                    "percentage_of_total": round((budget / total_budget * 100), 2)
+                })
+
+        budget_by_pe = {}
+        if "PE Name" in self.columns:
+            pe = self.groups["pe"]
+            pe_budget = pe.loc[pe["budget_count"] > 0, "budget_sum"].sort_index(
+            ).sort_values(ascending=False).head(10)
+            budget_by_pe = {str(k): round(float(v), 2)
+                            for k, v in pe_budget.items()}
+
+        return {
+            "total_budget": round(total_budget, 2),
+            "budget_range_distribution": budget_range_analysis,
+            "top_budget_items": top_budget_items,
+            "budget_by_pe": budget_by_pe
+        }
+
+
+def analyze_sheet_chunks(chunks, sections=None):
+    """
+    analyze_sheet(df, sections) for a sheet read as row chunks
+
+    Chunk aggregates are merged MERGE_BATCH at a time, so only one chunk,
+    a few chunk aggregates and the merged aggregate are held at once. The
+    result can differ from analyze_sheet's by 0.01 in an average that
+    lands on a rounding tie.
+    """
+    parts = []
+    offset = 0
+
+    for chunk in chunks:
+        if not parts:
+            for col in REQUIRED_COLUMNS:
+                if col not in chunk.columns:
+                    return {
+                        "error": f"Missing required column: {col}"
+                    }
+
+        parts.append(SheetAggregate.from_rows(chunk, offset))
+        offset += len(chunk)
+        if len(parts) >= MERGE_BATCH:
+            parts = [SheetAggregate.combine(parts)]
+
+    return SheetAggregate.combine(parts).finalize(sections=sections)
+
+
+def _clean(df):
+    """The numeric cleaning analyze_sheet applies before prepare_frame"""
+    df = df.copy()
+    df["Compliance %"] = clean_percentage_series(df["Compliance %"])
+    df["Score Gap"] = clean_numeric_series(df["Score Gap"])
+
+    for col in ["Expected Score", "Actual Score", "Estimated Budget"]:
+        if col in df.columns:
+            df[col] = clean_numeric_series(df[col])
+
+    return df
+
+
+def _totals(df, indicators):
+    risk_band = df["risk_band"]
+    budget = indicators["budget"]
+    has_budget = budget.notna()
+
+    totals = {
+        "records": len(df),
+        "compliance_count": indicators["compliance_count"].sum(),
+        "open": indicators["is_open"].sum(),
+        "closed": indicators["is_closed"].sum(),
+        "red_flags": indicators["is_red_flag"].sum(),
+        "risk_high": indicators["is_high_risk"].sum(),
+        "risk_medium": indicators["is_medium_risk"].sum(),
+        "risk_low": indicators["is_low_risk"].sum(),
+        "budget_count": has_budget.sum()
+    }
+    totals["compliance_sum"] = indicators["compliance"].sum()
+    totals["budget_sum"] = budget.sum()
+    totals["budget_at_risk_sum"] = budget[indicators["is_open"]].sum()
+
+    band_counts = df["compliance_band"].value_counts()
+    for band in COMPLIANCE_BANDS:
+        totals[f"band_{band}"] = band_counts[band]
+
+    if "Expected Score" in df.columns and "Actual Score" in df.columns:
+        scored = df["Expected Score"].notna() & df["Actual Score"].notna()
+        totals["score_count"] = scored.sum()
+        totals["expected_sum"] = df.loc[scored, "Expected Score"].sum()
+        totals["actual_sum"] = df.loc[scored, "Actual Score"].sum()
+        totals["score_gap_sum"] = df.loc[scored, "Score Gap"].sum()
+
+    if "Estimated Budget" in df.columns:
+        ranges = pd.cut(
+            budget[has_budget],
+            bins=[0, 10000000, 50000000, 100000000, float('inf')],
+            labels=BUDGET_RANGES
+        ).value_counts()
+        for label in BUDGET_RANGES:
+            totals[f"range_{label}"] = ranges[label]
+
+    for status, flag in STATUSES:
+        prefix = f"{status.lower()}_"
+        rows = indicators[flag]
+        totals[prefix + "count"] = rows.sum()
+        totals[prefix + "compliance_count"] = indicators.loc[rows, "compliance_count"].sum()
+        totals[prefix + "risk_high"] = (risk_band[rows] == "high").sum()
+        totals[prefix + "red_flags"] = indicators.loc[rows, "is_red_flag"].sum()
+        totals[prefix + "compliance_sum"] = indicators.loc[rows, "compliance"].sum()
+        totals[prefix + "budget_sum"] = budget[rows].sum()
+        totals[prefix + "score_gap_sum"] = indicators.loc[rows, "score_gap"].sum()
+
+    return pd.Series(totals, dtype="float64")
+
+
+def _counts(df, positions):
+    counts = {}
+
+    for column in VALUE_COUNT_COLUMNS:
+        if column in df.columns:
+            counts[column] = _key_counts(df[column], positions)
+
+    if "Audit Type" in df.columns:
+        for status, flag in STATUSES:
+            rows = df[flag]
+            counts[f"{status} Audit Type"] = _key_counts(
+                df.loc[rows, "Audit Type"], positions[rows])
+
+    return counts
+
+
+def _key_counts(keys, positions):
+    """Rows and first row position per non-null key"""
+    grouped = positions.groupby(keys, sort=False)
+    return pd.DataFrame({"count": grouped.size(), "first": grouped.min()})
+
+
+def _groups(df, indicators, positions):
+    sums = indicators.rename(columns={
+        "is_open": "open",
+        "is_closed": "closed",
+        "is_red_flag": "red_flags",
+        "is_high_risk": "risk_high",
+        "is_medium_risk": "risk_medium",
+        "is_low_risk": "risk_low",
+        "compliance": "compliance_sum",
+        "score_gap": "score_gap_sum",
+        "budget": "budget_sum",
+        "open_budget": "open_budget_sum"
+    })
+    sums["size"] = 1
+
+    groups = {}
+
+    if "PE Name" in df.columns:
+        groups["pe"] = _group_sums(
+            sums, df["PE Name"], positions,
+            ["size", "open", "closed", "compliance_sum", "compliance_count",
+             "budget_sum", "budget_count", "risk_high", "red_flags"],
+            df["PE Category"] if "PE Category" in df.columns else None)
+
+    groups["checklist"] = _group_sums(
+        sums, df["Checklist Title"], positions,
+        ["size", "open", "closed", "compliance_sum", "compliance_count",
+         "score_gap_sum"],
+        df["Audit Type"] if "Audit Type" in df.columns else None)
+
+    entity_parts = _entity_parts(df)
+    if entity_parts:
+        groups["entity"] = _group_sums(
+            sums, entity_parts, positions,
+            ["size", "open", "closed", "compliance_sum", "compliance_count",
+             "budget_sum", "open_budget_sum", "risk_high", "risk_medium",
+             "risk_low"])
+
+    return groups
+
+
+def _entity_key(df):
+    """The group key analyze_by_entity builds"""
+    has_entity_name = "Entity Name" in df.columns
+    has_entity_number = "Entity Number" in df.columns
+
+    if has_entity_name and has_entity_number:
+        return df["Entity Name"].astype(
+            str) + " (" + df["Entity Number"].astype(str) + ")"
+    if has_entity_name:
+        return df["Entity Name"].astype(str)
+    if has_entity_number:
+        return df["Entity Number"].astype(str)
+    return None
+
+
+def _entity_parts(df):
+    """
+    The parts _entity_key joins, with numeric columns left as numbers
+
+    A numeric column can be whole numbers (int64) in one chunk and have
+    blanks (float64) in another; loaded whole it is float64 throughout
+    and its keys read "5.0". Grouping on the numbers and labelling only
+    the merged groups (_entity_labels) gives the same keys either way.
+    """
+    parts = []
+    for col in ["Entity Name", "Entity Number"]:
+        if col in df.columns:
+            values = df[col]
+            if not is_numeric_dtype(values) or is_bool_dtype(values):
+                values = values.astype(str)
+            parts.append(values)
+    return parts
+
+
+def _entity_labels(index):
+    """_entity_key for the index of an entity group table"""
+    if isinstance(index, pd.MultiIndex):
+        name, number = (pd.Series(index.get_level_values(level)).astype(str)
+                        for level in range(2))
+        return (name + " (" + number + ")").to_numpy()
+    return pd.Series(index).astype(str).to_numpy()
+
+
+def _relabeled(table, labels):
+    """A group table re-keyed by labels, merging groups that share one"""
+    table = table.set_axis(labels)
+    if table.index.is_unique:
+        return table
+    return _merge_groups([table])
+
+
+def _group_sums(sums, keys, positions, columns, first_values=None):
+    """
+    Summed columns per group, plus the position (and first_values entry)
+    of each group's first row
+    """
+    values = sums[columns].astype("float64")
+    table = values.groupby(keys, sort=False).sum()
+    table["first"] = positions.groupby(keys, sort=False).min()
+
+    if first_values is not None:
+        # The value in the group's first row, even when it is blank
+        first_rows = ~keys.duplicated() & keys.notna()
+        table["first_value"] = pd.Series(
+            first_values[first_rows].to_numpy(dtype=object),
+            index=keys[first_rows].to_numpy(), dtype=object)
+
+    return table
+
+
+def _top_budget(df, positions):
+    columns = {
+        "position": positions,
+        "budget": df["Estimated Budget"] if "Estimated Budget" in df.columns else np.nan,
+        "entity": df["Entity Name"] if "Entity Name" in df.columns else None,
+        "status": df["Status"],
+        "compliance": df["Compliance %"]
+    }
+    rows = pd.DataFrame(columns, index=df.index)
+    rows = rows[rows["budget"].notna()]
+    return rows.nlargest(TOP_BUDGET_ITEMS, "budget").reset_index(drop=True)
+
+
+def _merge_counts(tables):
+    grouped = pd.concat(tables).groupby(level=0, sort=False)
+    return pd.DataFrame({"count": grouped["count"].sum(),
+                         "first": grouped["first"].min()})
+
+
+def _merge_groups(tables):
+    """
+    Group tables of several row sets merged: sums added, and the first-row
+    details of whichever table saw each group first
+    """
+    # Keys go in as columns: concatenating (entity) MultiIndexes is slow
+    names = tables[0].index.names
+    keys = [f"key_{level}" for level in range(len(names))]
+    combined = pd.concat([table.reset_index(names=keys) for table in tables],
+                         ignore_index=True).sort_values("first", kind="stable")
+    sums = [column for column in combined.columns
+            if column not in keys and column not in ("first", "first_value")]
+
+    merged = combined.groupby(keys, sort=False, dropna=False)[sums].sum()
+    merged.index.names = names
+
+    # Groups come out in order of first appearance, i.e. in the order of
+    # each key's row with the lowest first position
+    first_rows = combined[~combined.duplicated(keys)]
+    for column in ("first", "first_value"):
+        if column in combined.columns:
+            merged[column] = first_rows[column].to_numpy()
+
+    return merged
+
+
+def _merge_top_budget(tables):
+    combined = pd.concat(tables, ignore_index=True)
+    combined = combined.sort_values(["budget", "position"], ascending=[False, True],
+                                    kind="stable")
+    return combined.head(TOP_BUDGET_ITEMS).reset_index(drop=True)
+
+
+def _retracted_firsts(table, old, new, count):
+    """
+    Whether the keys whose first row old takes out still start at that
+    row in new; their first-row details are then left for new to fill in
+    """
+    stale = (old["first"] == table["first"]) & (count > 0)
+    if not stale.any():
+        return True, table
+
+    starts = new["first"].reindex(table.index[stale])
+    if not (starts == table.loc[stale, "first"]).all():
+        return False, table
+
+    table = table.assign(first=table["first"].astype("float64").mask(stale, np.inf))
+    return True, table
+
+
+def _touched(table, old, new):
+    """(rows of table for the keys old or new have, the other rows)"""
+    touched = table.index.isin(old.index.append(new.index))
+    return table[touched], table[~touched]
+
+
+def _replace_counts(table, old, new):
+    table, rest = _touched(table, old, new)
+    old = old.reindex(table.index)
+    count = table["count"] - old["count"].fillna(0)
+
+    valid, table = _retracted_firsts(table, old, new, count)
+    if not valid:
+        return None
+
+    table = table.assign(count=count)[count > 0]
+    return pd.concat([rest, _merge_counts([table, new])])
+
+
+def _replace_groups(table, old, new):
+    table, rest = _touched(table, old, new)
+    old = old.reindex(table.index)
+    size = table["size"] - old["size"].fillna(0)
+
+    valid, table = _retracted_firsts(table, old, new, size)
+    if not valid:
+        return None
+
+    sums = [column for column in table.columns
+            if column not in ("first", "first_value")]
+    remaining = _add(table[sums], -old[sums].fillna(0))
+    for column in ("first", "first_value"):
+        if column in table.columns:
+            remaining[column] = table[column]
+
+    return pd.concat([rest, _merge_groups([remaining[size > 0], new])])
+
+
+def _replace_top_budget(top_budget, old, new):
+    kept = top_budget[~top_budget["position"].isin(old["position"])]
+    merged = _merge_top_budget([kept, new])
+
+    # Rows below a full top_budget_items are unknown; the result only
+    # holds if whatever ranks last still ranks above all of them
+    if len(kept) < len(top_budget) and len(top_budget) == TOP_BUDGET_ITEMS:
+        last = top_budget.iloc[-1]
+        if len(merged) < TOP_BUDGET_ITEMS:
+            return None
+        tail = merged.iloc[-1]
+        if (-tail["budget"], tail["position"]) > (-last["budget"], last["position"]):
+            return None
+
+    return merged
+
+
+def _ranked(counts):
+    """
+    Counts ordered as Series.value_counts() orders them: by count,
+    descending, with ties in order of first occurrence
+    """
+    ordered = counts.sort_values("first", kind="stable")["count"]
+    return ordered.sort_values(ascending=False, kind="stable")
+
+
+def _add(left, right):
+    """left + right for aligned totals or group tables"""
+    left, right = left.align(right, fill_value=0)
+    return left + right
+
+
+def _average(total, count):
+    """An average_compliance from its sum and count"""
+    return _mean_or_zero(total / count if count > 0 else np.nan)
+
+
+def _averages(table):
+    """average_compliance of every group of a group table"""
+    counts = table["compliance_count"]
+    return (table["compliance_sum"] / counts).where(counts > 0).to_numpy()
@@ -730,6 +730,25 @@ def generate_insights(analysis):
     return insights
 
 
+# The analysis keys generate_overall_summary reads
+OVERALL_SUMMARY_KEYS = ['error', 'total_records', 'total_findings', 'open_findings',
+                        'high_risk_findings', 'red_flag_count', 'red_flags',
+                        'average_compliance']
+
+
+def _metric(analysis, *keys):
+    """
+    A count from an analysis, under the first of keys it has; multi-tender
+    results name some counts differently and wrap them as
+    {'description', 'value'}
+    """
+    for key in keys:
+        if key in analysis:
+            value = analysis[key]
+            return value.get('value', 0) if isinstance(value, dict) else value
+    return 0
+
+
 def generate_overall_summary(all_results):
     """Generate an overall summary across all sheets"""
     total_records = 0
@@ -741,10 +760,10 @@ def generate_overall_summary(all_results):
     for result in all_results.values():
         analysis = result.get('analysis', {})
         if 'error' not in analysis:
-            total_records += analysis.get('total_records', 0)
-            total_open += analysis.get('open_findings', 0)
-            total_high_risk += analysis.get('high_risk_findings', 0)
-            total_red_flags += analysis.get('red_flag_count', 0)
+            total_records += _metric(analysis, 'total_records', 'total_findings')
+            total_open += _metric(analysis, 'open_findings')
+            total_high_risk += _metric(analysis, 'high_risk_findings')
+            total_red_flags += _metric(analysis, 'red_flag_count', 'red_flags')
             if analysis.get('average_compliance', 0) > 0:
                 all_compliance.append(analysis['average_compliance'])
 
@@ -0,0 +1,88 @@
+"""
+In-process key/value store whose entries expire after a time-to-live
+"""
+import time
+from collections import OrderedDict
+
+
+class TTLStore:
+    """
+    Dict-like store where every entry expires `ttl` seconds after it was
+    last set
+
+    Expired entries are dropped lazily on access. With max_items, or with
+    max_bytes and a sizeof(value) function, the oldest entries are evicted
+    first once the store is full; a value larger than max_bytes on its own
+    is not stored. Only meant for use from one thread (the event loop).
+    """
+
+    def __init__(self, ttl, max_items=None, max_bytes=None, sizeof=None):
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("max_bytes needs a sizeof function")
+
+        self.ttl = ttl
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.size = 0
+        self._items = OrderedDict()
+
+    def get(self, key, default=None):
+        self.purge()
+        entry = self._items.get(key)
+        return entry[1] if entry is not None else default
+
+    def set(self, key, value):
+        """
+        Store value and restart its time-to-live
+
+        Returns False if the value is larger than max_bytes and was not
+        stored.
+        """
+        size = self.sizeof(value) if self.sizeof is not None else 0
+        self.delete(key)
+
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+
+        self._items[key] = (time.monotonic() + self.ttl, value, size)
+        self.size += size
+        self.purge()
+
+        while self._items and (
+                (self.max_items is not None and len(self._items) > self.max_items)
+                or (self.max_bytes is not None and self.size > self.max_bytes)):
+            self._pop_oldest()
+
+        return True
+
+    def delete(self, key):
+        entry = self._items.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+    def purge(self):
+        """Drop expired entries"""
+        now = time.monotonic()
+        # Entries are kept in set order, so expiry times are increasing
+        while self._items:
+            expires_at = next(iter(self._items.values()))[0]
+            if expires_at > now:
+                break
+            self._pop_oldest()
+
+    def values(self):
+        self.purge()
+        return [value for _, value, _ in self._items.values()]
+
+    def _pop_oldest(self):
+        _, (_, _, size) = self._items.popitem(last=False)
+        self.size -= size
+
+    def __contains__(self, key):
+        self.purge()
+        return key in self._items
+
+    def __len__(self):
+        self.purge()
+        return len(self._items)
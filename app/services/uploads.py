@@ -0,0 +1,87 @@
+"""
+Upload-once workbook sessions
+
+A client that validates, previews and then analyzes a workbook would
+otherwise upload it, and have it parsed, three times. /api/upload parses
+it once and keeps it in upload_store under a file id that the other
+endpoints accept instead of a file.
+
+When the columnar cache holds every parsed sheet, a session keeps only
+the file, and requests send workers nothing but the workbook's digest:
+they read the sheets from the Feather files (see run_with_contents).
+Otherwise the session keeps the parsed sheets, which go to the worker
+with every request.
+"""
+import uuid
+from datetime import datetime
+
+from app.config import UPLOAD_TTL, UPLOAD_STORE_BYTES
+from app.services.pipeline import SheetsNotStored
+from app.services.ttl_store import TTLStore
+
+
+class UploadedWorkbook:
+    """A parsed workbook kept for later requests"""
+
+    def __init__(self, filename, digest, headers, shapes, contents, sheets=None):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        # SHA-256 of the uploaded bytes, so analyses of the session share
+        # the response cache with direct uploads of the same file
+        self.digest = digest
+        self.headers = headers
+        self.shapes = shapes
+        # The file, to store the sheets again if the cache evicts them;
+        # not needed when the session holds the sheets themselves
+        self.contents = contents if sheets is None else None
+        self.sheets = sheets
+        self.created_at = datetime.now().isoformat()
+        if sheets is None:
+            self.size = len(contents)
+        else:
+            self.size = sum(int(df.memory_usage(deep=True).sum())
+                            for df in sheets.values())
+
+    @property
+    def stored(self):
+        """Whether workers read the sheets from the columnar cache"""
+        return self.sheets is None
+
+    def to_summary(self):
+        return {
+            "file_id": self.id,
+            "filename": self.filename,
+            "created_at": self.created_at,
+            "expires_in": UPLOAD_TTL,
+            "memory_bytes": self.size,
+            "sheets": {
+                sheet_name: {
+                    "total_rows": rows,
+                    "total_columns": columns
+                }
+                for sheet_name, (rows, columns) in self.shapes.items()
+            }
+        }
+
+
+async def run_with_contents(run, contents, upload):
+    """
+    await run(contents) for an uploaded file's contents, or for an upload
+    session whose sheets are in the columnar cache
+
+    Such a session is run without its contents first (None), so the
+    workers get only the digest. If the cache has evicted the sheets in
+    the meantime (SheetsNotStored), run is awaited again with the
+    session's file, which also stores them again.
+    """
+    if upload is None:
+        return await run(contents)
+
+    try:
+        return await run(None)
+    except SheetsNotStored:
+        return await run(upload.contents)
+
+
+upload_store = TTLStore(UPLOAD_TTL, max_bytes=UPLOAD_STORE_BYTES,
+                        sizeof=lambda upload: upload.size)
@@ -0,0 +1,98 @@
+"""
+Bounded worker pool for CPU-bound workbook parsing and analysis
+
+pandas and openpyxl hold the GIL for the whole parse, so running them
+inside an async endpoint stalls the event loop and every other request
+(including /health) until the upload is done. Endpoints hand the work to
+analysis_pool instead and await the result.
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.config import ANALYSIS_POOL_SIZE, ANALYSIS_QUEUE_DEPTH
+
+
+class PoolBusyError(Exception):
+    """Raised when every worker is busy and the wait queue is full"""
+
+
+class AnalysisPool:
+    """
+    Runs functions on a process pool with a bounded number of waiting jobs
+
+    At most `size` jobs run at once and at most `queue_depth` more wait for
+    a worker; run() raises PoolBusyError beyond that so callers can shed
+    load instead of queueing uploads without limit. With size=0 jobs run
+    on a thread pool (one thread) in the current process.
+    """
+
+    def __init__(self, size, queue_depth):
+        self.size = size
+        self.queue_depth = queue_depth
+        self.pending = 0
+        self._executor = None
+
+    @property
+    def capacity(self):
+        return max(self.size, 1) + self.queue_depth
+
+    async def run(self, func, *args, bounded=True):
+        """
+        Run func(*args) on a worker and return its result
+
+        bounded=False skips the queue-depth check, for steps of work that
+        was already admitted (e.g. the remaining sheets of a running job).
+        """
+        if bounded:
+            self.admit()
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool
+            # for the next job rather than failing every request after it
+            self._discard_executor()
+            raise
+        finally:
+            self.pending -= 1
+
+    def admit(self):
+        """
+        Raise PoolBusyError when a bounded run() would be turned away, for
+        work that goes on to run unbounded steps only
+        """
+        if self.pending >= self.capacity:
+            raise PoolBusyError(
+                f"{self.pending} analyses already running or queued")
+
+    def stats(self):
+        return {
+            "pool_size": self.size,
+            "queue_depth": self.queue_depth,
+            "pending": self.pending
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.size > 0:
+                self._executor = ProcessPoolExecutor(max_workers=self.size)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="analysis")
+        return self._executor
+
+    def _discard_executor(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+analysis_pool = AnalysisPool(ANALYSIS_POOL_SIZE, ANALYSIS_QUEUE_DEPTH)
@@ -0,0 +1,35 @@
+"""
+Peak memory of analyzing one large detailed findings sheet loaded whole
+against the same sheet analyzed chunk by chunk (CHUNKED_ANALYSIS_ROWS)
+
+Memory is traced with tracemalloc, which sees pandas/numpy buffers as
+well as Python objects. Run from the repository root:
+    python -m benchmarks.bench_chunked_memory [rows]
+"""
+import sys
+import time
+import tracemalloc
+
+from app.services import pipeline
+from testing_utils import make_detailed_findings_frame, workbook_bytes
+
+
+def measure(contents):
+    tracemalloc.start()
+    started = time.perf_counter()
+    pipeline.analyze_workbook(contents)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    contents = workbook_bytes({"Findings": make_detailed_findings_frame(rows)})
+    print(f"{rows} rows, {len(contents) / 1024 / 1024:.1f} MB")
+
+    for label, threshold in [("whole sheet", 0), ("chunked", 1)]:
+        pipeline.CHUNKED_ANALYSIS_ROWS = threshold
+        elapsed, peak = measure(contents)
+        print(f"{label:<12} {elapsed:7.2f}s  peak={peak / 1024 / 1024:7.1f} MB")
@@ -0,0 +1,58 @@
+"""
+Compare Series.apply(clean_percentage/clean_numeric) with the vectorized
+column cleaners
+
+Run from the repository root:
+    python -m benchmarks.bench_cleaners [rows]
+"""
+import random
+import sys
+import time
+
+import pandas as pd
+
+from app.services.analysis_engine import (
+    clean_percentage,
+    clean_numeric,
+    clean_percentage_series,
+    clean_numeric_series
+)
+
+
+def best_of(func, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def report(label, series, scalar, vectorized):
+    per_cell = best_of(lambda: series.apply(scalar))
+    column = best_of(lambda: vectorized(series))
+    print(f"{label:<28} apply={per_cell * 1000:8.1f} ms  "
+          f"vectorized={column * 1000:7.1f} ms  "
+          f"speedup={per_cell / column:5.1f}x")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(3)
+
+    percentages = pd.Series(
+        [f"{rng.uniform(0, 100):.2f}%" for _ in range(rows)], dtype=object)
+    budgets = pd.Series(
+        [f"{rng.randint(1, 900_000_000):,}" if i % 3 else rng.randint(1, 900_000_000)
+         for i in range(rows)], dtype=object)
+    dirty = pd.Series(
+        [rng.choice(["N/A", "", None, "12", " 7 ", "abc"]) for _ in range(rows)],
+        dtype=object)
+    scores = pd.Series([rng.randint(0, 10) for _ in range(rows)])
+
+    print(f"Rows: {rows:,}")
+    report("Compliance % ('75.50%')", percentages,
+           clean_percentage, clean_percentage_series)
+    report("Estimated Budget (mixed)", budgets, clean_numeric, clean_numeric_series)
+    report("Garbage-heavy column", dirty, clean_numeric, clean_numeric_series)
+    report("Integer Score Gap", scores, clean_numeric, clean_numeric_series)
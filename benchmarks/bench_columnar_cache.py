@@ -0,0 +1,57 @@
+"""
+Compare a cold xlsx parse with a warm load from the columnar (Feather)
+sheet cache, for the detailed findings format (the widest sheets)
+
+Needs pyarrow. Run from the repository root:
+    python -m benchmarks.bench_columnar_cache [rows]
+"""
+import hashlib
+import sys
+import tempfile
+import time
+
+from app.services.columnar_cache import ColumnarSheetCache, feather
+from app.services.pipeline import classify_sheets, parse_workbook, read_workbook
+from testing_utils import make_detailed_findings_frame, workbook_bytes
+
+
+def timed(label, func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<28} {best:8.3f}s")
+    return best, result
+
+
+if __name__ == "__main__":
+    if feather is None:
+        sys.exit("pyarrow is not installed")
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    contents = workbook_bytes(
+        {"Findings": make_detailed_findings_frame(rows)})
+    digest = hashlib.sha256(contents).hexdigest()
+    print(f"Workbook size: {len(contents) / 1024 / 1024:.1f} MB, rows={rows}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ColumnarSheetCache(directory, max_bytes=10 * 1024 ** 3)
+
+        cold_full, (headers, sheets) = timed(
+            "cold xlsx, all columns", parse_workbook, contents, repeat=1)
+        cold_projected, _ = timed(
+            "cold xlsx, engine columns", read_workbook, contents, repeat=1)
+        store, _ = timed("store as Feather", cache.store, digest, headers, sheets,
+                         repeat=1)
+
+        _, projections = classify_sheets(headers)
+        warm_full, loaded = timed(
+            "warm Feather, all columns", cache.sheets, digest,
+            {sheet_name: None for sheet_name in headers})
+        warm_projected, _ = timed(
+            "warm Feather, engine columns", cache.sheets, digest, projections)
+
+        assert loaded["Findings"].equals(sheets["Findings"])
+        print(f"All columns speedup:    {cold_full / warm_full:8.1f}x")
+        print(f"Engine columns speedup: {cold_projected / warm_projected:8.1f}x")
@@ -0,0 +1,87 @@
+"""
+Time the PE / checklist / entity breakdowns as the number of groups grows
+
+The per-group loop the breakdowns used to run is kept here as
+legacy_by_pe_name so both approaches can be compared on the same frame.
+
+Run from the repository root:
+    python -m benchmarks.bench_grouping [rows]
+"""
+import sys
+import time
+
+import pandas as pd
+
+from app.services.analysis_engine import (
+    analyze_by_pe_name,
+    analyze_by_checklist,
+    analyze_by_entity,
+    clean_percentage_series,
+    clean_numeric_series
+)
+from testing_utils import make_detailed_findings_frame
+
+
+def legacy_by_pe_name(df):
+    """analyze_by_pe_name as a Python loop over df.groupby()"""
+    pe_analysis = {}
+
+    for pe_name, group in df.groupby("PE Name"):
+        if pd.isna(pe_name) or str(pe_name).strip() == "":
+            continue
+
+        valid_compliance = group[group["Compliance %"].notna()]
+        budget_data = group[group["Estimated Budget"].notna()]
+
+        pe_analysis[str(pe_name).strip()] = {
+            "total_findings": len(group),
+            "open_findings": int(
+                (group["Status"].astype(str).str.upper() == "OPEN").sum()),
+            "closed_findings": int(
+                (group["Status"].astype(str).str.upper() == "CLOSED").sum()),
+            "average_compliance": round(float(valid_compliance["Compliance %"].mean()), 2)
+            if len(valid_compliance) > 0 else 0.0,
+            "total_budget": float(budget_data["Estimated Budget"].sum()),
+            "high_risk_findings": int(len(
+                group[(group["Compliance %"] < 50) & (group["Score Gap"] > 0)])),
+            "red_flags": int(
+                (group["Red Flag"].astype(str).str.upper() == "YES").sum()),
+            "pe_category": str(group["PE Category"].iloc[0])
+        }
+
+    return pe_analysis
+
+
+def best_of(func, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def cleaned_frame(rows, groups):
+    df = make_detailed_findings_frame(rows, groups=groups)
+    df["Compliance %"] = clean_percentage_series(df["Compliance %"])
+    df["Score Gap"] = clean_numeric_series(df["Score Gap"])
+    df["Estimated Budget"] = clean_numeric_series(df["Estimated Budget"])
+    return df
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    print(f"Rows: {rows:,}")
+
+    for groups in (10, 100, 1_000, 5_000):
+        df = cleaned_frame(rows, groups)
+
+        legacy = best_of(lambda: legacy_by_pe_name(df), repeat=1)
+        by_pe = best_of(lambda: analyze_by_pe_name(df))
+        by_checklist = best_of(lambda: analyze_by_checklist(df))
+        by_entity = best_of(lambda: analyze_by_entity(df))
+
+        print(f"groups={groups:>5}  legacy PE loop={legacy * 1000:8.1f} ms  "
+              f"PE={by_pe * 1000:6.1f} ms  checklist={by_checklist * 1000:6.1f} ms  "
+              f"entity={by_entity * 1000:6.1f} ms  "
+              f"PE speedup={legacy / by_pe:6.1f}x")
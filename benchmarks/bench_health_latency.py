@@ -0,0 +1,87 @@
+"""
+/health latency while large workbooks are being analyzed
+
+Sends concurrent /api/analyze uploads and pings /health every 50 ms in the
+same event loop, then repeats with the analysis run inline on the loop
+(what the endpoints did before the worker pool) for comparison.
+
+Run from the repository root:
+    python -m benchmarks.bench_health_latency [rows] [uploads]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+from app.main import app
+from app.services.pipeline import analyze_workbook
+from app.services.worker_pool import analysis_pool
+from testing_utils import make_detailed_findings_frame, workbook_bytes
+
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+async def ping_health(client, stop, latencies, sent):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/health")
+        latencies.append(time.perf_counter() - started)
+        sent.append(started)
+        await asyncio.sleep(0.05)
+
+
+async def measure(contents, uploads, inline):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test",
+                                 timeout=None) as client:
+        stop = asyncio.Event()
+        latencies = []
+        sent = []
+        pinger = asyncio.create_task(ping_health(client, stop, latencies, sent))
+        await asyncio.sleep(0.2)
+
+        async def upload():
+            if inline:
+                analyze_workbook(contents)
+                return 200
+            response = await client.post(
+                "/api/analyze", files={"file": ("bench.xlsx", contents, XLSX)})
+            return response.status_code
+
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(upload() for _ in range(uploads)))
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        sent.append(time.perf_counter())
+        await pinger
+
+    # A blocked event loop shows up as a long gap between pings rather
+    # than as a slow ping
+    sent.sort()
+    gaps = [later - earlier for earlier, later in zip(sent, sent[1:])]
+    return latencies, gaps, statuses, elapsed
+
+
+def report(label, latencies, gaps, statuses, elapsed):
+    print(f"{label:<20} uploads done in {elapsed:6.2f} s  statuses={sorted(set(statuses))}  "
+          f"/health p50={statistics.median(latencies) * 1000:6.1f} ms  "
+          f"max={max(latencies) * 1000:6.1f} ms  "
+          f"longest gap between pings={max(gaps) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    uploads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    contents = workbook_bytes(
+        {"Findings": make_detailed_findings_frame(rows, groups=200)})
+    print(f"Rows: {rows:,}  uploads: {uploads}  pool: {analysis_pool.stats()}")
+
+    try:
+        report("worker pool", *asyncio.run(measure(contents, uploads, inline=False)))
+        report("inline (event loop)", *asyncio.run(measure(contents, uploads, inline=True)))
+    finally:
+        analysis_pool.shutdown()
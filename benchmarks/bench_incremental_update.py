@@ -0,0 +1,79 @@
+"""
+Time incremental updates of a sheet (a few findings closed, a few
+appended) against re-running analyze_sheet over the whole sheet
+
+Each update is timed in this process and through a one-worker process
+pool, as /api/incremental/.../rows runs it, which adds shipping the
+changed rows and the aggregate to the worker and back.
+
+Run from the repository root:
+    python -m benchmarks.bench_incremental_update [rows]
+"""
+import asyncio
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.analysis_engine import analyze_sheet
+from app.services.incremental import IncrementalSession, IncrementalSheet
+from app.services.worker_pool import AnalysisPool
+from testing_utils import make_detailed_findings_frame
+
+
+def closing(df, step):
+    """
+    Ten OPEN findings from the middle of the sheet closed (closing a type's
+    first OPEN finding would rebuild the aggregate)
+    """
+    open_keys = df.loc[df["Status"] == "OPEN", "#"]
+    start = len(open_keys) // 2 + step * 10
+    return pd.DataFrame({"#": open_keys.iloc[start:start + 10], "Status": "CLOSED"})
+
+
+def appending(df, step):
+    """Ten new findings"""
+    new = df.iloc[step * 10:(step + 1) * 10].copy()
+    new["#"] = len(df) + step * 10 + np.arange(1, 11)
+    return new
+
+
+def best_of(func, repeat=3):
+    timings = []
+    for step in range(repeat):
+        started = time.perf_counter()
+        func(step)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+async def pooled(session, rows, repeat=3):
+    pool = AnalysisPool(1, 0)
+    try:
+        # Start the worker before timing
+        await pool.run(len, [])
+        timings = []
+        for step in range(repeat):
+            started = time.perf_counter()
+            await session.update("Findings", rows(step), (), pool.run)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df = make_detailed_findings_frame(rows)
+    sheet = IncrementalSheet(df, "#")
+    session = IncrementalSession("bench.xlsx", "#", {"Findings": sheet}, {})
+    print(f"{rows} rows, {len(sheet.aggregate.groups['entity'])} entity groups")
+
+    print(f"{'analyze_sheet':<28} {best_of(lambda step: analyze_sheet(df)):7.3f}s")
+    for label, changes in [("10 closed", closing), ("10 appended", appending)]:
+        in_process = best_of(lambda step: sheet.update(changes(df, step)))
+        # Later steps, so every update changes rows
+        in_pool = asyncio.run(pooled(session, lambda step: changes(df, 3 + step)))
+        print(f"{label + ', in process':<28} {in_process:7.3f}s")
+        print(f"{label + ', worker pool':<28} {in_pool:7.3f}s")
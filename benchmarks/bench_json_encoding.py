@@ -0,0 +1,58 @@
+"""
+Time encoding a large multi-tender /api/analyze response the way FastAPI
+encodes a returned dict (jsonable_encoder + JSONResponse) against
+json_encoder.dumps, with and without orjson
+
+Run from the repository root:
+    python -m benchmarks.bench_json_encoding [rows]
+"""
+import sys
+import time
+from unittest import mock
+
+from fastapi.encoders import jsonable_encoder  # type: ignore
+from fastapi.responses import JSONResponse  # type: ignore
+
+from app.services import json_encoder
+from app.services.pipeline import analyze_loaded_sheet, combine_results
+from app.services.format_detector import detect_format_from_columns
+from testing_utils import make_multi_tender_frame
+
+
+def fastapi_encode(response):
+    return JSONResponse(jsonable_encoder(response)).body
+
+
+def stdlib_encode(response):
+    with mock.patch.object(json_encoder, "orjson", None):
+        return json_encoder.dumps(response)
+
+
+def best_of(encode, response, repeat=5):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = encode(response)
+        times.append(time.perf_counter() - started)
+    return min(times), body
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    df = make_multi_tender_frame(rows, groups=max(rows // 10, 1))
+    probe = {"columns": list(df.columns), "total_rows": len(df)}
+    response = combine_results({
+        "Tenders": analyze_loaded_sheet(
+            "Tenders", probe, detect_format_from_columns(list(df.columns)), df)
+    })
+
+    baseline, body = best_of(fastapi_encode, response)
+    print(f"{rows} multi-tender rows, {len(body) / 1024 / 1024:.1f} MB of JSON")
+    print(f"{'jsonable_encoder':<18} {baseline * 1000:8.1f} ms")
+
+    encoders = [("dumps (stdlib)", stdlib_encode)]
+    if json_encoder.orjson is not None:
+        encoders.append(("dumps (orjson)", json_encoder.dumps))
+    for name, encode in encoders:
+        elapsed, _ = best_of(encode, response)
+        print(f"{name:<18} {elapsed * 1000:8.1f} ms  speedup={baseline / elapsed:5.1f}x")
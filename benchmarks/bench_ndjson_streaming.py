@@ -0,0 +1,70 @@
+"""
+Time to the first sheet's result, and to the whole response, for a
+workbook of one large and several small sheets: the JSON response of
+analyze_sheets_in_parallel against the NDJSON lines of stream_analysis
+
+Both run on the analysis pool with an empty sheet cache. The JSON body
+is ready only once every sheet is; the first NDJSON line comes with the
+first sheet done.
+
+Run from the repository root:
+    python -m benchmarks.bench_ndjson_streaming [large_rows] [small_sheets]
+"""
+import asyncio
+import sys
+import time
+
+from app.services.response_cache import (
+    analyze_sheets_in_parallel,
+    sheet_cache,
+    stream_analysis
+)
+from app.services.worker_pool import analysis_pool
+from testing_utils import (
+    make_detailed_findings_frame,
+    make_multi_tender_frame,
+    workbook_bytes
+)
+
+
+async def json_response(contents):
+    started = time.perf_counter()
+    body = await analyze_sheets_in_parallel(contents)
+    elapsed = time.perf_counter() - started
+    return elapsed, elapsed, len(body)
+
+
+async def ndjson_stream(contents):
+    started = time.perf_counter()
+    first = None
+    size = 0
+    async for line in await stream_analysis(contents):
+        if first is None:
+            first = time.perf_counter() - started
+        size += len(line)
+    return first, time.perf_counter() - started, size
+
+
+async def main(contents):
+    print(f"{'response':<8} {'first result':>13} {'complete':>10} {'size':>11}")
+    for name, measure in [("JSON", json_response), ("NDJSON", ndjson_stream)]:
+        sheet_cache.clear()
+        first, total, size = await measure(contents)
+        print(f"{name:<8} {first * 1000:10.0f} ms {total * 1000:7.0f} ms "
+              f"{size / 1024 / 1024:8.2f} MB")
+
+
+if __name__ == "__main__":
+    large_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    small_sheets = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    # The large sheet last, so that even with one worker the small ones
+    # are done first
+    sheets = {f"Findings {index + 1}": make_detailed_findings_frame(500, seed=index)
+              for index in range(small_sheets)}
+    sheets["Tenders"] = make_multi_tender_frame(large_rows, groups=max(large_rows // 10, 1))
+    contents = workbook_bytes(sheets)
+
+    try:
+        asyncio.run(main(contents))
+    finally:
+        analysis_pool.shutdown()
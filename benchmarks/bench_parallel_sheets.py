@@ -0,0 +1,64 @@
+"""
+Time a many-sheet workbook analyzed in one task against one task per
+sheet spread over a process pool
+
+Run from the repository root:
+    python -m benchmarks.bench_parallel_sheets [sheets] [rows_per_sheet]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.services.pipeline import (
+    analyze_changed_sheet,
+    analyze_changed_sheets,
+    probe_workbook,
+    read_workbook
+)
+from testing_utils import make_detailed_findings_frame, workbook_bytes
+
+
+def sequential(executor, contents):
+    return executor.submit(
+        analyze_changed_sheets, frozenset(), read_workbook, contents).result()
+
+
+def per_sheet(executor, contents):
+    headers, formats, projections = executor.submit(
+        probe_workbook, contents).result()
+    futures = [
+        executor.submit(analyze_changed_sheet, frozenset(), contents, None,
+                        headers, name, formats[name], projections.get(name))
+        for name in headers
+    ]
+    return [future.result() for future in futures]
+
+
+if __name__ == "__main__":
+    sheets = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    contents = workbook_bytes({
+        f"Zone {i + 1}": make_detailed_findings_frame(rows, seed=i)
+        for i in range(sheets)
+    })
+    print(f"{sheets} sheets x {rows} rows, "
+          f"{len(contents) / 1024 / 1024:.1f} MB, {os.cpu_count()} CPUs")
+
+    baseline = None
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Warm the workers up (imports) before timing
+            list(executor.map(abs, range(workers)))
+
+            if baseline is None:
+                started = time.perf_counter()
+                sequential(executor, contents)
+                baseline = time.perf_counter() - started
+                print(f"{'sequential':<12} {baseline:7.2f}s")
+
+            started = time.perf_counter()
+            per_sheet(executor, contents)
+            elapsed = time.perf_counter() - started
+            print(f"{workers:>2} workers   {elapsed:7.2f}s  "
+                  f"speedup={baseline / elapsed:5.2f}x")
@@ -0,0 +1,71 @@
+"""
+Encode and decode time and payload size of a large multi-tender
+/api/analyze result as JSON, MessagePack and Arrow IPC tables
+
+MessagePack carries the whole document, like JSON. Arrow carries one
+tabular section, so it is compared with that section alone as JSON.
+Formats whose library is missing are skipped.
+
+Run from the repository root:
+    python -m benchmarks.bench_result_formats [rows]
+"""
+import json
+import sys
+import time
+
+from app.services.format_detector import detect_format_from_columns
+from app.services.json_encoder import dumps
+from app.services.pipeline import analyze_loaded_sheet, combine_results
+from app.services.result_formats import ResultFormat, arrow_stream, msgpack, pa, table_rows
+from testing_utils import make_multi_tender_frame
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def best_of(func, *args, repeat=5):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def report(name, encode, decode, value):
+    encode_time, body = best_of(encode, value)
+    decode_time, _ = best_of(decode, body)
+    print(f"{name:<34} {len(body) / 1024 / 1024:8.2f} MB "
+          f"{encode_time * 1000:9.2f} ms {decode_time * 1000:9.2f} ms")
+
+
+def read_arrow(body):
+    return pa.ipc.open_stream(body).read_all()
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    df = make_multi_tender_frame(rows, groups=max(rows // 10, 1))
+    probe = {"columns": list(df.columns), "total_rows": len(df)}
+    response = combine_results({
+        "Tenders": analyze_loaded_sheet(
+            "Tenders", probe, detect_format_from_columns(list(df.columns)), df)
+    })
+
+    print(f"{rows} multi-tender rows")
+    print(f"{'format':<34} {'size':>11} {'encode':>12} {'decode':>12}")
+
+    report("JSON (json.loads)", dumps, json.loads, response)
+    if orjson is not None:
+        report("JSON (orjson.loads)", dumps, orjson.loads, response)
+    if msgpack is not None:
+        report("MessagePack", ResultFormat("msgpack").encode, msgpack.unpackb, response)
+
+    for table in ("detailed_findings", "pe_analysis"):
+        section = table_rows(response, table)
+        report(f"{table} JSON (json.loads)", dumps, json.loads, section)
+        if pa is not None:
+            report(f"{table} Arrow IPC", lambda rows: arrow_stream(rows, table),
+                   read_arrow, section)
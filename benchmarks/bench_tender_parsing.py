@@ -0,0 +1,45 @@
+"""
+Compare per-cell parse_tender_details with the column-level
+parse_tender_column
+
+Run from the repository root:
+    python -m benchmarks.bench_tender_parsing [rows]
+"""
+import sys
+import time
+
+from app.services.multi_tender_engine import (
+    parse_tender_details,
+    parse_tender_column
+)
+from testing_utils import make_tender_column
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def report(label, tenders):
+    per_row, per_row_time = timed(
+        lambda: [parse_tender_details(value) for value in tenders])
+    table, column_time = timed(lambda: parse_tender_column(tenders))
+
+    expected = [tender['tender_number'] for parsed in per_row for tender in parsed]
+    assert table['tender_number'].tolist() == expected
+
+    rows = len(tenders)
+    print(f"{label:<34} tenders={len(expected):>9,}  "
+          f"per row={rows / per_row_time:9,.0f} rows/s  "
+          f"column={rows / column_time:9,.0f} rows/s  "
+          f"speedup={per_row_time / column_time:5.1f}x")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"Rows: {rows:,}")
+
+    report("every tender distinct", make_tender_column(rows))
+    report("20k shared tenders", make_tender_column(rows, pool=20_000))
+    report("2k shared tenders", make_tender_column(rows, pool=2_000))
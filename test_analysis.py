@@ -86,6 +86,32 @@ if result.get('financial_analysis'):
     print(
         f"  ✓ Risk %: {result['financial_analysis']['budget_at_risk_percentage']}%")
 
+print("\n🔍 Infinite compliance...")
+# "inf" parses as an infinite compliance, which is excellent and low risk
+inf_df = pd.concat([df] * 3, ignore_index=True)
+inf_df["Compliance %"] = ["inf", "95.00%", "40.00%"]
+inf_result = analyze_sheet(inf_df)
+assert inf_result["compliance_distribution"] == {
+    "excellent": 2, "good": 0, "fair": 0, "poor": 1}
+assert inf_result["low_risk_findings"] == 2
+assert inf_result["high_risk_findings"] == 1
+entity = inf_result["entity_analysis"][
+    "Supply of office furniture at BOT Mtwara Branch (TR152/005/2024/2025/G/06)"]
+assert (entity["low_risk"], entity["high_risk"]) == (2, 1)
+print("  ✓ Counted as excellent and low risk")
+
+print("\n🔍 Group averages on a rounding tie...")
+# The mean of these lands on 28.975; summed pairwise like Series.mean()
+# it rounds to 28.97, while groupby().mean()'s Kahan sum rounds to 28.98
+tie_df = pd.concat([df] * 4, ignore_index=True)
+tie_df["Compliance %"] = [78.44, 15.32, 1.34, 20.8]
+tie_result = analyze_sheet(tie_df)
+assert tie_result["average_compliance"] == 28.97
+for section in ["pe_name_analysis", "checklist_detailed_analysis", "entity_analysis"]:
+    (group,) = tie_result[section].values()
+    assert group["average_compliance"] == 28.97, (section, group)
+print("  ✓ Rounded like the per-group Series.mean()")
+
 print("\n" + "=" * 80)
 print("✅ ALL TESTS PASSED! The analysis engine is working correctly.")
 print("=" * 80)
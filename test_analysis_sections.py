@@ -0,0 +1,112 @@
+"""
+Test for section-selective analysis
+/api/analyze?sections=... → headline metrics plus only the requested sections, the same as in the full response
+"""
+import random
+import time
+import pandas as pd
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.analysis_engine import ANALYSIS_SECTIONS, analyze_sheet
+from app.services.response_cache import response_cache, sheet_cache
+from app.services.sheet_aggregate import analyze_sheet_chunks
+from testing_utils import make_detailed_findings_frame, workbook_bytes
+
+print("=" * 80)
+print("ANALYSIS SECTIONS TEST")
+print("=" * 80)
+
+findings = make_detailed_findings_frame(3000, groups=300)
+full = analyze_sheet(findings)
+headline = [key for key in full if key not in ANALYSIS_SECTIONS]
+
+print("\n⏱️  analyze_sheet by sections:")
+for sections in [None, {"pe_name_analysis"}, set()]:
+    started = time.perf_counter()
+    result = analyze_sheet(findings, sections)
+    elapsed = time.perf_counter() - started
+    label = ','.join(sorted(sections)) if sections is not None else 'all'
+    print(f"  {label or 'none':<24} "
+          f"{elapsed * 1000:7.1f} ms  {len(result)} keys")
+    expected = {key: value for key, value in full.items()
+                if sections is None or key in headline or key in sections}
+    assert result == expected
+
+# The chunked path leaves out the same breakdowns
+chunks = [findings.iloc[start:start + 700] for start in range(0, len(findings), 700)]
+assert list(analyze_sheet_chunks(chunks, {"budget_distribution"})) == \
+    headline + ["budget_distribution"]
+
+contents = workbook_bytes({
+    "Findings": findings.head(400),
+    "Cover": pd.DataFrame({"Notes": ["Section-selective analysis"]})
+})
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+files = {"file": ("sections.xlsx", contents, XLSX)}
+
+
+def without_verdict(summary):
+    # The compliance verdict sentence is picked at random on the worker,
+    # which the test's random.seed does not reach
+    lines = summary.split("\n")
+    return lines[:4] + lines[5:]
+
+
+def analyze(client, sections=None):
+    response_cache.clear()
+    sheet_cache.clear()
+    random.seed(0)
+    params = {"sections": sections} if sections is not None else {}
+    return client.post("/api/analyze", files=files, params=params)
+
+
+with TestClient(app) as client:
+    everything = analyze(client).json()
+
+    print("\n🚀 /api/analyze?sections=...")
+    for sections in ["", "entity_analysis", "summary", "insights,status_detailed_analysis"]:
+        response = analyze(client, sections)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        requested = [name for name in sections.split(",") if name]
+
+        for sheet_name, result in body["results"].items():
+            full_result = everything["results"][sheet_name]
+            print(f"  {sections or '(none)':<38} {sheet_name}: {list(result)}")
+
+            # Summary text and insights draw on breakdowns that are not
+            # returned, and come out as in the full response
+            for part in ("summary", "insights"):
+                if part not in requested:
+                    assert part not in result
+                elif part == "summary" and isinstance(result[part], str):
+                    assert without_verdict(result[part]) == \
+                        without_verdict(full_result[part]), sections
+                else:
+                    assert result[part] == full_result[part], (sections, part)
+
+            if result["data_format"] == "detailed_findings":
+                assert result["analysis"] == {
+                    key: value for key, value in full_result["analysis"].items()
+                    if key in headline or key in requested
+                }
+            else:
+                assert result["analysis"] == full_result["analysis"]
+
+        assert body["overall_summary"] == everything["overall_summary"]
+
+    # A repeat is served from the cache, other sections are not
+    response_cache.clear()
+    first = client.post("/api/analyze", files=files, params={"sections": "summary"})
+    repeat = client.post("/api/analyze", files=files, params={"sections": " summary, "})
+    other = client.post("/api/analyze", files=files, params={"sections": "insights"})
+    assert first.headers["X-Cache"] == "MISS" and repeat.headers["X-Cache"] == "HIT"
+    assert other.headers["X-Cache"] == "MISS"
+
+    response = client.post("/api/analyze", files=files, params={"sections": "summary,kpis"})
+    print(f"\n⚠️  Unknown section: {response.status_code} {response.json()['detail']}")
+    assert response.status_code == 400
+
+print("\n" + "=" * 80)
+print("✅ ANALYSIS SECTIONS TEST PASSED")
+print("=" * 80)
@@ -0,0 +1,52 @@
+"""
+Test script for the vectorized column cleaners
+Checks they agree with clean_percentage/clean_numeric cell by cell
+"""
+import datetime
+import numpy as np
+import pandas as pd
+from app.services.analysis_engine import (
+    clean_percentage,
+    clean_numeric,
+    clean_percentage_series,
+    clean_numeric_series
+)
+from testing_utils import same_number
+
+print("=" * 80)
+print("TESTING VECTORIZED CLEANERS")
+print("=" * 80)
+
+# Values seen in uploaded workbooks plus garbage
+mixed_values = [
+    "75.5%", " 80 % ", "0.00%", "1,200", " 3,400.50 ", "1_000", "N/A", "",
+    "  ", "abc", "nan", "inf", "-12", None, np.nan, 42, 7.25, True,
+    datetime.datetime(2025, 1, 1), "12%%", "5,5"
+]
+
+columns = {
+    "mixed object": pd.Series(mixed_values, dtype=object),
+    "strings": pd.Series(["10%", "20", None, "x", " 30 % "]),
+    "integers": pd.Series([1, 2, 3]),
+    "floats": pd.Series([1.5, np.nan, 3.0]),
+    "all missing": pd.Series([None, None], dtype=object),
+}
+
+
+for name, series in columns.items():
+    for scalar, vectorized in [(clean_percentage, clean_percentage_series),
+                               (clean_numeric, clean_numeric_series)]:
+        expected = [scalar(value) for value in series]
+        actual = vectorized(series)
+
+        assert actual.dtype == "float64"
+        assert list(actual.index) == list(series.index)
+        mismatches = [(value, e, a) for value, e, a in zip(series, expected, actual)
+                      if not same_number(e, a)]
+        assert not mismatches, f"{name} / {scalar.__name__}: {mismatches}"
+
+    print(f"✓ {name}: {len(series)} values match")
+
+print("\n" + "=" * 80)
+print("✅ VECTORIZED CLEANERS MATCH THE PER-CELL FUNCTIONS")
+print("=" * 80)
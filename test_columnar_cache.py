@@ -0,0 +1,79 @@
+"""
+Test for the on-disk columnar (Feather) sheet cache
+First read parses the xlsx and stores the sheets → later reads come from disk
+"""
+import hashlib
+import tempfile
+import pandas as pd
+from openpyxl import Workbook
+from app.services.columnar_cache import (
+    ColumnarSheetCache, _to_arrow, columnar_cache, feather
+)
+from app.services.pipeline import parse_workbook, read_workbook
+from testing_utils import make_detailed_findings_frame, workbook_bytes
+
+print("=" * 80)
+print("COLUMNAR SHEET CACHE TEST")
+print("=" * 80)
+
+if feather is None:
+    print("\n⚠️  pyarrow is not installed - columnar cache disabled, skipping")
+    assert not columnar_cache.enabled
+
+else:
+    findings = make_detailed_findings_frame(300)
+    mixed = pd.DataFrame({"Notes": ["Prepared", 2024, None]})
+    contents = workbook_bytes({"Findings": findings, "Mixed": mixed})
+    digest = hashlib.sha256(contents).hexdigest()
+
+    with tempfile.TemporaryDirectory() as directory:
+        columnar_cache.directory = directory
+
+        headers, sheets = parse_workbook(contents, digest)
+        stored = [name for name in headers
+                  if columnar_cache.sheets(digest, {name: None}) is not None]
+        print(f"\n📦 Stored sheets: {stored}")
+
+        # The mixed-type column does not survive Arrow, so that sheet is not
+        # stored and the full workbook keeps coming from the xlsx
+        assert columnar_cache.headers(digest) == headers
+        assert stored == ["Findings"]
+        assert parse_workbook(contents, digest)[1]["Mixed"].equals(sheets["Mixed"])
+        stats = columnar_cache.stats()
+        print(f"📊 Stats: {stats}")
+        assert (stats["workbooks"], stats["sheets"], stats["skipped_sheets"]) == (1, 1, 1)
+
+        # Object columns that would come back as another dtype are caught
+        # from the Arrow schema
+        for frame in [pd.DataFrame({"Amount": pd.Series([1, None], dtype=object)}),
+                      pd.DataFrame({"Notes": pd.Series(["a", None], dtype=object)}),
+                      pd.DataFrame({2024: [1, 2]}),
+                      findings.iloc[10:]]:
+            assert _to_arrow(frame) is None, frame.columns.tolist()
+        assert _to_arrow(findings) is not None
+
+        # Only the analyzed sheet is needed by read_workbook, so it loads
+        # from disk (the bytes are not even a workbook here)
+        cached = read_workbook(b"not a workbook", digest)
+        parsed = read_workbook(contents)
+        for (name, probe, format_type, df), expected in zip(cached, parsed):
+            print(f"  {name}: {format_type}")
+            assert (name, probe, format_type) == expected[:3]
+            if df is None:
+                assert expected[3] is None
+            else:
+                assert df.equals(expected[3])
+                assert df.dtypes.equals(expected[3].dtypes)
+
+        # Least recently used workbooks are deleted beyond the disk budget
+        small = ColumnarSheetCache(directory, max_bytes=1)
+        small.store("other", {"Sheet": {"columns": ["a"], "total_rows": 2}},
+                    {"Sheet": pd.DataFrame({"a": [1, 2]})})
+        assert small.headers(digest) is None
+        assert small.sheets("other", {"Sheet": None})["Sheet"]["a"].tolist() == [1, 2]
+
+        columnar_cache.directory = ""
+
+print("\n" + "=" * 80)
+print("✅ COLUMNAR SHEET CACHE TEST PASSED")
+print("=" * 80)
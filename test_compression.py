@@ -0,0 +1,88 @@
+"""
+Test for negotiated response compression
+Accept-Encoding → compressed /api/analyze, /api/validate and /api/preview bodies, identical once decoded
+"""
+import gzip
+import json
+import random
+import pandas as pd
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import COMPRESSION_MIN_BYTES
+from app.services.compression import ENCODERS, negotiate
+from app.services.response_cache import response_cache, sheet_cache
+from testing_utils import make_multi_tender_frame, workbook_bytes
+
+print("=" * 80)
+print("COMPRESSION TEST")
+print("=" * 80)
+
+print(f"\n🗜️  Available encodings: {list(ENCODERS)}")
+best = next(iter(ENCODERS))
+for header, expected in [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("GZIP;q=0.5, deflate", "gzip"),
+    ("gzip;q=0", None),
+    ("*", best),
+    ("*, gzip;q=0", best if best != "gzip" else None),
+    ("deflate, gzip;q=1.0, br;q=0.2, zstd;q=0.1", "gzip"),
+    ("gzip, br, zstd", best),
+]:
+    assert negotiate(header) == expected, header
+
+contents = workbook_bytes({"Tenders": make_multi_tender_frame(800, groups=80)})
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+files = {"file": ("tenders.xlsx", contents, XLSX)}
+
+with TestClient(app) as client:
+    response_cache.clear()
+    sheet_cache.clear()
+
+    def post(path, encoding):
+        random.seed(0)
+        # stream=False bodies are decoded by the client; read the raw bytes
+        with client.stream("POST", path, files=files,
+                           headers={"Accept-Encoding": encoding}) as response:
+            raw = b"".join(response.iter_raw())
+        return response, raw
+
+    print("\n🚀 Responses:")
+    for path in ["/api/analyze", "/api/validate", "/api/preview"]:
+        plain, plain_body = post(path, "identity")
+        packed, packed_body = post(path, "gzip")
+        assert plain.status_code == packed.status_code == 200
+        assert "content-encoding" not in plain.headers
+        assert "Accept-Encoding" in packed.headers["vary"]
+        print(f"  {path:<14} {len(plain_body):>10,} → {len(packed_body):>9,} bytes")
+        if len(plain_body) < COMPRESSION_MIN_BYTES:
+            assert "content-encoding" not in packed.headers
+            assert packed_body == plain_body
+        else:
+            assert packed.headers["content-encoding"] == "gzip"
+            assert json.loads(gzip.decompress(packed_body)) == json.loads(plain_body)
+
+    # Cache hits are compressed too
+    hit, hit_body = post("/api/analyze", "gzip")
+    assert hit.headers["x-cache"] == "HIT"
+    assert hit.headers["content-encoding"] == "gzip"
+
+
+    # Small bodies are sent as they are
+    tiny = workbook_bytes({"Cover": pd.DataFrame({"Notes": ["Compression"]})})
+    response = client.post("/api/preview", files={"file": ("tiny.xlsx", tiny, XLSX)},
+                           headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+    stats = client.get("/api/compression/stats").json()
+    print(f"\n📊 {json.dumps(stats['encodings'])}")
+    assert stats["encodings"]["gzip"]["responses"] >= 3
+    assert stats["encodings"]["gzip"]["ratio"] > 5
+    assert stats["uncompressed_responses"] >= 4
+
+print("\n" + "=" * 80)
+print("✅ COMPRESSION TEST PASSED")
+print("=" * 80)
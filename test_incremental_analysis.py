@@ -0,0 +1,188 @@
+"""
+Test for incremental re-analysis
+Appended, changed and deleted findings applied to a sheet's aggregate → same analysis as re-running analyze_sheet
+"""
+import asyncio
+import json
+import random
+import pandas as pd
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.analysis_engine import analyze_sheet
+from app.services.incremental import IncrementalSession, IncrementalSheet
+from app.services.worker_pool import PoolBusyError
+from testing_utils import make_detailed_findings_frame, same_rounded, workbook_bytes
+
+print("=" * 80)
+print("INCREMENTAL ANALYSIS TEST")
+print("=" * 80)
+
+
+# Few groups, so most changes touch groups with other rows in them
+findings = make_detailed_findings_frame(300, groups=12)
+findings.loc[40:50, "Estimated Budget"] = None
+sheet = IncrementalSheet(findings, "#")
+expected = findings.set_index(findings["#"].astype(str))
+
+
+def check(label, changes):
+    print(f"  {label}: {changes} - {len(sheet.rows)} rows")
+    assert same_rounded(sheet.analysis(), analyze_sheet(expected.reset_index(drop=True))), label
+
+
+print("\n🔁 Updates against a full re-analysis:")
+check("initial", {})
+
+# Appended findings
+new = make_detailed_findings_frame(40, groups=12, seed=3)
+new["#"] = range(1001, 1041)
+changes = sheet.update(new)
+expected = pd.concat([expected, new.set_index(new["#"].astype(str))])
+assert changes == {"added": 40, "updated": 0, "unchanged": 0, "deleted": 0}
+check("append", changes)
+
+# OPEN → CLOSED on existing findings, sent as key and status only
+rng = random.Random(1)
+open_keys = expected.index[expected["Status"] == "OPEN"].tolist()
+closing = rng.sample(open_keys[20:], 25)
+changes = sheet.update(pd.DataFrame({"#": closing, "Status": "CLOSED"}))
+expected.loc[closing, "Status"] = "CLOSED"
+check("status", changes)
+
+# The first OPEN row of an audit type leaves the open breakdown's ranking
+# without its first row, which only the stored rows can settle
+first_open = open_keys[0]
+changes = sheet.update(pd.DataFrame({"#": [first_open], "Status": ["CLOSED"]}))
+expected.loc[first_open, "Status"] = "CLOSED"
+check("first open", changes)
+
+# Moving a finding to another PE and budget, with unchanged rows resent
+moved = expected.iloc[[5, 120, 310]].reset_index(drop=True)
+moved.loc[0, "PE Name"] = "PE 99999"
+moved.loc[1, "Estimated Budget"] = 10_000_000_000
+changes = sheet.update(moved)
+expected.loc[moved["#"].astype(str), ["PE Name", "Estimated Budget"]] = \
+    moved[["PE Name", "Estimated Budget"]].to_numpy()
+assert changes["updated"] == 2 and changes["unchanged"] == 1
+check("move", changes)
+
+# Deleting rows, including the largest budget; keys as sent by clients
+gone = [str(moved.loc[1, "#"]), 3, 3.0, "17", 1001]
+changes = sheet.update(pd.DataFrame(), deleted=gone)
+expected = expected.drop(index=["3", "17", "1001", str(moved.loc[1, "#"])])
+assert changes["deleted"] == 4
+check("delete", changes)
+
+# Changes, additions and deletions in one batch
+batch = pd.DataFrame({
+    "#": ["2", "2000", "2001"],
+    "Status": ["OPEN", "OPEN", "CLOSED"],
+    "PE Name": ["PE 00001", "PE 00002", "PE 00003"],
+    "Checklist Title": ["Checklist 00001"] * 3,
+    "Compliance %": ["55%", 70, None],
+    "Score Gap": [1, 2, 3]
+})
+changes = sheet.update(batch, deleted=[4, 5])
+expected.loc["2", ["Status", "PE Name", "Checklist Title", "Compliance %", "Score Gap"]] = \
+    ["OPEN", "PE 00001", "Checklist 00001", "55%", 1]
+expected = pd.concat([expected.drop(index=["4", "5"]),
+                      batch.iloc[1:].set_index("#", drop=False)])
+check("mixed", changes)
+
+# Bad updates are refused before anything changes
+rows_before = len(sheet.rows)
+for label, rows, deleted in [
+    ("duplicate key", pd.DataFrame({"#": [7, "7"], "Status": "OPEN"}), []),
+    ("updated and deleted", pd.DataFrame({"#": [7], "Status": "OPEN"}), [7]),
+    ("no key column", pd.DataFrame({"Status": ["OPEN"]}), []),
+    ("blank key", pd.DataFrame({"#": [None], "Status": ["OPEN"]}), [])
+]:
+    try:
+        sheet.update(rows, deleted)
+        raise AssertionError(label)
+    except ValueError as e:
+        print(f"  ⚠️  {label}: {e}")
+assert len(sheet.rows) == rows_before
+check("after errors", {})
+
+
+# A session update the worker pool turns away changes nothing
+async def busy(func, *args):
+    raise PoolBusyError("busy")
+
+session = IncrementalSession("findings.xlsx", "#", {"Findings": sheet}, {})
+analysis_before = sheet.analysis()
+try:
+    asyncio.run(session.update(
+        "Findings", pd.DataFrame({"#": ["2"], "Status": ["CLOSED"]}), [], busy))
+    raise AssertionError("busy pool")
+except PoolBusyError:
+    pass
+assert sheet.analysis() is analysis_before and sheet.rows.loc["2", "Status"] == "OPEN"
+
+
+async def here(func, *args):
+    return func(*args)
+
+changes = asyncio.run(session.update(
+    "Findings", pd.DataFrame({"#": ["2"], "Status": ["CLOSED"]}), [], here))
+expected.loc["2", "Status"] = "CLOSED"
+check("session", changes)
+
+# Over the API
+contents = workbook_bytes({
+    "Findings": findings,
+    "Cover": pd.DataFrame({"Notes": ["Incremental analysis"]})
+})
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+files = {"file": ("findings.xlsx", contents, XLSX)}
+
+with TestClient(app) as client:
+    print("\n🚀 POST /api/incremental")
+    response = client.post("/api/incremental", files=files, data={"key_column": "#"})
+    assert response.status_code == 200, response.text
+    session = response.json()
+    session_id = session["session_id"]
+    print(f"  session_id: {session_id}, skipped: {session['skipped_sheets']}")
+    assert list(session["sheets"]) == ["Findings"]
+    assert "Cover" in session["skipped_sheets"]
+
+    random.seed(0)
+    analyzed = client.post("/api/analyze", files=files).json()
+    assert session["sheets"]["Findings"]["analysis"] == \
+        analyzed["results"]["Findings"]["analysis"]
+
+    closing = int(findings.loc[findings["Status"] == "OPEN", "#"].iloc[0])
+    response = client.post(
+        f"/api/incremental/{session_id}/sheets/Findings/rows",
+        json={"rows": [{"#": closing, "Status": "CLOSED"}], "deleted": [2]})
+    assert response.status_code == 200, response.text
+    updated = response.json()
+    print(f"  update: {updated['changes']} - {updated['total_rows']} rows")
+    assert updated["changes"]["updated"] == 1 and updated["total_rows"] == 299
+
+    current = findings[findings["#"] != 2].copy()
+    current.loc[current["#"] == closing, "Status"] = "CLOSED"
+    assert updated["analysis"] == json.loads(json.dumps(analyze_sheet(current)))
+    assert client.get(f"/api/incremental/{session_id}").json()["sheets"]["Findings"] == \
+        {"total_rows": 299, "analysis": updated["analysis"]}
+
+    for label, response, status in [
+        ("unknown sheet", client.post(f"/api/incremental/{session_id}/sheets/Cover/rows",
+                                      json={"rows": []}), 404),
+        ("duplicate key", client.post(f"/api/incremental/{session_id}/sheets/Findings/rows",
+                                      json={"rows": [{"#": 9}, {"#": 9}]}), 400),
+        ("no key column", client.post("/api/incremental", files=files,
+                                      data={"key_column": "Reference"}), 400),
+        ("duplicate keys in file", client.post("/api/incremental", files=files,
+                                               data={"key_column": "PE Name"}), 400)
+    ]:
+        print(f"  {label}: {response.status_code} {response.json()['detail']}")
+        assert response.status_code == status, label
+
+    assert client.delete(f"/api/incremental/{session_id}").status_code == 200
+    assert client.get(f"/api/incremental/{session_id}").status_code == 404
+
+print("\n" + "=" * 80)
+print("✅ INCREMENTAL ANALYSIS TEST PASSED")
+print("=" * 80)
@@ -0,0 +1,100 @@
+"""
+Integration test for the background job API
+Upload → job id → poll per-sheet progress → fetch result
+"""
+import io
+import time
+from unittest import mock
+from openpyxl import Workbook
+from fastapi.testclient import TestClient
+from app.api import jobs as jobs_api
+from app.main import app
+from app.services.jobs import JobManager
+from app.services.worker_pool import analysis_pool
+
+print("=" * 80)
+print("JOB API INTEGRATION TEST")
+print("=" * 80)
+
+wb = Workbook()
+ws1 = wb.active
+ws1.title = "Audit Findings"
+ws1.append(["PE Name", "Checklist Title", "Entity Name", "Entity Number",
+            "Compliance %", "Score Gap", "Status", "Estimated Budget"])
+for i in range(30):
+    ws1.append([f"PE {i % 4}", f"Checklist {i % 3}", f"Entity {i % 5}", f"00{i % 5}",
+                f"{(i * 13) % 100}%", i % 6, "OPEN" if i % 2 else "CLOSED",
+                (i + 1) * 1_000_000])
+
+ws2 = wb.create_sheet("Notes")
+ws2.append(["Notes"])
+ws2.append(["Prepared for the audit committee"])
+
+excel_buffer = io.BytesIO()
+wb.save(excel_buffer)
+contents = excel_buffer.getvalue()
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+with TestClient(app) as client:
+    print("\n🚀 POST /api/jobs")
+    response = client.post("/api/jobs", files={"file": ("jobs.xlsx", contents, XLSX)})
+    print(f"Response Status: {response.status_code}")
+    assert response.status_code == 202
+    job = response.json()
+    print(f"  Job: {job['job_id']} ({job['status']})")
+    assert job["status_url"] == f"/api/jobs/{job['job_id']}"
+
+    # Poll until the job finishes
+    deadline = time.time() + 60
+    while True:
+        status = client.get(job["status_url"]).json()
+        if status["status"] in ("completed", "failed") or time.time() > deadline:
+            break
+        time.sleep(0.1)
+
+    print(f"\n📋 Final status: {status['status']}")
+    for sheet_name, sheet in status["progress"]["sheets"].items():
+        print(f"  {sheet_name}: {sheet['data_format']} - {sheet['status']}")
+    assert status["status"] == "completed", status
+    assert status["progress"]["sheets_total"] == 2
+    assert status["progress"]["sheets_completed"] == 2
+
+    result = client.get(job["result_url"])
+    print(f"\n📦 GET result: {result.status_code}")
+    assert result.status_code == 200
+    body = result.json()
+
+    # Same response shape and numbers as the synchronous endpoint
+    direct = client.post("/api/analyze", files={"file": ("jobs.xlsx", contents, XLSX)}).json()
+    assert list(body["results"]) == list(direct["results"])
+    assert (body["results"]["Audit Findings"]["analysis"]
+            == direct["results"]["Audit Findings"]["analysis"])
+    print(f"  Sheets analyzed: {body['sheets_analyzed']}")
+    print(f"  Open findings: {body['results']['Audit Findings']['analysis']['open_findings']}")
+
+    # A file that is not a workbook fails the job instead of the request
+    response = client.post("/api/jobs", files={"file": ("broken.xlsx", b"not excel", XLSX)})
+    broken = response.json()
+    while client.get(broken["status_url"]).json()["status"] in ("queued", "running"):
+        time.sleep(0.05)
+    failed = client.get(broken["result_url"])
+    print(f"\n💥 Broken upload result: {failed.status_code} {failed.json()['detail'][:60]}")
+    assert failed.status_code == 409
+
+    missing = client.get("/api/jobs/does-not-exist")
+    assert missing.status_code == 404
+
+    # A result larger than the finished jobs' byte budget is not kept
+    small = JobManager(analysis_pool, 60, 4, max_bytes=len(result.content) // 2)
+    with mock.patch.object(jobs_api, "job_manager", small):
+        big = client.post("/api/jobs", files={"file": ("jobs.xlsx", contents, XLSX)}).json()
+        while client.get(big["status_url"]).json()["status"] in ("queued", "running"):
+            time.sleep(0.05)
+        status = client.get(big["status_url"]).json()
+        print(f"\n🧮 Over JOB_RESULT_BYTES: {status['status']} - {status['error']}")
+        assert status["status"] == "failed" and "JOB_RESULT_BYTES" in status["error"]
+        assert client.get(big["result_url"]).status_code == 409
+
+print("\n" + "=" * 80)
+print("✅ JOB API TEST PASSED")
+print("=" * 80)
@@ -0,0 +1,71 @@
+"""
+Test for the JSON encoder
+NumPy, pandas and missing values → the JSON FastAPI's encoder gives for their Python equivalents
+"""
+import datetime
+import json
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.services import json_encoder
+from app.services.pipeline import analyze_loaded_sheet
+from app.services.format_detector import detect_format_from_columns
+from testing_utils import make_multi_tender_frame
+
+print("=" * 80)
+print("JSON ENCODER TEST")
+print("=" * 80)
+
+native = {
+    "count": np.int64(3),
+    "ratio": np.float64(0.25),
+    "small": np.float32(1.5),
+    "flag": np.bool_(True),
+    "missing": [np.nan, pd.NA, pd.NaT, None, float("inf")],
+    "created_at": pd.Timestamp("2025-09-03 10:30"),
+    "day": datetime.date(2025, 9, 3),
+    "values": np.array([1, 2, 3]),
+    "column": pd.Series([1.5, np.nan]),
+    "by_year": {np.int64(2024): 1, 2025: np.int64(2)},
+    "pair": (1, "ü"),
+}
+expected = {
+    "count": 3,
+    "ratio": 0.25,
+    "small": 1.5,
+    "flag": True,
+    "missing": [None, None, None, None, None],
+    "created_at": "2025-09-03T10:30:00",
+    "day": "2025-09-03",
+    "values": [1, 2, 3],
+    "column": [1.5, None],
+    "by_year": {"2024": 1, "2025": 2},
+    "pair": [1, "ü"],
+}
+
+encoders = [("stdlib", None)]
+if json_encoder.orjson is not None:
+    encoders.append(("orjson", json_encoder.orjson))
+
+# A multi-tender result, as the engine returns it
+df = make_multi_tender_frame(300, groups=30)
+result = analyze_loaded_sheet(
+    "Tenders", {"columns": list(df.columns), "total_rows": len(df)},
+    detect_format_from_columns(list(df.columns)), df)
+fastapi_body = JSONResponse(jsonable_encoder(result)).body
+
+for name, module in encoders:
+    with mock.patch.object(json_encoder, "orjson", module):
+        body = json_encoder.dumps(native)
+        print(f"  {name}: {body[:70].decode()}...")
+        assert json.loads(body) == expected, name
+        assert json_encoder.FastJSONResponse(native).body == body
+
+        assert json.loads(json_encoder.dumps(result)) == json.loads(fastapi_body), name
+
+print("\n" + "=" * 80)
+print("✅ JSON ENCODER TEST PASSED")
+print("=" * 80)
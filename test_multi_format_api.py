@@ -7,6 +7,7 @@ import io
 from openpyxl import Workbook
 from fastapi.testclient import TestClient
 from app.main import app
+from testing_utils import make_detailed_findings_frame, make_multi_tender_frame, workbook_bytes
 
 client = TestClient(app)
 
@@ -216,3 +217,28 @@ else:
     print(f"\n❌ API ERROR!")
     print(f"Status Code: {response.status_code}")
     print(f"Response: {response.text}")
+
+# Multi-tender results name their counts total_findings and red_flags; the
+# overall summary must count them next to the detailed findings sheet's
+print("\n🧮 Mixed detailed / multi-tender workbook")
+mixed = client.post(
+    "/api/analyze",
+    files={"file": ("mixed.xlsx", workbook_bytes({
+        "Findings": make_detailed_findings_frame(40),
+        "Tenders": make_multi_tender_frame(30)
+    }), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+)
+assert mixed.status_code == 200, mixed.text
+mixed = mixed.json()
+detailed = mixed["results"]["Findings"]["analysis"]
+tenders = mixed["results"]["Tenders"]["analysis"]
+assert tenders["format_type"] == "detailed_findings_multi_tender"
+assert tenders["red_flags"]["value"] > 0
+overall = mixed["overall_summary"]
+print(f"  records: {overall['total_records_analyzed']}, red flags: {overall['total_red_flags']}")
+assert overall["total_records_analyzed"] == 40 + 30
+assert overall["total_open_findings"] == \
+    detailed["open_findings"] + tenders["open_findings"]["value"]
+assert overall["total_red_flags"] == \
+    detailed["red_flag_count"] + tenders["red_flags"]["value"]
+print("  ✓ Multi-tender findings and red flags counted")
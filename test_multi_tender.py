@@ -2,7 +2,7 @@
 Test script for multi-tender findings format analysis
 """
 import pandas as pd
-from app.services.multi_tender_engine import analyze_multi_tender_findings, parse_tender_details
+from app.services.multi_tender_engine import analyze_multi_tender_findings, parse_tender_details, parse_tender_column
 from app.services.summary_engine import generate_multi_tender_summary, generate_multi_tender_insights
 from app.services.format_detector import detect_data_format, get_format_info
 import json
@@ -69,6 +69,16 @@ for i, tender in enumerate(parsed_tenders, 1):
     print(f"  Budget: TZS {tender['budget']:,.0f}")
     print(f"  Type: {tender['type']}")
 
+# The normalized tender table holds the same tenders, one row each
+tender_table = parse_tender_column(df['Tenders'])
+print(f"\n🧾 Tender table: {len(tender_table)} rows")
+print(tender_table.to_string(index=False))
+assert tender_table['tender_number'].tolist() == [
+    tender['tender_number'] for tender in parsed_tenders]
+assert tender_table['budget'].tolist() == [
+    tender['budget'] for tender in parsed_tenders]
+assert (tender_table['finding'] == 0).all()
+
 # Run analysis
 print("\n🔍 RUNNING ANALYSIS...")
 print("=" * 80)
@@ -0,0 +1,96 @@
+"""
+Test for NDJSON streaming of /api/analyze
+Accept: application/x-ndjson → one line per sheet as it is analyzed, then the overall summary, matching the JSON response
+"""
+import json
+import random
+import pandas as pd
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.response_cache import response_cache, sheet_cache
+from testing_utils import (
+    make_detailed_findings_frame,
+    make_multi_tender_frame,
+    workbook_bytes
+)
+
+print("=" * 80)
+print("NDJSON STREAMING TEST")
+print("=" * 80)
+
+contents = workbook_bytes({
+    "Findings": make_detailed_findings_frame(3000, groups=300),
+    "Tenders": make_multi_tender_frame(1500, groups=150),
+    "Notes": pd.DataFrame({"Note": ["not audit data"]})
+})
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+files = {"file": ("workbook.xlsx", contents, XLSX)}
+NDJSON = {"Accept": "application/x-ndjson"}
+
+
+def parse(body):
+    return [json.loads(line) for line in body.decode().splitlines()]
+
+
+with TestClient(app) as client:
+    response_cache.clear()
+    sheet_cache.clear()
+
+    def analyze(headers=None, **params):
+        random.seed(0)
+        return client.post("/api/analyze", files=files, headers=headers, params=params)
+
+    # Streamed first, so the JSON request reuses the sheets it cached and
+    # the randomly worded summaries are the same
+    with client.stream("POST", "/api/analyze", files=files,
+                       headers={**NDJSON, "Accept-Encoding": "identity"}) as response:
+        assert response.status_code == 200, response.read()
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert "Accept" in response.headers["vary"]
+        assert "content-encoding" not in response.headers
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+
+    print(f"\n📡 {len(lines)} lines:")
+    for line in lines:
+        print(f"  {', '.join(line)}: {line.get('sheet', '')}")
+
+    full = analyze().json()
+    *sheets, final = lines
+    assert sorted(line["sheet"] for line in sheets) == sorted(full["results"])
+    for line in sheets:
+        assert set(line) == {"sheet", "result"}
+        assert line["result"] == full["results"][line["sheet"]], line["sheet"]
+    assert final == {key: full[key] for key in ("status", "sheets_analyzed", "overall_summary")}
+    assert list(final["overall_summary"]["detected_formats"]) == list(full["results"])
+    # Streams are never cached whole
+    assert analyze(NDJSON).headers.get("X-Cache") is None
+
+    # gzip'd stream, and sections
+    response = analyze({**NDJSON, "Accept-Encoding": "gzip"}, sections="summary")
+    assert response.headers["content-encoding"] == "gzip"
+    print(f"\n🗜️  gzip'd stream: {len(response.content):,} bytes decoded")
+    assert parse(response.content)[-1] == final
+    for line in parse(response.content)[:-1]:
+        assert "pe_name_analysis" not in line["result"]["analysis"]
+    stats = client.get("/api/compression/stats").json()["encodings"]["gzip"]
+    assert stats["bytes_out"] < stats["bytes_in"]
+
+    # An upload session streams the same results
+    file_id = client.post("/api/upload", files=files).json()["file_id"]
+    response = client.post("/api/analyze", data={"file_id": file_id}, headers=NDJSON)
+    assert response.status_code == 200, response.text
+    session_lines = parse(response.content)
+    assert session_lines[-1] == final
+    assert {line["sheet"]: line["result"] for line in session_lines[:-1]} == full["results"]
+
+    for label, params in [("field selection", {"finding_fields": "pe_name"}),
+                          ("paging", {"large_lists": "paged"}),
+                          ("normalized", {"layout": "normalized"}),
+                          ("table", {"table": "pe_analysis"})]:
+        response = analyze(NDJSON, **params)
+        print(f"  {label}: {response.status_code} {response.json()['detail']}")
+        assert response.status_code == 400
+
+print("\n" + "=" * 80)
+print("✅ NDJSON STREAMING TEST PASSED")
+print("=" * 80)
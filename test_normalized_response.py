@@ -0,0 +1,114 @@
+"""
+Test for the normalized multi-tender layout
+/api/analyze?layout=normalized → each PE and tender once, the nested response rebuilt from the references
+"""
+import copy
+import random
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.json_encoder import dumps
+from app.services.response_cache import response_cache, sheet_cache
+from app.services.response_shaping import normalize_multi_tender
+from app.services.pipeline import analyze_loaded_sheet
+from app.services.format_detector import detect_format_from_columns
+from testing_utils import make_multi_tender_frame, workbook_bytes
+
+print("=" * 80)
+print("NORMALIZED RESPONSE TEST")
+print("=" * 80)
+
+
+def denormalize(analysis):
+    """The nested layout of a normalized multi-tender analysis"""
+    analysis = copy.deepcopy(analysis)
+    tenders = analysis.pop("tenders")["items"]
+    del analysis["layout"]
+
+    for finding in analysis["detailed_findings"]["findings"]:
+        if "tender_ids" in finding:
+            finding["tenders"] = [tenders[i] for i in finding.pop("tender_ids")]
+
+    pes = analysis["pe_analysis"]
+    for entry in pes.values():
+        if isinstance(entry, dict):
+            details = [tenders[i] for i in entry.pop("tender_ids")]
+            entry.setdefault("tender_numbers",
+                             [tender["tender_number"] for tender in details])
+            entry["tender_details"] = details
+
+    analysis["entity_analysis"]["data"] = pes
+    analysis["top_entities_by_budget"]["entities"] = [
+        {"entity_name": name, **{key: pes[name].get(key, 0) for key in [
+            "total_budget", "total_findings", "open_findings", "total_tenders",
+            "tender_numbers", "tender_details", "red_flags"]}}
+        for name in analysis["top_entities_by_budget"]["entities"]
+    ]
+    return analysis
+
+
+# The engine's own result, nested and normalized
+df = make_multi_tender_frame(6000, groups=300)
+result = analyze_loaded_sheet(
+    "Tenders", {"columns": list(df.columns), "total_rows": len(df)},
+    detect_format_from_columns(list(df.columns)), df)
+nested = result["analysis"]
+nested_body = dumps(nested)
+normalized = copy.deepcopy(nested)
+normalize_multi_tender(normalized)
+normalized_body = dumps(normalized)
+tender_count = sum(len(f["tenders"]) for f in nested["detailed_findings"]["findings"])
+
+print(f"\n📦 {len(df)} findings, {tender_count} tender references, "
+      f"{len(normalized['tenders']['items'])} distinct tenders")
+print(f"  nested:     {len(nested_body):>12,} bytes")
+print(f"  normalized: {len(normalized_body):>12,} bytes")
+# Every PE's tender_details repeat tenders of its findings
+distinct = {tuple(tender.items())
+            for finding in nested["detailed_findings"]["findings"]
+            for tender in finding["tenders"]}
+assert len(normalized["tenders"]["items"]) == len(distinct)
+assert len(normalized_body) < len(nested_body) * 0.75
+assert normalized["entity_analysis"]["data"] == "pe_analysis"
+assert denormalize(normalized) == nested
+
+# Over the API, with field selection on top
+contents = workbook_bytes({"Tenders": df.head(800)})
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+files = {"file": ("tenders.xlsx", contents, XLSX)}
+
+with TestClient(app) as client:
+    response_cache.clear()
+    sheet_cache.clear()
+
+    def analyze(**params):
+        random.seed(0)
+        return client.post("/api/analyze", files=files, params=params)
+
+    full = analyze().json()["results"]["Tenders"]
+    response = analyze(layout="normalized")
+    assert response.status_code == 200, response.text
+    assert response.headers["X-Cache"] == "MISS"
+    body = response.json()["results"]["Tenders"]
+    print(f"\n🚀 /api/analyze?layout=normalized: {len(response.content):,} bytes")
+    assert body["analysis"]["layout"] == "normalized"
+    assert denormalize(body["analysis"]) == full["analysis"]
+    assert analyze(layout="normalized").headers["X-Cache"] == "HIT"
+
+    selected = analyze(layout="normalized", tender_fields="tender_number,budget",
+                       finding_fields="pe_name,tenders").json()["results"]["Tenders"]
+    items = selected["analysis"]["tenders"]["items"]
+    assert all(set(item) == {"tender_number", "budget"} for item in items)
+    assert [[items[i] for i in finding["tender_ids"]]
+            for finding in selected["analysis"]["detailed_findings"]["findings"]] == \
+        [[{"tender_number": t["tender_number"], "budget": t["budget"]} for t in finding["tenders"]]
+         for finding in full["analysis"]["detailed_findings"]["findings"]]
+
+    for label, params in [("unknown layout", {"layout": "flat"}),
+                          ("with paging", {"layout": "normalized", "large_lists": "paged"})]:
+        response = analyze(**params)
+        print(f"  {label}: {response.status_code} {response.json()['detail']}")
+        assert response.status_code == 400
+
+print("\n" + "=" * 80)
+print("✅ NORMALIZED RESPONSE TEST PASSED")
+print("=" * 80)
@@ -0,0 +1,105 @@
+"""
+Test for parallel per-sheet analysis
+Each sheet parsed and analyzed on its own → same response as the sequential path
+"""
+import asyncio
+import json
+import random
+import pandas as pd
+from app.services.pipeline import (
+    analyze_changed_sheet,
+    analyze_changed_sheets,
+    combine_pickled_results,
+    probe_workbook,
+    read_workbook
+)
+from app.services import response_cache
+from app.services.response_cache import analyze_sheets_in_parallel, sheet_cache
+from app.services.worker_pool import analysis_pool
+from testing_utils import (
+    make_detailed_findings_frame,
+    workbook_bytes
+)
+
+print("=" * 80)
+print("PARALLEL SHEET ANALYSIS TEST")
+print("=" * 80)
+
+entities = pd.DataFrame({
+    "Procuring Entity": [f"Entity {i}" for i in range(6)],
+    "Overall %": [f"{40 + i * 10}%" for i in range(6)],
+    "Tenders": [i + 1 for i in range(6)],
+    "Status": ["Active"] * 6
+})
+contents = workbook_bytes({
+    "Zone North": make_detailed_findings_frame(200, seed=1),
+    "Cover": pd.DataFrame({"Notes": ["Regional roll-up"]}),
+    "Zone South": make_detailed_findings_frame(150, seed=2),
+    "Entities": entities
+})
+
+# Sequential: one task reads the workbook and analyzes every sheet
+random.seed(0)
+sequential = combine_pickled_results(
+    (name, result) for name, _, result in
+    analyze_changed_sheets(frozenset(), read_workbook, contents))
+
+# Per sheet: every sheet loaded from the file on its own, merged in order
+headers, formats, projections = probe_workbook(contents)
+random.seed(0)
+entries = [
+    analyze_changed_sheet(frozenset(), contents, None, headers, name,
+                          formats[name], projections.get(name))
+    for name in headers
+]
+per_sheet = combine_pickled_results((name, result) for name, _, result in entries)
+
+print(f"\n📋 Sheets: {list(per_sheet['results'])}")
+for name, result in per_sheet["results"].items():
+    print(f"  {name}: {result['data_format']}")
+assert json.dumps(per_sheet, default=str) == json.dumps(sequential, default=str)
+
+# Sheets only get tasks of their own with two or more workers and at
+# least two sheets of min_rows rows; otherwise the workbook is read whole
+sequential_reads = []
+analyze_with_sheet_cache = response_cache.analyze_with_sheet_cache
+
+
+async def counted(*args, **kwargs):
+    sequential_reads.append(args[0].__name__)
+    return await analyze_with_sheet_cache(*args, **kwargs)
+
+response_cache.analyze_with_sheet_cache = counted
+analysis_pool.size = 2
+
+
+def check_pool_result(parallel):
+    """Same analyses as the sequential path (summaries are randomly worded)"""
+    assert list(parallel["results"]) == list(sequential["results"])
+    for name, result in sequential["results"].items():
+        for key in ("data_format", "format_info", "analysis"):
+            assert (json.dumps(parallel["results"][name][key], default=str)
+                    == json.dumps(result[key], default=str)), (name, key)
+    assert (parallel["overall_summary"]["detected_formats"]
+            == json.loads(json.dumps(sequential["overall_summary"]["detected_formats"])))
+
+
+try:
+    sheet_cache.clear()
+    check_pool_result(json.loads(asyncio.run(
+        analyze_sheets_in_parallel(contents, min_rows=150))))
+    assert sequential_reads == []
+    print("\n✅ Two large sheets, one task each: result matches")
+
+    sheet_cache.clear()
+    check_pool_result(json.loads(asyncio.run(
+        analyze_sheets_in_parallel(contents, min_rows=200))))
+    assert sequential_reads == ["read_workbook"]
+    print("✅ One large sheet, read whole: result matches")
+finally:
+    response_cache.analyze_with_sheet_cache = analyze_with_sheet_cache
+    analysis_pool.shutdown()
+
+print("\n" + "=" * 80)
+print("✅ PARALLEL SHEET ANALYSIS TEST PASSED")
+print("=" * 80)
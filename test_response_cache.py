@@ -0,0 +1,93 @@
+"""
+Test for the /api/analyze response and sheet caches
+Same upload twice → second response served from cache without re-parsing
+One sheet edited → only that sheet re-analyzed
+"""
+import io
+from openpyxl import Workbook
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.response_cache import ResponseCache, response_cache, sheet_cache
+
+print("=" * 80)
+print("RESPONSE CACHE TEST")
+print("=" * 80)
+
+# LRU eviction by byte budget
+cache = ResponseCache(max_bytes=10)
+cache.set("a", b"1234")
+cache.set("b", b"5678")
+assert cache.get("a") == b"1234"          # a is now most recently used
+cache.set("c", b"90ab")                   # over budget: evicts b
+assert cache.get("b") is None
+assert cache.get("a") == b"1234" and cache.get("c") == b"90ab"
+cache.set("huge", b"x" * 11)              # larger than the budget: not stored
+assert cache.get("huge") is None
+stats = cache.stats()
+print(f"\n📦 LRU: {stats}")
+assert stats["entries"] == 2 and stats["size_bytes"] == 8
+assert stats["hits"] == 3 and stats["misses"] == 2 and stats["evictions"] == 1
+
+
+def make_workbook(edited_budget):
+    wb = Workbook()
+    for sheet, title in enumerate(["Cached Findings", "Edited Findings"]):
+        ws = wb.active if sheet == 0 else wb.create_sheet()
+        ws.title = title
+        ws.append(["PE Name", "Checklist Title", "Entity Name", "Entity Number",
+                   "Compliance %", "Score Gap", "Status", "Estimated Budget"])
+        for i in range(20):
+            budget = edited_budget if sheet == 1 and i == 0 else (i + 1) * 500_000
+            ws.append([f"PE {i % 3}", f"Checklist {i % 2}", f"Entity {i % 4}",
+                       f"00{i % 4}", f"{(i * 17) % 100}%", i % 5,
+                       "OPEN" if i % 3 else "CLOSED", budget])
+    excel_buffer = io.BytesIO()
+    wb.save(excel_buffer)
+    return excel_buffer.getvalue()
+
+
+contents = make_workbook(500_000)
+edited = make_workbook(9_000_000)
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+response_cache.clear()
+sheet_cache.clear()
+with TestClient(app) as client:
+    before = client.get("/api/cache/stats").json()["responses"]
+
+    first = client.post("/api/analyze", files={"file": ("a.xlsx", contents, XLSX)})
+    second = client.post("/api/analyze", files={"file": ("b.xlsx", contents, XLSX)})
+    print(f"\n🚀 First upload: {first.status_code} {first.headers['X-Cache']}")
+    print(f"🚀 Second upload: {second.status_code} {second.headers['X-Cache']}")
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert first.content == second.content
+
+    after = client.get("/api/cache/stats").json()["responses"]
+    print(f"\n📊 Response cache: {after}")
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"] + 1
+    assert after["size_bytes"] >= len(first.content)
+
+    # Edit one sheet: the whole-file hash misses, the other sheet is reused
+    sheets_before = client.get("/api/cache/stats").json()["sheets"]
+    third = client.post("/api/analyze", files={"file": ("c.xlsx", edited, XLSX)})
+    sheets_after = client.get("/api/cache/stats").json()["sheets"]
+    print(f"\n🚀 Edited upload: {third.status_code} {third.headers['X-Cache']}")
+    print(f"📊 Sheet cache: {sheets_after}")
+    assert third.headers["X-Cache"] == "MISS"
+    assert sheets_after["hits"] == sheets_before["hits"] + 1
+    assert sheets_after["misses"] == sheets_before["misses"] + 1
+
+    body = third.json()
+    assert list(body["results"]) == ["Cached Findings", "Edited Findings"]
+    assert (body["results"]["Cached Findings"]
+            == first.json()["results"]["Cached Findings"])
+    budget = body["results"]["Edited Findings"]["analysis"]["financial_analysis"]
+    original = first.json()["results"]["Edited Findings"]["analysis"]["financial_analysis"]
+    assert budget["total_budget"] == original["total_budget"] + 8_500_000
+    assert body["overall_summary"]["sheets_processed"] == 2
+
+print("\n" + "=" * 80)
+print("✅ RESPONSE CACHE TEST PASSED")
+print("=" * 80)
@@ -0,0 +1,154 @@
+"""
+Test for response shaping
+/api/analyze?finding_fields=...&tender_fields=... → the full response with only those keys
+/api/analyze?large_lists=paged → first page of findings, the rest and the tenders from /api/results
+"""
+import random
+from unittest import mock
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.response_cache import response_cache, sheet_cache
+from app.services.response_shaping import paged_results
+from testing_utils import make_multi_tender_frame, workbook_bytes
+
+print("=" * 80)
+print("RESPONSE SHAPING TEST")
+print("=" * 80)
+
+contents = workbook_bytes({"Tenders": make_multi_tender_frame(1500, groups=150)})
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+files = {"file": ("tenders.xlsx", contents, XLSX)}
+
+
+def analyze(client, **params):
+    random.seed(0)
+    return client.post("/api/analyze", files=files, params=params)
+
+
+def pick(record, fields):
+    return {key: value for key, value in record.items() if key in fields}
+
+
+with TestClient(app) as client:
+    response_cache.clear()
+    sheet_cache.clear()
+    full = analyze(client)
+    assert full.status_code == 200, full.text
+    everything = full.json()["results"]["Tenders"]["analysis"]
+    print(f"\n📦 Full response: {len(full.content):,} bytes, "
+          f"{len(everything['detailed_findings']['findings'])} findings")
+
+    # Field selection keeps only the named keys
+    print("\n✂️  Field selection:")
+    finding_fields = {"pe_name", "status", "tenders"}
+    response = analyze(client, finding_fields="pe_name, status,tenders",
+                       tender_fields="tender_number")
+    assert response.status_code == 200, response.text
+    assert response.headers["X-Cache"] == "MISS"
+    analysis = response.json()["results"]["Tenders"]["analysis"]
+    print(f"  {len(response.content):,} bytes")
+    assert len(response.content) < len(full.content)
+
+    expected = [
+        {**pick(finding, finding_fields),
+         "tenders": [pick(tender, {"tender_number"}) for tender in finding["tenders"]]}
+        for finding in everything["detailed_findings"]["findings"]
+    ]
+    assert analysis["detailed_findings"]["findings"] == expected
+    for pe_name, entry in analysis["pe_analysis"].items():
+        if isinstance(entry, dict):
+            assert entry["tender_details"] == [
+                {"tender_number": tender["tender_number"]}
+                for tender in everything["pe_analysis"][pe_name]["tender_details"]]
+    assert analysis["total_budget"] == everything["total_budget"]
+
+    # Cached under its own key, apart from the full response
+    repeat = analyze(client, finding_fields="tenders,status,pe_name",
+                     tender_fields="tender_number")
+    assert repeat.headers["X-Cache"] == "HIT" and repeat.content == response.content
+    assert analyze(client).content == full.content
+
+    # Paged lists
+    print("\n📄 Paged lists:")
+    response = analyze(client, large_lists="paged", page_size=200)
+    assert response.status_code == 200, response.text
+    assert response.headers["X-Cache"] == "MISS"
+    analysis = response.json()["results"]["Tenders"]["analysis"]
+    details = analysis["detailed_findings"]
+    print(f"  {len(response.content):,} bytes, first page {len(details['findings'])} "
+          f"of {details['total']}")
+    assert len(response.content) < len(full.content) / 2
+    assert details["total"] == len(everything["detailed_findings"]["findings"])
+
+    findings = details["findings"]
+    cursor = details["next_cursor"]
+    pages = 1
+    while cursor is not None:
+        page = client.get(details["findings_url"],
+                          params={"cursor": cursor, "limit": 500}).json()
+        assert page["total"] == details["total"]
+        findings += page["findings"]
+        cursor = page["next_cursor"]
+        pages += 1
+    print(f"  {pages} pages fetched")
+    assert findings == everything["detailed_findings"]["findings"]
+
+    # Every entity links to its tenders
+    for pe_name, entry in list(analysis["pe_analysis"].items())[:20]:
+        if not isinstance(entry, dict):
+            continue
+        assert "tender_details" not in entry and "tender_numbers" not in entry
+        url = entry["tenders_url"].split("?")[0]
+        page = client.get(url, params={"pe": pe_name, "limit": 2}).json()
+        tenders = page["tenders"]
+        while page["next_cursor"] is not None:
+            page = client.get(url, params={"pe": pe_name, "limit": 2,
+                                           "cursor": page["next_cursor"]}).json()
+            tenders += page["tenders"]
+        assert tenders == everything["pe_analysis"][pe_name]["tender_details"]
+    top = analysis["top_entities_by_budget"]["entities"][0]
+    assert client.get(top["tenders_url"]).json()["pe_name"] == top["entity_name"]
+
+    # Field selection on the pages
+    page = client.get(details["findings_url"], params={"fields": "status"}).json()
+    assert page["findings"] == [pick(finding, {"status"})
+                                for finding in everything["detailed_findings"]["findings"][:100]]
+
+    # Paged responses are not cached
+    again = analyze(client, large_lists="paged", page_size=200)
+    assert again.headers["X-Cache"] == "MISS"
+    assert again.json()["results"]["Tenders"]["analysis"]["detailed_findings"]["findings_url"] \
+        != details["findings_url"]
+    # ... and do not replace the cached full response
+    plain = analyze(client)
+    assert plain.headers["X-Cache"] == "HIT" and plain.content == full.content
+
+    print("\n⚠️  Errors:")
+    unknown_result = details["findings_url"].replace(
+        details["findings_url"].split("/")[3], "0" * 32)
+    for label, response, status in [
+        ("unknown finding field", analyze(client, finding_fields="pe_name,kpi"), 400),
+        ("unknown mode", analyze(client, large_lists="lazy"), 400),
+        ("bad cursor", client.get(details["findings_url"], params={"cursor": "x"}), 400),
+        ("bad page fields", client.get(details["findings_url"], params={"fields": "kpi"}), 400),
+        ("unknown result", client.get(unknown_result), 404),
+        ("unknown sheet", client.get(details["findings_url"].replace("Tenders", "Other")), 404),
+        ("unknown entity", client.get(top["tenders_url"].split("?")[0],
+                                      params={"pe": "PE 99999"}), 404),
+    ]:
+        print(f"  {label}: {response.status_code} {response.json()['detail']}")
+        assert response.status_code == status, label
+
+    paged_results.delete(details["findings_url"].split("/")[3])
+    assert client.get(details["findings_url"]).status_code == 404
+
+    # Lists the store cannot hold fail the request rather than hand out
+    # links that would 404
+    with mock.patch.object(paged_results, "max_bytes", 1000):
+        response = analyze(client, large_lists="paged", page_size=200)
+    print(f"  lists over PAGED_RESULT_BYTES: {response.status_code} {response.json()['detail'][:60]}")
+    assert response.status_code == 413
+
+print("\n" + "=" * 80)
+print("✅ RESPONSE SHAPING TEST PASSED")
+print("=" * 80)
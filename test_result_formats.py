@@ -0,0 +1,119 @@
+"""
+Test for binary result formats
+Accept: application/msgpack → the JSON document in MessagePack
+Accept: application/vnd.apache.arrow.stream + table= → one row per finding, PE or entity
+"""
+import json
+from unittest import mock
+import pandas as pd
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import result_formats
+from app.services.result_formats import MEDIA_TYPES, msgpack, negotiate_format, pa
+from app.services.response_cache import response_cache, sheet_cache
+from testing_utils import make_multi_tender_frame, workbook_bytes
+
+print("=" * 80)
+print("RESULT FORMATS TEST")
+print("=" * 80)
+
+print(f"\n📦 Available formats: {list(MEDIA_TYPES)}")
+for header, expected in [
+    (None, "json"),
+    ("*/*", "json"),
+    ("application/json", "json"),
+    ("text/html, application/*;q=0.5", "json"),
+    ("application/msgpack", "msgpack" if msgpack else None),
+    ("application/x-msgpack, application/json;q=0.1", "msgpack" if msgpack else "json"),
+    ("application/vnd.apache.arrow.stream", "arrow" if pa else None),
+    # Headers naming none of the formats get JSON, as before there were others
+    ("text/csv", "json"),
+    ("text/plain", "json"),
+]:
+    assert negotiate_format(header) == expected, header
+
+# Only a format the server lacks the library for is refused
+with mock.patch.dict(result_formats.MEDIA_TYPES), \
+        mock.patch.dict(result_formats.UNAVAILABLE_MEDIA_TYPES):
+    result_formats.UNAVAILABLE_MEDIA_TYPES["msgpack"] = result_formats.MEDIA_TYPES.pop(
+        "msgpack", result_formats.MSGPACK)
+    assert negotiate_format("application/msgpack") is None
+    assert negotiate_format("application/msgpack, application/json;q=0.5") == "json"
+
+contents = workbook_bytes({"Tenders": make_multi_tender_frame(400, groups=40)})
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+files = {"file": ("tenders.xlsx", contents, XLSX)}
+
+with TestClient(app) as client:
+    response_cache.clear()
+    sheet_cache.clear()
+
+    def post(accept, **params):
+        return client.post("/api/analyze", files=files, params=params,
+                           headers={"Accept": accept})
+
+    plain = post("application/json")
+    assert plain.headers["content-type"] == "application/json"
+    expected = plain.json()["results"]["Tenders"]
+    print(f"\n🚀 JSON: {len(plain.content):,} bytes")
+
+    response = post("text/csv")
+    print(f"  text/csv: {response.status_code} {response.headers['content-type']}")
+    assert response.status_code == 200 and response.content == plain.content
+
+    if msgpack is None:
+        print("\n⚠️  msgpack is not installed - skipping MessagePack responses")
+        response = post("application/msgpack")
+        print(f"  application/msgpack: {response.status_code} {response.json()['detail']}")
+        assert response.status_code == 406
+    else:
+        response = post("application/msgpack")
+        assert response.status_code == 200, response.text
+        assert response.headers["content-type"] == "application/msgpack"
+        assert "Accept" in response.headers["vary"]
+        body = msgpack.unpackb(response.content)
+        print(f"  MessagePack: {len(response.content):,} bytes")
+        # Everything but the randomly worded summary text
+        assert body["results"]["Tenders"]["analysis"] == expected["analysis"]
+        assert body["results"]["Tenders"]["insights"] == expected["insights"]
+
+        # Cached apart from the JSON response
+        assert post("application/msgpack").headers["x-cache"] == "HIT"
+        assert post("application/json").content == plain.content
+
+    if pa is None:
+        print("\n⚠️  pyarrow is not installed - skipping Arrow responses")
+    else:
+        accept = "application/vnd.apache.arrow.stream"
+        analysis = expected["analysis"]
+        for table, rows in [
+            ("detailed_findings", analysis["detailed_findings"]["findings"]),
+            ("pe_analysis", [{"pe_name": pe_name, **entry}
+                             for pe_name, entry in analysis["pe_analysis"].items()
+                             if isinstance(entry, dict)]),
+            ("detailed_entities", []),
+        ]:
+            response = post(accept, table=table)
+            assert response.status_code == 200, response.text
+            assert response.headers["content-type"] == accept
+            data = pa.ipc.open_stream(response.content).read_all()
+            print(f"  Arrow {table}: {len(response.content):,} bytes, "
+                  f"{data.num_rows} rows x {data.num_columns} columns")
+            assert data.schema.metadata[b"table"] == table.encode()
+            assert data.num_rows == len(rows)
+
+            decoded = [{key: value for key, value in row.items()
+                        if key != "sheet" and value is not None}
+                       for row in data.to_pylist()]
+            assert decoded == rows, table
+            assert set(data.column("sheet").to_pylist()) <= {"Tenders"}
+
+        for label, params in [("no table", {}), ("unknown table", {"table": "kpis"}),
+                              ("paged", {"table": "pe_analysis", "large_lists": "paged"})]:
+            response = post(accept, **params)
+            print(f"  {label}: {response.status_code} {response.json()['detail']}")
+            assert response.status_code == 400
+
+print("\n" + "=" * 80)
+print("✅ RESULT FORMATS TEST PASSED")
+print("=" * 80)
@@ -0,0 +1,82 @@
+"""
+Test for row-chunked sheet analysis
+Row chunks aggregated separately and merged → same result as analyze_sheet
+"""
+import pickle
+import numpy as np
+import pandas as pd
+from app.services.analysis_engine import analyze_sheet
+from app.services.sheet_aggregate import SheetAggregate, analyze_sheet_chunks
+from testing_utils import make_detailed_findings_frame, same_rounded
+
+print("=" * 80)
+print("CHUNKED SHEET ANALYSIS TEST")
+print("=" * 80)
+
+
+def chunked(df, size):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+df = make_detailed_findings_frame(1500, groups=60, seed=7)
+
+# Blanks and unparseable values the cleaners turn into NaN
+rng = np.random.default_rng(7)
+for column, share in [("Estimated Budget", 4), ("Compliance %", 5),
+                      ("PE Category", 6), ("PE Name", 6), ("Entity Name", 6)]:
+    rows = df.index[rng.choice(len(df), size=len(df) // share)]
+    df.loc[rows, column] = "n/a" if column == "Compliance %" else None
+
+expected = analyze_sheet(df)
+
+print("\n🧩 Chunk sizes:")
+# 97-row chunks are more than MERGE_BATCH, so they are merged in batches
+for size in [1500, 750, 214, 97]:
+    result = analyze_sheet_chunks(chunked(df, size))
+    print(f"  {size:>4} rows: {'same' if same_rounded(result, expected) else 'DIFFERENT'}")
+    assert same_rounded(result, expected), size
+
+# A single row per chunk
+small = df.head(5)
+assert same_rounded(analyze_sheet_chunks(chunked(small, 1)), analyze_sheet(small))
+
+# Merge order must not matter: first occurrences decide ties
+aggregates = [SheetAggregate.from_rows(chunk, start)
+              for chunk, start in zip(chunked(df, 300), range(0, len(df), 300))]
+merged = aggregates[-1]
+for aggregate in reversed(aggregates[:-1]):
+    merged = aggregate.merge(merged)
+assert same_rounded(merged.finalize(), expected)
+assert same_rounded(SheetAggregate.combine(aggregates[::-1]).finalize(), expected)
+print("\n🔀 Merged in reverse order: same")
+
+# An average on a rounding tie: 43.215 rounds to 43.21 in analyze_sheet,
+# whose sum of these values is a bit below the exact 259.29; merged sums
+# can round it the other way
+tied = pd.DataFrame({
+    "PE Name": ["PE 1"] * 6,
+    "Checklist Title": ["Checklist 1"] * 6,
+    "Compliance %": [0.0, 75.0, 80.0, 0.0, 14.29, 90.0],
+    "Score Gap": [1] * 6,
+    "Status": ["OPEN", "CLOSED"] * 3
+})
+tied_expected = analyze_sheet(tied)
+print(f"\n⚖️  Tied average: {tied_expected['pe_name_analysis']['PE 1']['average_compliance']}")
+assert same_rounded(analyze_sheet_chunks([tied.iloc[:3], tied.iloc[3:]]), tied_expected)
+for seed in [1, 3]:
+    sheet = make_detailed_findings_frame(2000, seed=seed)
+    result = analyze_sheet_chunks(chunked(sheet, 97))
+    assert same_rounded(result, analyze_sheet(sheet)), seed
+print("🧮 Chunked averages on ties: within 0.01")
+
+# Aggregates are plain pandas objects and survive pickling
+assert same_rounded(pickle.loads(pickle.dumps(merged)).finalize(), expected)
+print("🥒 Pickled aggregate: same")
+
+# Missing columns are reported like analyze_sheet does
+missing = analyze_sheet_chunks(chunked(df.drop(columns=["Status"]), 500))
+assert missing == analyze_sheet(df.drop(columns=["Status"]))
+
+print("\n" + "=" * 80)
+print("✅ CHUNKED SHEET ANALYSIS TEST PASSED")
+print("=" * 80)
@@ -0,0 +1,142 @@
+"""
+Integration test for upload-once file sessions
+Upload → file_id → validate / preview / analyze without re-sending the file
+"""
+import io
+import shutil
+import tempfile
+from openpyxl import Workbook
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.columnar_cache import columnar_cache, feather
+from app.services.response_cache import response_cache, sheet_cache
+from app.services.ttl_store import TTLStore
+from app.services.uploads import upload_store
+from app.services.worker_pool import analysis_pool
+
+print("=" * 80)
+print("UPLOAD SESSION TEST")
+print("=" * 80)
+
+# Byte-bounded TTL store evicts the oldest entries first
+store = TTLStore(ttl=60, max_bytes=10, sizeof=len)
+store.set("a", "12345")
+store.set("b", "1234")
+store.set("c", "123")                     # 12 bytes: evicts a
+assert "a" not in store and store.size == 7
+assert store.set("huge", "x" * 11) is False
+assert store.get("b") == "1234" and len(store) == 2
+
+wb = Workbook()
+ws1 = wb.active
+ws1.title = "Audit Findings"
+ws1.append(["PE Name", "Checklist Title", "Entity Name", "Entity Number",
+            "Compliance %", "Score Gap", "Status", "Estimated Budget", "Auditor"])
+for i in range(25):
+    ws1.append([f"PE {i % 4}", f"Checklist {i % 3}", f"Entity {i % 5}", f"00{i % 5}",
+                f"{(i * 11) % 100}%", i % 7, "OPEN" if i % 2 else "CLOSED",
+                (i + 1) * 750_000, f"Auditor {i % 2}"])
+
+ws2 = wb.create_sheet("Entity Scores")
+ws2.append(["Procuring Entity", "Overall %", "Status"])
+for i in range(8):
+    ws2.append([f"Entity {i}", f"{50 + i * 5}%", "Active"])
+
+ws3 = wb.create_sheet("Notes")
+ws3.append(["Notes"])
+ws3.append(["Prepared for the audit committee"])
+
+excel_buffer = io.BytesIO()
+wb.save(excel_buffer)
+contents = excel_buffer.getvalue()
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+files = {"file": ("session.xlsx", contents, XLSX)}
+
+with TestClient(app) as client:
+    print("\n🚀 POST /api/upload")
+    response = client.post("/api/upload", files=files)
+    assert response.status_code == 200, response.text
+    upload = response.json()
+    file_id = upload["file_id"]
+    print(f"  file_id: {file_id}")
+    for sheet_name, sheet in upload["sheets"].items():
+        print(f"  {sheet_name}: {sheet['total_rows']} rows x {sheet['total_columns']} columns")
+    assert upload["sheets"]["Audit Findings"]["total_rows"] == 25
+
+    # Same responses as sending the file each time
+    for endpoint in ("/api/validate", "/api/preview"):
+        by_id = client.post(endpoint, data={"file_id": file_id})
+        direct = client.post(endpoint, files=files)
+        print(f"\n📋 {endpoint}: {by_id.status_code}")
+        assert by_id.status_code == 200
+        assert by_id.json() == direct.json()
+
+    response_cache.clear()
+    sheet_cache.clear()
+    by_id = client.post("/api/analyze", data={"file_id": file_id})
+    assert by_id.status_code == 200 and by_id.headers["X-Cache"] == "MISS"
+    response_cache.clear()
+    sheet_cache.clear()
+    direct = client.post("/api/analyze", files=files)
+    print(f"\n📊 /api/analyze: {by_id.status_code}")
+    by_id, direct = by_id.json(), direct.json()
+    assert list(by_id["results"]) == list(direct["results"])
+    for sheet_name in direct["results"]:
+        for key in ("data_format", "format_info", "analysis"):
+            assert by_id["results"][sheet_name][key] == direct["results"][sheet_name][key]
+
+    # The session shares the response cache with direct uploads of the file
+    again = client.post("/api/analyze", data={"file_id": file_id})
+    assert again.headers["X-Cache"] == "HIT"
+
+    assert client.post("/api/analyze").status_code == 400
+    assert client.post("/api/validate", data={"file_id": "unknown"}).status_code == 404
+
+    assert client.delete(f"/api/upload/{file_id}").status_code == 200
+    assert client.post("/api/preview", data={"file_id": file_id}).status_code == 404
+
+# With the columnar cache a session keeps only the file, and workers read
+# the sheets by digest (run in this process here, to share the directory)
+if feather is not None:
+    analysis_pool.shutdown()
+    pool_size, analysis_pool.size = analysis_pool.size, 0
+    directory = tempfile.mkdtemp()
+    columnar_cache.directory = directory
+
+    try:
+        with TestClient(app) as client:
+            upload = client.post("/api/upload", files=files).json()
+            session = upload_store.get(upload["file_id"])
+            print(f"\n💾 Stored session: {upload['memory_bytes']} bytes kept")
+            assert session.stored and session.sheets is None
+            assert upload["memory_bytes"] == len(contents)
+            assert upload["sheets"]["Audit Findings"]["total_rows"] == 25
+
+            def same_responses():
+                for endpoint in ("/api/validate", "/api/preview"):
+                    by_id = client.post(endpoint, data={"file_id": session.id})
+                    assert by_id.json() == client.post(endpoint, files=files).json()
+
+                response_cache.clear()
+                sheet_cache.clear()
+                by_id = client.post("/api/analyze", data={"file_id": session.id}).json()
+                for sheet_name, result in direct["results"].items():
+                    for key in ("data_format", "format_info", "analysis"):
+                        assert by_id["results"][sheet_name][key] == result[key]
+
+            same_responses()
+
+            # Evicted from the cache: read from the session's file, which
+            # stores the sheets again
+            shutil.rmtree(directory)
+            same_responses()
+            assert columnar_cache.stored(session.digest, list(session.headers))
+            print("♻️  Evicted sheets read again from the session's file")
+    finally:
+        columnar_cache.directory = ""
+        shutil.rmtree(directory, ignore_errors=True)
+        analysis_pool.size = pool_size
+
+print("\n" + "=" * 80)
+print("✅ UPLOAD SESSION TEST PASSED")
+print("=" * 80)
@@ -0,0 +1,184 @@
+"""
+Shared helpers for the test scripts and the benchmarks
+
+Synthetic audit workbooks, whose rows follow the column layout of the
+formats handled by app/services/format_detector.py, with paragraph-length
+free text in the narrative columns so parse costs resemble real audit
+exports; and comparisons of analysis results.
+"""
+import io
+import json
+import math
+import random
+
+import pandas as pd
+from openpyxl import Workbook
+
+STATUSES = ["OPEN", "CLOSED"]
+AUDIT_TYPES = ["TENDERING", "CONTRACT MANAGEMENT", "PLANNING"]
+PE_CATEGORIES = ["PA", "LGA", "MDA"]
+TENDER_TYPES = ["W", "G", "NC", "C"]
+TENDER_TYPE_NAMES = {"W": "Works", "G": "Goods",
+                     "NC": "Non Consultancy Services", "C": "Consultancy Services"}
+
+NARRATIVE = ("Mapitio ya nyaraka za zabuni yamebaini kuwa taratibu za "
+             "ununuzi hazikuzingatiwa kikamilifu katika hatua ya tathmini. ")
+
+
+def _text(rng, sentences=4):
+    return NARRATIVE * rng.randint(1, sentences)
+
+
+def tender_reference(rng, pe_code):
+    kind = rng.choice(TENDER_TYPES)
+    number = (f"TR{pe_code}/{rng.randint(1, 999):03d}/2024/2025/"
+              f"{kind}/{rng.randint(1, 60):02d}")
+    budget = rng.randint(1, 800) * 1_000_000
+    return (f"{number} (Own Funds, Budget: {budget}, {TENDER_TYPE_NAMES[kind]}, "
+            f"National Competitive Tendering)"), budget
+
+
+def make_detailed_findings_frame(rows, groups=200, seed=7):
+    """Detailed findings rows with `groups` distinct PEs/checklists/entities"""
+    rng = random.Random(seed)
+    records = []
+
+    for i in range(rows):
+        expected = rng.randint(1, 10)
+        actual = rng.randint(0, expected)
+        group = rng.randrange(groups)
+        records.append({
+            "#": i + 1,
+            "PE Name": f"PE {group:05d}",
+            "PE Category": rng.choice(PE_CATEGORIES),
+            "Financial Year": "2024/2025",
+            "Audit Type": rng.choice(AUDIT_TYPES),
+            "Checklist Title": f"Checklist {rng.randrange(groups):05d}",
+            "Requirement Name": _text(rng),
+            "Finding Title": f"Finding {i}",
+            "Finding Description": _text(rng),
+            "Recommendation": _text(rng, 2),
+            "Implication": _text(rng),
+            "Management Response": _text(rng),
+            "Auditor Opinion": _text(rng),
+            "Red Flag": rng.choice(["YES", "NO", "NO", "NO"]),
+            "Expected Score": expected,
+            "Actual Score": actual,
+            "Score Gap": expected - actual,
+            "Compliance %": f"{actual / expected * 100:.2f}%",
+            "Status": rng.choice(STATUSES),
+            "Entity Name": f"Entity {rng.randrange(groups):05d}",
+            "Entity Number": f"TR{group}/{i % 50:03d}",
+            "Estimated Budget": rng.randint(1, 300) * 1_000_000,
+            "Created Date": "14/10/2025, 20:47",
+        })
+
+    return pd.DataFrame.from_records(records)
+
+
+def make_multi_tender_frame(rows, groups=200, seed=11):
+    """Multi-tender findings rows with one to four tenders per finding"""
+    rng = random.Random(seed)
+    records = []
+
+    for i in range(rows):
+        group = rng.randrange(groups)
+        tenders = [tender_reference(rng, 100 + group)
+                   for _ in range(rng.randint(1, 4))]
+        records.append({
+            "#": i + 1,
+            "PE Name": f"PE {group:05d}",
+            "Checklist Title": f"Checklist {rng.randrange(groups):05d}",
+            "Requirement Name": _text(rng),
+            "Tenders": ", ".join(text for text, _ in tenders),
+            "Total Budget": sum(budget for _, budget in tenders),
+            "Tender Count": len(tenders),
+            "Finding Title": f"Finding {i}",
+            "Finding Description": _text(rng),
+            "Implication": _text(rng),
+            "Recommendation": _text(rng, 2),
+            "Management Response": _text(rng),
+            "Auditor Opinion": _text(rng),
+            "Red Flag": rng.choice(["RED FLAG", "NOT RED FLAG", "NOT RED FLAG"]),
+            "Status": rng.choice(STATUSES),
+            "Created At": "03/09/2025",
+        })
+
+    return pd.DataFrame.from_records(records)
+
+
+def make_tender_column(rows, seed=13, pool=None):
+    """
+    A bare `Tenders` column for the tender parser benchmarks
+
+    By default every tender reference is freshly generated. With pool, cells
+    draw from `pool` shared references, as in real sheets where several
+    findings cite the same tenders.
+    """
+    rng = random.Random(seed)
+    shared = None
+    if pool is not None:
+        shared = [tender_reference(rng, 100 + i % 500)[0] for i in range(pool)]
+
+    values = []
+    for i in range(rows):
+        count = rng.randint(1, 4)
+        if shared is None:
+            tenders = [tender_reference(rng, 100 + i % 500)[0]
+                       for _ in range(count)]
+        else:
+            tenders = rng.sample(shared, count)
+        values.append(", ".join(tenders))
+
+    return pd.Series(values, name="Tenders")
+
+
+def workbook_bytes(sheets):
+    """
+    Serialise {sheet_name: DataFrame} to xlsx bytes with openpyxl
+
+    A regular (not write-only) workbook is used so the file carries shared
+    strings and a <dimension> element, like workbooks saved by Excel.
+    """
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+
+    for sheet_name, df in sheets.items():
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append(list(df.columns))
+        for row in df.itertuples(index=False, name=None):
+            worksheet.append(list(row))
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def same(left, right):
+    """Whether two analysis results are equal, compared as encoded JSON"""
+    return json.dumps(left, default=str) == json.dumps(right, default=str)
+
+
+def same_number(expected, actual):
+    """Whether a cleaned value matches, None and NaN both standing for NaN"""
+    if expected is None or math.isnan(expected):
+        return math.isnan(actual)
+    return expected == actual
+
+
+def same_rounded(left, right):
+    """
+    same(), except that floats may differ by 0.01: an analysis merged from
+    partial sums can round an average on a 2-decimal tie (e.g. 43.215)
+    the other way
+    """
+    if isinstance(left, dict) and isinstance(right, dict):
+        return list(left) == list(right) and all(
+            same_rounded(value, right[key]) for key, value in left.items())
+    if isinstance(left, list) and isinstance(right, list):
+        return len(left) == len(right) and all(
+            same_rounded(a, b) for a, b in zip(left, right))
+    if isinstance(left, float) and isinstance(right, float):
+        return math.isclose(left, right, rel_tol=1e-12, abs_tol=0.01 + 1e-9) or (
+            math.isnan(left) and math.isnan(right))
+    return same(left, right)